@@ -0,0 +1,140 @@
+import heapq
+import math
+
+from landmark_index import reverse_graph
+
+# Alternatives may take at most this many times as long as the fastest path
+MAX_STRETCH = 1.4
+
+# Edges of every path found are made this much more expensive for the next round
+PENALTY = 1.4
+
+# Paths sharing more than this share of their length with an accepted path are near-duplicates
+MAX_OVERLAP = 0.7
+
+# Penalty rounds allowed per requested path before giving up
+ROUNDS_PER_PATH = 3
+
+
+class AlternativePaths:
+    """Meaningfully different paths between two nodes for one travel mode (penalty method)
+
+    One backward Dijkstra from the target, stopped at MAX_STRETCH times the
+    fastest trip, gives the exact remaining time from every node that can
+    still be part of an acceptable path. Each round is an A* search on
+    penalized edge times using that tree as heuristic (penalties only make
+    edges dearer, so it stays admissible), skipping nodes outside the tree
+    or too slow to finish within the stretch. The first round follows the
+    tree straight to the target; later rounds only explore around the
+    penalized edges. A path is kept if it overlaps no kept path by more
+    than MAX_OVERLAP of its length.
+    """
+
+    def __init__(self, network):
+        self.network = network
+        self.reverse = None     # reversed CSR arrays, built on first use
+
+    def search(self, source, target, mode, k=3):
+        """Up to k path dicts (as RoadNetwork.shortest_path), fastest first"""
+        if source == target:
+            return []
+        tree, limit = self.backward_tree(source, target, mode)
+        if tree is None:
+            return []
+
+        lengths = self.network.lengths
+        penalties = {}
+        paths = []
+        for _ in range(k * ROUNDS_PER_PATH):
+            path = self.penalized_path(source, target, mode, tree, limit, penalties)
+            if path is None:
+                break
+            edges = set(path['edges'])
+            if all(overlap(edges, other, lengths) <= MAX_OVERLAP for other in paths):
+                paths.append(path)
+                if len(paths) == k:
+                    break
+            for e in edges:
+                penalties[e] = penalties.get(e, 1.0) * PENALTY
+        return sorted(paths, key=lambda path: path['time'])
+
+    def backward_tree(self, source, target, mode):
+        """(node -> seconds to target, time limit) for nodes within MAX_STRETCH of the fastest trip
+
+        Returns (None, None) if source cannot reach target.
+        """
+        if self.reverse is None:
+            self.reverse = reverse_graph(self.network)
+        offsets, reverse_targets, edge_order = self.reverse
+        weights = self.network.edge_times[mode]
+
+        tentative = {target: 0.0}
+        tree = {}
+        limit = math.inf
+        heap = [(0.0, target)]
+        heappush, heappop = heapq.heappush, heapq.heappop
+        while heap:
+            d, u = heappop(heap)
+            if d > limit:
+                break
+            if u in tree:
+                continue
+            tree[u] = d
+            if u == source:
+                limit = d * MAX_STRETCH
+            for r in range(offsets[u], offsets[u + 1]):
+                w = weights[edge_order[r]]
+                if w < 0:
+                    continue
+                v = reverse_targets[r]
+                nd = d + w
+                if nd < tentative.get(v, math.inf):
+                    tentative[v] = nd
+                    heappush(heap, (nd, v))
+
+        if source not in tree:
+            return None, None
+        return tree, limit
+
+    def penalized_path(self, source, target, mode, tree, limit, penalties):
+        """A* on penalized edge times, with the path's real time kept within limit"""
+        network = self.network
+        weights = network.edge_times[mode]
+        offsets, targets = network.offsets, network.targets
+
+        cost = {source: 0.0}
+        parent = {source: -1}
+        parent_edge = {}
+        closed = set()
+        heap = [(tree[source], 0.0, 0.0, source)]
+        heappush, heappop = heapq.heappush, heapq.heappop
+
+        while heap:
+            _, c, seconds, u = heappop(heap)
+            if u == target:
+                return network.build_path(parent, parent_edge, target, seconds)
+            if u in closed:
+                continue
+            closed.add(u)
+            for e in range(offsets[u], offsets[u + 1]):
+                w = weights[e]
+                if w < 0:
+                    continue
+                v = targets[e]
+                remaining = tree.get(v)
+                if remaining is None or seconds + w + remaining > limit:
+                    continue
+                nc = c + w * penalties.get(e, 1.0)
+                if nc < cost.get(v, math.inf):
+                    cost[v] = nc
+                    parent[v] = u
+                    parent_edge[v] = e
+                    heappush(heap, (nc + remaining, nc, seconds + w, v))
+        return None
+
+
+def overlap(edges, path, lengths):
+    """Share of the shorter of two paths that both use (edges is a set of the first one's edges)"""
+    shared = sum(lengths[e] for e in path['edges'] if e in edges) / 1000
+    shortest = min(sum(lengths[e] for e in edges) / 1000, path['distance'])
+    return shared / shortest if shortest > 0 else 1.0
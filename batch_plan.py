@@ -0,0 +1,201 @@
+"""Plan route options for many origin/destination pairs without the Tk window
+
+Usage: python batch_plan.py pairs.csv results.jsonl [--workers N] [--departure 2024-05-06T08:30]
+
+Input is a CSV file with columns start, end and optionally id and departure
+(ISO date/time), or a JSONL file with objects using the same keys. Each
+pair becomes one JSON line in the output with its route options and the
+CO₂ each option saves compared with driving. Lines are written as soon as
+their chunk finishes, so they are not in input order; use id to join them
+back to the input.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from itertools import islice
+from road_network import DEFAULT_NETWORK_DIR
+from gtfs_feed import DEFAULT_FEED_DIR
+from geocoder import DEFAULT_ADDRESS_FILE
+from route_planner import RoutePlanner
+from emission_model import co2_saved
+from segments import describe_segments
+
+# Pairs sent to a worker at a time, and chunks in flight per worker
+CHUNK_SIZE = 64
+CHUNKS_PER_WORKER = 4
+
+# Planner of the current worker process (loaded once by init_worker)
+worker_planner = None
+
+
+def init_worker(network_dir, feed_dir, address_file):
+    """Load the network, feed and address index once per worker process"""
+    global worker_planner
+    worker_planner = RoutePlanner.load(network_dir, feed_dir, address_file)
+
+
+def read_pairs(path, departure=None):
+    """Yield {'id', 'start', 'end', 'departure'} dicts from a CSV or JSONL file"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if path.endswith(('.jsonl', '.json')):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for number, row in enumerate(rows, 1):
+            yield {
+                'id': row.get('id') or number,
+                'start': row['start'],
+                'end': row['end'],
+                'departure': row.get('departure') or departure
+            }
+
+
+def plan_pair(planner, pair):
+    """Result record for one pair (with an error message instead of routes on failure)"""
+    result = {'id': pair['id'], 'start': pair['start'], 'end': pair['end']}
+    try:
+        result['routes'] = route_records(planner, pair)
+    except (LookupError, ValueError) as e:
+        result['error'] = str(e)
+    except Exception as e:
+        # Anything else is a bug for this pair only; the other pairs are still planned
+        result['error'] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def route_records(planner, pair):
+    """JSON-ready route options of one pair (LookupError if there is no route)"""
+    departure = datetime.fromisoformat(pair['departure']) if pair['departure'] else None
+    route_types = planner.route_options(pair['start'], pair['end'], departure)
+    if not route_types:
+        raise LookupError("No route found between these addresses")
+
+    return [
+        {
+            'type': route['type'],
+            'name': route['name'],
+            'eco': route['eco'],
+            'distance': round(route['distance'], 3),    # km
+            'time': round(route['time'], 1),            # minutes
+            'co2': round(route['co2'], 3),              # kg CO₂
+            'co2_saved': round(co2_saved(route['distance'], route['co2']), 3),
+            'transfers': route.get('transfers', 0),
+            'active_distance': round(route.get('active_distance', 0.0), 3),  # km walked/cycled
+            'transfer_info': describe_segments(route['segments']),
+            'segments': [
+                {
+                    'mode': segment.mode,
+                    'line': segment.line,
+                    'distance': round(segment.distance, 3),
+                    'time': round(segment.duration, 1),
+                    'co2': round(segment.co2, 3)
+                }
+                for segment in route['segments']
+            ]
+        }
+        for route in route_types
+    ]
+
+
+def error_lines(pairs, error):
+    """JSON lines recording the same error for every pair of a chunk"""
+    message = f"{type(error).__name__}: {error}"
+    return [json.dumps({'id': pair['id'], 'start': pair['start'], 'end': pair['end'], 'error': message},
+                       ensure_ascii=False)
+            for pair in pairs]
+
+
+def plan_chunk(pairs):
+    """Plan a chunk of pairs in a worker, returning ready-to-write JSON lines"""
+    return [json.dumps(plan_pair(worker_planner, pair), ensure_ascii=False) for pair in pairs]
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_batch(pairs, output, workers=None, chunk_size=CHUNK_SIZE,
+              network_dir=DEFAULT_NETWORK_DIR, feed_dir=DEFAULT_FEED_DIR,
+              address_file=DEFAULT_ADDRESS_FILE, progress=None):
+    """Plan pairs over a process pool and write one JSON line per pair to output
+
+    Only a few chunks per worker are in flight at once, so memory stays
+    flat however many pairs are read. A pair that fails gets an error
+    record, and so does every pair of a chunk whose worker failed, so one
+    bad pair never costs the results of the others. Returns the number of
+    pairs written.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = chunked(pairs, chunk_size)
+    written = 0
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(network_dir, feed_dir, address_file)) as executor:
+        pending = {}            # future -> its chunk of pairs
+        for chunk in islice(chunks, workers * CHUNKS_PER_WORKER):
+            pending[executor.submit(plan_chunk, chunk)] = chunk
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = pending.pop(future)
+                try:
+                    lines = future.result()
+                except Exception as e:
+                    lines = error_lines(chunk, e)
+                output.write('\n'.join(lines) + '\n')
+                written += len(lines)
+                # Keep the pool busy with the next chunk
+                for chunk in islice(chunks, 1):
+                    pending[executor.submit(plan_chunk, chunk)] = chunk
+            output.flush()
+            if progress:
+                progress(written)
+
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan route options for origin/destination pairs")
+    parser.add_argument('pairs', help="CSV or JSONL file with start, end (and optional id, departure)")
+    parser.add_argument('output', help="JSONL file to write results to ('-' for stdout)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="pairs per worker task")
+    parser.add_argument('--departure', help="departure for pairs without one, e.g. 2024-05-06T08:30")
+    parser.add_argument('--network', default=DEFAULT_NETWORK_DIR, help="road network folder")
+    parser.add_argument('--gtfs', default=DEFAULT_FEED_DIR, help="GTFS feed folder")
+    parser.add_argument('--addresses', default=DEFAULT_ADDRESS_FILE, help="address CSV file")
+    args = parser.parse_args()
+
+    # Without a road network the planner only makes up rough estimates
+    if not os.path.exists(os.path.join(args.network, 'nodes.csv')):
+        sys.exit(f"No road network found in {args.network}/")
+
+    started = time.perf_counter()
+
+    def progress(count):
+        elapsed = time.perf_counter() - started
+        print(f"\r{count} pairs planned ({count / elapsed:.0f}/s)", end='', file=sys.stderr)
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        run_batch(read_pairs(args.pairs, args.departure), output, args.workers, args.chunk_size,
+                  args.network, args.gtfs, args.addresses, progress)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Compare k alternative paths with and without the shared backward tree
+
+Usage: python benchmarks/bench_alternatives.py [network_dir] [queries] [k]
+
+The baseline runs the same penalty rounds as independent A* searches with
+the straight-line heuristic and no time bound, as if every alternative were
+planned from scratch.
+"""
+import math
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alternative_paths import AlternativePaths
+from road_network import RoadNetwork
+
+MODES = ('walking', 'cycling', 'driving')
+
+
+class StraightLineTree:
+    """Stands in for the backward tree: straight-line bound for every node"""
+
+    def __init__(self, heuristic):
+        self.heuristic = heuristic
+
+    def get(self, node):
+        return self.heuristic(node)
+
+    __getitem__ = get
+
+
+class IndependentSearches(AlternativePaths):
+    def backward_tree(self, source, target, mode):
+        return StraightLineTree(self.network.straight_line_heuristic(mode, target)), math.inf
+
+
+def time_search(planner, pairs, mode, k):
+    timings = []
+    counts = []
+    for source, target in pairs:
+        start = time.perf_counter()
+        paths = planner.search(source, target, mode, k)
+        timings.append((time.perf_counter() - start) * 1000)
+        counts.append(len(paths))
+    return statistics.median(timings), statistics.mean(counts)
+
+
+def main():
+    network_dir = sys.argv[1] if len(sys.argv) > 1 else 'network'
+    query_count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    k = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    network = RoadNetwork.load(network_dir)
+    random.seed(1)
+    pairs = [(random.randrange(network.node_count), random.randrange(network.node_count))
+             for _ in range(query_count)]
+
+    shared = AlternativePaths(network)
+    shared.backward_tree(0, 0, 'walking')   # build the reversed graph outside the timings
+    independent = IndependentSearches(network)
+
+    print(f"{'mode':>8} {'shared ms':>10} {'paths':>6} {'independent ms':>15} {'paths':>6}")
+    for mode in MODES:
+        # Walking and cycling trips are kept short, as in the route menu
+        if mode == 'driving':
+            mode_pairs = pairs
+        else:
+            mode_pairs = [(source, network.nearest_node(*nudge(network.node_location(source))))
+                          for source, _ in pairs]
+        shared_ms, shared_paths = time_search(shared, mode_pairs, mode, k)
+        independent_ms, independent_paths = time_search(independent, mode_pairs, mode, k)
+        print(f"{mode:>8} {shared_ms:>10.1f} {shared_paths:>6.1f} {independent_ms:>15.1f} {independent_paths:>6.1f}")
+
+
+def nudge(location):
+    """A point about 2 km away"""
+    lat, lon = location
+    return lat + 0.015, lon + 0.012
+
+
+if __name__ == '__main__':
+    main()
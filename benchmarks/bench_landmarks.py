@@ -0,0 +1,60 @@
+"""Compare plain A* with landmark (ALT) A* on the same road network
+
+Usage: python benchmarks/bench_landmarks.py [network_dir] [queries]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from landmark_index import LandmarkIndex, index_path
+from road_network import RoadNetwork
+
+
+def time_queries(network, pairs, mode, use_index):
+    timings = []
+    results = []
+    for source, target in pairs:
+        start = time.perf_counter()
+        path = network.shortest_path(source, target, mode, use_index=use_index)
+        timings.append((time.perf_counter() - start) * 1000)
+        results.append(path['time'] if path else None)
+    return timings, results
+
+
+def main():
+    network_dir = sys.argv[1] if len(sys.argv) > 1 else 'network'
+    query_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    start = time.perf_counter()
+    network = RoadNetwork.load(network_dir)
+    print(f"Loaded {network.node_count} nodes / {network.edge_count} edges in {time.perf_counter() - start:.2f}s")
+
+    if not network.load_landmark_index():
+        start = time.perf_counter()
+        network.landmark_index = LandmarkIndex.build(network)
+        network.landmark_index.save(index_path(network_dir))
+        print(f"Built landmark index in {time.perf_counter() - start:.2f}s")
+
+    rng = random.Random(42)
+    pairs = [(rng.randrange(network.node_count), rng.randrange(network.node_count)) for _ in range(query_count)]
+
+    for mode in ('driving', 'walking'):
+        plain, plain_results = time_queries(network, pairs, mode, use_index=False)
+        indexed, indexed_results = time_queries(network, pairs, mode, use_index=True)
+        repeated, _ = time_queries(network, pairs, mode, use_index=True)
+        mismatches = sum(
+            1 for a, b in zip(plain_results, indexed_results)
+            if (a is None) != (b is None) or (a is not None and abs(a - b) > 1e-3 * max(a, 1))
+        )
+        print(f"{mode:8s} plain A*: median {statistics.median(plain):8.2f} ms  mean {statistics.mean(plain):8.2f} ms")
+        print(f"{mode:8s} ALT A*:   median {statistics.median(indexed):8.2f} ms  mean {statistics.mean(indexed):8.2f} ms"
+              f"  (speed-up x{statistics.mean(plain) / max(statistics.mean(indexed), 1e-9):.1f}, {mismatches} mismatches)")
+        print(f"{mode:8s} repeated: median {statistics.median(repeated) * 1000:8.2f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Time leaderboard updates, ranks and top-10 lists against sorting every score
+
+Usage: python benchmarks/bench_leaderboard.py [users] [operations]
+
+Fills a RankTree with random CO₂ scores, then times moving one user to a
+new score, looking up a user's rank and reading the top 10, and compares
+the lookups with sorting all scores, which is what ranking without an
+incrementally kept structure costs.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leaderboard import RankTree
+
+
+def timed(call, arguments):
+    """Mean time per call (µs)"""
+    start = time.perf_counter()
+    for argument in arguments:
+        call(*argument)
+    return (time.perf_counter() - start) / len(arguments) * 1e6
+
+
+def main():
+    user_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    operation_count = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    random.seed(1)
+    users = [f"employee-{i:06d}" for i in range(user_count)]
+    scores = {user: round(random.uniform(0, 200), 2) for user in users}
+
+    start = time.perf_counter()
+    tree = RankTree.build(scores)
+    print(f"built a board of {len(tree)} users in {time.perf_counter() - start:.2f} s")
+
+    updates = [(random.choice(users), round(random.uniform(0, 200), 2)) for _ in range(operation_count)]
+    lookups = [(random.choice(users),) for _ in range(operation_count)]
+    update_us = timed(tree.update, updates)
+    rank_us = timed(tree.rank, lookups)
+    top_us = timed(tree.top, [(10,)] * operation_count)
+
+    for user, score in updates:
+        scores[user] = score
+    sort_repeat = max(1, operation_count // 1000)
+    sort_us = timed(lambda: sorted(scores.items(), key=lambda entry: (-entry[1], entry[0])), [()] * sort_repeat)
+    assert tree.top(10) == sorted(scores.items(), key=lambda entry: (-entry[1], entry[0]))[:10]
+
+    print(f"{'operation':<22} {'µs':>10}")
+    print(f"{'update score':<22} {update_us:>10.1f}")
+    print(f"{'rank of a user':<22} {rank_us:>10.1f}")
+    print(f"{'top 10':<22} {top_us:>10.1f}")
+    print(f"{'sort all (baseline)':<22} {sort_us:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
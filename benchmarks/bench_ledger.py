@@ -0,0 +1,81 @@
+"""Time appending, opening and replaying a user's CO₂ ledger
+
+Usage: python benchmarks/bench_ledger.py [events]
+
+Appends a history of mixed trips, rewards and exchanges for one user to a
+temporary database, then times a full replay of every event, opening the
+ledger (latest snapshot plus the events after it) and reading the totals.
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from co2_ledger import CO2Ledger, create_tables, CHALLENGE_GRAMS
+
+# Events appended per transaction while building the history
+BATCH = 1000
+
+
+def random_events(count):
+    events = []
+    balance = 0
+    for _ in range(count):
+        roll = random.random()
+        if roll < 0.6:
+            grams = random.randint(100, 4000)
+            balance += grams
+            events.append(('trip', grams, None, 0))
+        elif roll < 0.95 or balance < CHALLENGE_GRAMS:
+            events.append(('reward', 0, random.choice(('potion', 'sword', 'armor')), 1))
+        else:
+            challenges = balance // CHALLENGE_GRAMS
+            balance -= challenges * CHALLENGE_GRAMS
+            events.append(('exchange', -challenges * CHALLENGE_GRAMS, None, challenges))
+    return events
+
+
+def timed(call, repeat=5):
+    """Best of repeat runs (ms) and the last result"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = call()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best, result
+
+
+def main():
+    event_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    random.seed(1)
+    events = random_events(event_count)
+
+    with tempfile.TemporaryDirectory() as directory:
+        connection = sqlite3.connect(os.path.join(directory, 'user_data.db'))
+        connection.execute('PRAGMA journal_mode=WAL')
+        create_tables(connection)
+        ledger = CO2Ledger(connection, 'kiosk-user')
+        start = time.perf_counter()
+        for first in range(0, event_count, BATCH):
+            ledger.record_many(events[first:first + BATCH])
+        print(f"appended {len(ledger)} events in {time.perf_counter() - start:.2f} s")
+
+        replay_ms, replayed = timed(ledger.replay)
+        open_ms, opened = timed(lambda: CO2Ledger(connection, 'kiosk-user'))
+        totals_ms, _ = timed(lambda: opened.totals['balance_g'], 1000)
+        assert replayed == ledger.totals == opened.totals
+
+        print(f"full replay:        {replay_ms:>8.1f} ms")
+        print(f"open (snapshot):    {open_ms:>8.2f} ms")
+        print(f"read totals:        {totals_ms * 1000:>8.2f} µs")
+        print(f"balance {opened.balance_kg():.3f} kg CO₂, {opened.totals['trips']} trips, "
+              f"{opened.totals['challenges']} challenges")
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
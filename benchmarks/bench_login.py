@@ -0,0 +1,89 @@
+"""Time logging in to one profile out of many
+
+Usage: python benchmarks/bench_login.py [profiles] [logins]
+
+Fills a temporary profile database with random profiles, then times
+ProfileStore.switch_user for random users: cold logins read the database,
+hot ones come from the in-memory LRU of recent users (a few people taking
+turns at a kiosk).
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from user_store import UserStore
+from profile_store import ProfileStore, HOT_PROFILES
+
+# Profiles written per transaction while filling the database
+BATCH = 5000
+
+
+class NoTk:
+    """Stands in for the Tk root (saves are flushed by switch_user)"""
+
+    def after(self, ms, callback):
+        return 'job'
+
+    def after_cancel(self, job):
+        pass
+
+
+def random_profile():
+    return {
+        'total_co2_saved': round(random.uniform(0, 200), 2),
+        'total_calories': round(random.uniform(0, 5000), 1),
+        'game_challenges': random.randint(0, 20),
+        'inventory': {'potions': random.randint(0, 9), 'iron_sword': random.randint(0, 3),
+                      'iron_armor': random.randint(0, 3)},
+        'eco_routes_taken': random.randint(0, 500),
+        'player': {'level': random.randint(1, 30), 'exp': random.randint(0, 99),
+                   'attack': random.randint(20, 90), 'defense': random.randint(10, 60),
+                   'max_hp': random.randint(100, 500)}
+    }
+
+
+def time_logins(profile, users):
+    timings = []
+    for user in users:
+        start = time.perf_counter()
+        profile.switch_user(user)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99)], timings[-1]
+
+
+def main():
+    profile_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    login_count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    random.seed(1)
+    users = [f"employee-{i:06d}" for i in range(profile_count)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = UserStore(os.path.join(directory, 'user_data.db'))
+        start = time.perf_counter()
+        for first in range(0, profile_count, BATCH):
+            store.save_many((user, random_profile()) for user in users[first:first + BATCH])
+        print(f"wrote {store.user_count()} profiles in {time.perf_counter() - start:.1f} s")
+        store.close()
+
+        # Reopen, so logins do not find the profiles in SQLite's page cache
+        store = UserStore(os.path.join(directory, 'user_data.db'))
+        profile = ProfileStore(store, NoTk())
+        cold = time_logins(profile, random.sample(users, login_count))
+        regulars = random.sample(users, HOT_PROFILES)
+        profile.switch_user(regulars[0])
+        hot = time_logins(profile, [random.choice(regulars) for _ in range(login_count)])
+
+        print(f"{'login':>6} {'median ms':>10} {'p99 ms':>8} {'max ms':>8}")
+        for name, (median, p99, worst) in (('cold', cold), ('hot', hot)):
+            print(f"{name:>6} {median:>10.3f} {p99:>8.3f} {worst:>8.3f}")
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Time the bulk profile migrators and check that their memory use stays flat
+
+Usage: python benchmarks/bench_migration.py [profiles]
+
+Writes a JSON Lines file of legacy profiles (navigation-window and
+dragon-window layouts), then times importing it with import_jsonl and
+upgrading the same profiles in place in a database with migrate_database.
+Peak Python memory (tracemalloc, in a separate run) is measured for a
+tenth of the profiles and for all of them: a streaming migrator uses
+about the same for both.
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from user_store import UserStore
+from profile_schema import import_jsonl, migrate_database, SCHEMA_VERSION
+
+
+def legacy_profile():
+    """A profile as the navigation window (version 1) or the dragon window (version 2) saved it"""
+    inventory = {'potions': random.randint(0, 9), 'iron_sword': random.randint(0, 3),
+                 'iron_armor': random.randint(0, 3)}
+    data = {
+        'total_co2_saved': round(random.uniform(0, 200), 2),
+        'game_challenges': random.randint(0, 20),
+        'inventory': inventory,
+        'eco_routes_taken': random.randint(0, 500)
+    }
+    if random.random() < 0.5:
+        data['player'] = {'level': random.randint(1, 30), 'exp': random.randint(0, 99),
+                          'attack': random.randint(20, 90), 'defense': random.randint(10, 60),
+                          'max_hp': random.randint(100, 500), 'inventory': dict(inventory)}
+    return data
+
+
+def write_jsonl(path, count):
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(count):
+            f.write(json.dumps({'user_id': f"employee-{i:07d}", 'profile': legacy_profile()}) + '\n')
+
+
+def timed(call):
+    """(seconds, result)"""
+    start = time.perf_counter()
+    result = call()
+    return time.perf_counter() - start, result
+
+
+def peak_memory(call):
+    """Peak Python memory while call runs (MB, traced separately as tracing slows it down)"""
+    tracemalloc.start()
+    call()
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return peak
+
+
+def legacy_store(path, jsonl_path):
+    """Database of the profiles as earlier versions stored them (not upgraded)"""
+    store = UserStore(path)
+    with open(jsonl_path, 'r', encoding='utf-8') as f:
+        store.save_many((record['user_id'], record['profile']) for record in map(json.loads, f))
+    store.close()
+    return UserStore(path)
+
+
+def main():
+    profile_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    random.seed(1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'migration':<18} {'profiles':>9} {'seconds':>8} {'profiles/s':>11} {'peak MB':>8}")
+        for count in (profile_count // 10, profile_count):
+            jsonl_path = os.path.join(directory, f"profiles-{count}.jsonl")
+            write_jsonl(jsonl_path, count)
+
+            store = UserStore(os.path.join(directory, f"imported-{count}.db"))
+            seconds, imported = timed(lambda: import_jsonl(store, jsonl_path))
+            assert imported == count
+            traced = UserStore(os.path.join(directory, f"imported-traced-{count}.db"))
+            peak = peak_memory(lambda: import_jsonl(traced, jsonl_path))
+            print(f"{'import_jsonl':<18} {count:>9} {seconds:>8.2f} {count / seconds:>11.0f} {peak:>8.1f}")
+            for opened in (store, traced):
+                opened.close()
+
+            store = legacy_store(os.path.join(directory, f"legacy-{count}.db"), jsonl_path)
+            seconds, (read, upgraded) = timed(lambda: migrate_database(store))
+            assert read == upgraded == count
+            assert store.load('employee-0000000')['schema_version'] == SCHEMA_VERSION
+            traced = legacy_store(os.path.join(directory, f"legacy-traced-{count}.db"), jsonl_path)
+            peak = peak_memory(lambda: migrate_database(traced))
+            print(f"{'migrate_database':<18} {count:>9} {seconds:>8.2f} {count / seconds:>11.0f} {peak:>8.1f}")
+            for opened in (store, traced):
+                opened.close()
+
+
+if __name__ == '__main__':
+    main()
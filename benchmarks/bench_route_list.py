@@ -0,0 +1,88 @@
+"""Compare rebuilding every route card with the virtualized RouteList
+
+Usage: python benchmarks/bench_route_list.py [repeats]   (needs a display)
+"""
+import os
+import statistics
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from route_list import RouteList, RouteCard
+from segments import Segment
+
+RESULT_COUNTS = (6, 30, 100, 300, 1000)
+
+
+def make_routes(count):
+    routes = []
+    for i in range(count):
+        eco = i > 0
+        routes.append({
+            'name': f"🚌 Bus Route {i}" if eco else '🚗 Driving Route',
+            'eco': eco,
+            'distance': 5.0 + i * 0.1,
+            'time': 20.0 + i,
+            'co2': 0.3 if eco else 1.0,
+            'color': '#2196f3' if eco else '#f44336',
+            'segments': [
+                Segment('bus', 3.0, 10.0, 0.15, 'R3', 29100),
+                Segment('walking', 0.3, 4.0, 0.0),
+                Segment('bus', 2.0, 8.0, 0.1, 'R107', 30660)
+            ] if eco else [Segment('driving', 5.0, 10.0, 1.0)],
+            'rewards': [{'name': '💊 HP Potion'}] if i % 2 else []
+        })
+    return routes
+
+
+def rebuild_all(route_list, routes, built):
+    """What generate_route_options used to do: destroy every card and build one per route"""
+    for card in built:
+        route_list.canvas.delete(card.window)
+        card.container.destroy()
+    built.clear()
+    for index, route in enumerate(routes):
+        card = RouteCard(route_list)
+        card.show(index, route)
+        built.append(card)
+
+
+def time_call(root, call, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        call()
+        root.update_idletasks()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    root = tk.Tk()
+    root.geometry("1000x500")
+
+    naive_frame = tk.Frame(root)
+    naive_frame.pack(side='left', fill='both', expand=True)
+    naive = RouteList(naive_frame, tk.StringVar(), lambda index: None)
+    virtual_frame = tk.Frame(root)
+    virtual_frame.pack(side='left', fill='both', expand=True)
+    virtual = RouteList(virtual_frame, tk.StringVar(), lambda index: None)
+    root.update()
+
+    built = []
+    print(f"{'results':>8} {'rebuild ms':>11} {'virtual ms':>11}")
+    for count in RESULT_COUNTS:
+        routes = make_routes(count)
+        rebuild_ms = time_call(root, lambda: rebuild_all(naive, routes, built), repeats)
+        # New list objects each time, as every query returns fresh results
+        virtual_ms = time_call(root, lambda: virtual.set_routes(list(routes)), repeats)
+        print(f"{count:>8} {rebuild_ms:>11.1f} {virtual_ms:>11.1f}")
+
+    root.destroy()
+
+
+if __name__ == '__main__':
+    main()
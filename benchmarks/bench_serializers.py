@@ -0,0 +1,73 @@
+"""Time encoding and decoding a profile with each serializer against indented JSON
+
+Usage: python benchmarks/bench_serializers.py [profiles]
+
+Encodes and decodes random profiles (as ProfileStore keeps them) with
+json.dump(indent=2) / json.load, the way user_data.json used to be
+written on every action, and with each serializer in SERIALIZERS, and
+prints the time per profile and the encoded size.
+"""
+import io
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serializers import SERIALIZERS
+from profile_schema import SCHEMA_VERSION
+
+
+def random_profile():
+    return {
+        'total_co2_saved': round(random.uniform(0, 200), 3),
+        'total_calories': round(random.uniform(0, 5000), 1),
+        'game_challenges': random.randint(0, 20),
+        'inventory': {'potions': random.randint(0, 9), 'iron_sword': random.randint(0, 3),
+                      'iron_armor': random.randint(0, 3)},
+        'eco_routes_taken': random.randint(0, 500),
+        'schema_version': SCHEMA_VERSION,
+        'player': {'level': random.randint(1, 30), 'exp': random.randint(0, 99),
+                   'attack': random.randint(20, 90), 'defense': random.randint(10, 60),
+                   'max_hp': random.randint(100, 500)}
+    }
+
+
+def indented_dump(data):
+    f = io.StringIO()
+    json.dump(data, f, ensure_ascii=False, indent=2)
+    return f.getvalue().encode('utf-8')
+
+
+def indented_load(raw):
+    return json.load(io.StringIO(raw.decode('utf-8')))
+
+
+def timed(call, items):
+    """Mean time per item (µs) and the results"""
+    start = time.perf_counter()
+    results = [call(item) for item in items]
+    return (time.perf_counter() - start) / len(items) * 1e6, results
+
+
+def main():
+    profile_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    random.seed(1)
+    profiles = [random_profile() for _ in range(profile_count)]
+
+    codecs = [('json.dump indent=2', indented_dump, indented_load)]
+    codecs += [(name, serializer.dumps, serializer.loads) for name, serializer in SERIALIZERS.items()]
+
+    print(f"{'format':<20} {'encode µs':>10} {'decode µs':>10} {'bytes':>7}")
+    for name, dumps, loads in codecs:
+        encode_us, encoded = timed(dumps, profiles)
+        decode_us, decoded = timed(loads, encoded)
+        assert decoded == profiles
+        size = sum(len(raw) for raw in encoded) / profile_count
+        print(f"{name:<20} {encode_us:>10.2f} {decode_us:>10.2f} {size:>7.0f}")
+
+
+if __name__ == '__main__':
+    main()
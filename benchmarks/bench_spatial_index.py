@@ -0,0 +1,71 @@
+"""Time bulk loading and queries of the grid index against a linear scan
+
+Usage: python benchmarks/bench_spatial_index.py [points] [queries]
+
+Points are scattered at random over a 45 x 45 km city, like the stops of a
+large GTFS feed.
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spatial_index import GridIndex, distance_km
+
+CENTER = (-33.87, 151.2)
+SPREAD = 0.2    # degrees either side of the center
+RADII_KM = (0.5, 1.0, 2.0)
+NEAREST_K = (1, 8)
+
+
+def linear_within(lat, lon, points, radius_km):
+    """What TransitFeed.stops_near used to do: measure every point"""
+    nearby = []
+    for i, (point_lat, point_lon) in enumerate(points):
+        d = distance_km(lat, lon, point_lat, point_lon)
+        if d <= radius_km:
+            nearby.append((i, d))
+    return nearby
+
+
+def time_queries(queries, call):
+    timings = []
+    for lat, lon in queries:
+        start = time.perf_counter()
+        call(lat, lon)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(timings)
+
+
+def main():
+    point_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    query_count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    random.seed(1)
+    lat = [CENTER[0] + random.uniform(-SPREAD, SPREAD) for _ in range(point_count)]
+    lon = [CENTER[1] + random.uniform(-SPREAD, SPREAD) for _ in range(point_count)]
+    queries = [(CENTER[0] + random.uniform(-SPREAD, SPREAD), CENTER[1] + random.uniform(-SPREAD, SPREAD))
+               for _ in range(query_count)]
+
+    start = time.perf_counter()
+    grid = GridIndex(lat, lon)
+    print(f"Bulk loaded {point_count} points into {len(grid.cells)} cells in "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+    points = list(zip(lat, lon))
+    print(f"{'query':>14} {'grid us':>9} {'linear us':>10}")
+    for radius in RADII_KM:
+        grid_us = time_queries(queries, lambda la, lo: grid.within(la, lo, radius))
+        # The linear scan is slow, a few queries are enough
+        linear_us = time_queries(queries[:20], lambda la, lo: linear_within(la, lo, points, radius))
+        print(f"{f'within {radius} km':>14} {grid_us:>9.0f} {linear_us:>10.0f}")
+    for k in NEAREST_K:
+        grid_us = time_queries(queries, lambda la, lo: grid.nearest(la, lo, k))
+        print(f"{f'nearest {k}':>14} {grid_us:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
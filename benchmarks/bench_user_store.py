@@ -0,0 +1,120 @@
+"""Compare profile writes per second: whole-file JSON rewrites vs the SQLite store
+
+Usage: python benchmarks/bench_user_store.py [writes] [profile_json]
+
+Every write changes one inventory count, as using a potion does. The
+baseline is what save_user_data used to do: rewrite user_data.json with
+indent=2. Files are written to a temporary directory.
+
+A simulated minute of play then counts the disk writes left when saves
+go through SaveScheduler.
+"""
+import heapq
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from user_store import UserStore, SaveScheduler, SAVE_DELAY_MS
+
+SAMPLE_PROFILE = {
+    'total_co2_saved': 6.49,
+    'total_calories': 90.0,
+    'game_challenges': 1,
+    'inventory': {'potions': 1, 'iron_sword': 0, 'iron_armor': 0},
+    'eco_routes_taken': 22,
+    'player': {'level': 1, 'exp': 0, 'attack': 15, 'defense': 10, 'max_hp': 115,
+               'inventory': {'potions': 2, 'iron_sword': 0, 'iron_armor': 0}}
+}
+
+
+def json_rewrite(path, data, writes):
+    for i in range(writes):
+        data['inventory']['potions'] = i
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def store_save(store, data, writes):
+    for i in range(writes):
+        data['inventory']['potions'] = i
+        store.save(data)
+
+
+class VirtualRoot:
+    """Tk after()/after_cancel() on a simulated clock (ms)"""
+
+    def __init__(self):
+        self.now = 0
+        self.jobs = []
+        self.cancelled = set()
+        self.next_id = 0
+
+    def after(self, ms, callback):
+        self.next_id += 1
+        heapq.heappush(self.jobs, (self.now + ms, self.next_id, callback))
+        return self.next_id
+
+    def after_cancel(self, job):
+        self.cancelled.add(job)
+
+    def run_until(self, ms):
+        while self.jobs and self.jobs[0][0] <= ms:
+            self.now, job, callback = heapq.heappop(self.jobs)
+            if job not in self.cancelled:
+                callback()
+        self.now = ms
+
+
+def play_minute(delay_ms, seed=1):
+    """Disk writes in a minute of saves: battles with bursts of potion/attack clicks"""
+    random.seed(seed)
+    root = VirtualRoot()
+    scheduler = SaveScheduler(root, lambda: None, delay_ms)
+    clock = 0
+    while clock < 60000:
+        # 3-8 saves about 200 ms apart (start battle, potions, victory), then a pause
+        for _ in range(random.randint(3, 8)):
+            clock += random.randint(100, 300)
+            root.run_until(clock)
+            scheduler.request()
+        clock += random.randint(2000, 6000)
+    root.run_until(clock + delay_ms)
+    return scheduler.requests, scheduler.writes
+
+
+def writes_per_second(call, writes):
+    start = time.perf_counter()
+    call()
+    return writes / (time.perf_counter() - start)
+
+
+def main():
+    writes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], 'r', encoding='utf-8') as f:
+            profile = json.load(f)
+    else:
+        profile = SAMPLE_PROFILE
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, 'user_data.json')
+        rate = writes_per_second(lambda: json_rewrite(json_path, json.loads(json.dumps(profile)), writes), writes)
+        print(f"{'json rewrite (indent=2)':>24}: {rate:>9.0f} writes/s")
+
+        store = UserStore(os.path.join(directory, 'user_data.db'))
+        store.save(profile)
+        rate = writes_per_second(lambda: store_save(store, json.loads(json.dumps(profile)), writes), writes)
+        print(f"{'sqlite wal, changed rows':>24}: {rate:>9.0f} writes/s")
+        store.close()
+
+    requests, writes = play_minute(SAVE_DELAY_MS)
+    print(f"minute of play: {requests} saves requested, {writes} disk writes with a {SAVE_DELAY_MS} ms window")
+
+
+if __name__ == '__main__':
+    main()
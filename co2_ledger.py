@@ -0,0 +1,216 @@
+import json
+import sqlite3
+import sys
+import time
+
+from user_store import USER_DB_FILE
+
+# CO₂ saved that buys one dragon challenge (grams)
+CHALLENGE_GRAMS = 10000
+
+# A snapshot of the totals is stored every this many events of a user
+SNAPSHOT_EVERY = 1000
+
+# Events older than this are folded into a snapshot by compact (days)
+KEEP_DAYS = 365
+
+# Event kinds: legacy balance carried over, eco trip, item reward, CO₂ exchanged for challenges
+EVENT_KINDS = ('opening', 'trip', 'reward', 'exchange')
+
+
+def empty_totals():
+    return {'balance_g': 0, 'saved_g': 0, 'exchanged_g': 0, 'trips': 0, 'challenges': 0, 'rewards': {}}
+
+
+def apply_event(totals, kind, grams, item, count):
+    """Add one event to running totals (the only place totals are computed)"""
+    totals['balance_g'] += grams
+    if kind == 'exchange':
+        totals['exchanged_g'] -= grams
+        totals['challenges'] += count
+    else:
+        totals['saved_g'] += grams
+    if kind == 'trip':
+        totals['trips'] += 1
+    elif kind == 'reward':
+        totals['rewards'][item] = totals['rewards'].get(item, 0) + count
+
+
+def create_tables(connection):
+    with connection:
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS ledger_events ('
+            ' user_id TEXT NOT NULL, seq INTEGER NOT NULL, time INTEGER NOT NULL, kind TEXT NOT NULL,'
+            ' grams INTEGER NOT NULL, item TEXT, count INTEGER NOT NULL,'
+            ' PRIMARY KEY (user_id, seq)) WITHOUT ROWID'
+        )
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS ledger_snapshots ('
+            ' user_id TEXT NOT NULL, seq INTEGER NOT NULL, totals TEXT NOT NULL,'
+            ' PRIMARY KEY (user_id, seq)) WITHOUT ROWID'
+        )
+
+
+class CO2Ledger:
+    """Append-only ledger of one user's CO₂ savings, rewards and exchanges
+
+    Amounts are whole grams, so totals never drift the way a running float
+    does. Events are numbered per user and never changed; the totals are
+    kept up to date as events are appended, and every SNAPSHOT_EVERY events
+    they are stored as a snapshot, so opening a ledger reads the latest
+    snapshot and replays fewer than SNAPSHOT_EVERY events after it.
+    compact() folds old events into a snapshot to bound the history kept.
+
+    stage() adds events to the totals at once and keeps them in memory;
+    write_pending() stores them inside the caller's transaction, so the app
+    writes them together with the profile instead of syncing every event.
+    events(), replay() and compact() only see events that were written.
+    """
+
+    def __init__(self, connection, user):
+        self.connection = connection
+        self.user = user
+        snapshot = connection.execute(
+            'SELECT seq, totals FROM ledger_snapshots WHERE user_id = ? ORDER BY seq DESC LIMIT 1',
+            (user,)).fetchone()
+        if snapshot is None:
+            self.seq, self.totals = 0, empty_totals()
+        else:
+            self.seq, self.totals = snapshot[0], json.loads(snapshot[1])
+        for seq, kind, grams, item, count in self.events(self.seq, sys.maxsize):
+            apply_event(self.totals, kind, grams, item, count)
+            self.seq = seq
+        self.pending = []             # staged event rows, not written yet
+        self.pending_snapshots = []
+
+    def __len__(self):
+        """Events recorded so far (including compacted ones)"""
+        return self.seq
+
+    def events(self, after=0, through=None):
+        """(seq, kind, grams, item, count) of the events after seq (up to through), oldest first"""
+        return self.connection.execute(
+            'SELECT seq, kind, grams, item, count FROM ledger_events'
+            ' WHERE user_id = ? AND seq > ? AND seq <= ? ORDER BY seq',
+            (self.user, after, self.seq if through is None else through)).fetchall()
+
+    def balance_kg(self):
+        return self.totals['balance_g'] / 1000
+
+    def record(self, kind, grams=0, item=None, count=0):
+        """Append one event (grams is negative for an exchange)"""
+        self.record_many([(kind, grams, item, count)])
+
+    def record_many(self, events, timestamp=None):
+        """Append (kind, grams, item, count) events and write them at once, in one transaction"""
+        self.stage(events, timestamp)
+        with self.connection:
+            self.write_pending()
+        self.clear_pending()
+
+    def stage(self, events, timestamp=None):
+        """Add (kind, grams, item, count) events to the totals; write_pending() stores them"""
+        timestamp = int(time.time()) if timestamp is None else timestamp
+        rows = []
+        snapshots = []
+        totals = dict(self.totals, rewards=dict(self.totals['rewards']))
+        seq = self.seq
+        for kind, grams, item, count in events:
+            if kind not in EVENT_KINDS:
+                raise ValueError(f"Unknown ledger event: {kind}")
+            seq += 1
+            rows.append((self.user, seq, timestamp, kind, int(grams), item, int(count)))
+            apply_event(totals, kind, int(grams), item, int(count))
+            if seq % SNAPSHOT_EVERY == 0:
+                snapshots.append((self.user, seq, json.dumps(totals)))
+        self.pending.extend(rows)
+        self.pending_snapshots.extend(snapshots)
+        self.seq, self.totals = seq, totals
+
+    def write_pending(self):
+        """Insert the staged events (inside the caller's transaction)"""
+        self.connection.executemany(
+            'INSERT INTO ledger_events (user_id, seq, time, kind, grams, item, count)'
+            ' VALUES (?, ?, ?, ?, ?, ?, ?)', self.pending)
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO ledger_snapshots (user_id, seq, totals) VALUES (?, ?, ?)', self.pending_snapshots)
+
+    def clear_pending(self):
+        """Forget the staged events once the transaction that wrote them has committed"""
+        self.pending = []
+        self.pending_snapshots = []
+
+    def replay(self):
+        """Totals recomputed from the oldest snapshot and every event after it"""
+        snapshot = self.connection.execute(
+            'SELECT seq, totals FROM ledger_snapshots WHERE user_id = ? ORDER BY seq LIMIT 1',
+            (self.user,)).fetchone()
+        base = 0
+        totals = empty_totals()
+        if snapshot is not None and not self.connection.execute(
+                'SELECT 1 FROM ledger_events WHERE user_id = ? AND seq <= ? LIMIT 1',
+                (self.user, snapshot[0])).fetchone():
+            # Events up to the oldest snapshot were compacted away
+            base, totals = snapshot[0], json.loads(snapshot[1])
+        for _, kind, grams, item, count in self.events(base):
+            apply_event(totals, kind, grams, item, count)
+        return totals
+
+    def compact(self, before):
+        """Fold the events older than before (Unix time) into a snapshot; returns how many"""
+        last = self.connection.execute(
+            'SELECT MAX(seq) FROM ledger_events WHERE user_id = ? AND time < ?',
+            (self.user, before)).fetchone()[0]
+        if last is None:
+            return 0
+
+        # Totals as of the last folded event: the newest snapshot before it plus the events between
+        snapshot = self.connection.execute(
+            'SELECT seq, totals FROM ledger_snapshots WHERE user_id = ? AND seq <= ? ORDER BY seq DESC LIMIT 1',
+            (self.user, last)).fetchone()
+        base, totals = (snapshot[0], json.loads(snapshot[1])) if snapshot else (0, empty_totals())
+        for _, kind, grams, item, count in self.events(base, last):
+            apply_event(totals, kind, grams, item, count)
+
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO ledger_snapshots (user_id, seq, totals) VALUES (?, ?, ?)',
+                (self.user, last, json.dumps(totals)))
+            folded = self.connection.execute(
+                'DELETE FROM ledger_events WHERE user_id = ? AND seq <= ?', (self.user, last)).rowcount
+            self.connection.execute(
+                'DELETE FROM ledger_snapshots WHERE user_id = ? AND seq < ?', (self.user, last))
+        return folded
+
+
+def saved_totals(connection):
+    """{user: grams saved over all time} of every ledger, from its latest snapshot and the events after it"""
+    saved = {}
+    # SQLite takes the other columns of a MAX() aggregate from the row holding the maximum
+    for user, _, totals in connection.execute(
+            'SELECT user_id, MAX(seq), totals FROM ledger_snapshots GROUP BY user_id'):
+        saved[user] = json.loads(totals)['saved_g']
+    rows = connection.execute(
+        'SELECT e.user_id, SUM(e.grams) FROM ledger_events e'
+        ' LEFT JOIN (SELECT user_id, MAX(seq) AS seq FROM ledger_snapshots GROUP BY user_id) s'
+        ' ON s.user_id = e.user_id'
+        " WHERE e.seq > COALESCE(s.seq, 0) AND e.kind != 'exchange' GROUP BY e.user_id")
+    for user, grams in rows:
+        saved[user] = saved.get(user, 0) + grams
+    return saved
+
+
+def compact_all(connection, days=KEEP_DAYS):
+    """Compact the ledgers of every user; returns how many events were folded"""
+    before = int(time.time()) - days * 86400
+    users = [row[0] for row in connection.execute('SELECT DISTINCT user_id FROM ledger_events')]
+    return sum(CO2Ledger(connection, user).compact(before) for user in users)
+
+
+if __name__ == '__main__':
+    # python co2_ledger.py [days] [database]: fold events older than days into snapshots
+    keep_days = int(sys.argv[1]) if len(sys.argv) > 1 else KEEP_DAYS
+    connection = sqlite3.connect(sys.argv[2] if len(sys.argv) > 2 else USER_DB_FILE)
+    create_tables(connection)
+    print(f"Folded {compact_all(connection, keep_days)} ledger events older than {keep_days} days")
+    connection.close()
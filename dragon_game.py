@@ -1,35 +1,22 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import random
-import json
-import os
+from profile_store import ProfileStore, PROFILE_FIELDS
 
 class DragonGameInterface:
-    def __init__(self, root):
+    def __init__(self, root, profile=None):
         self.root = root
         self.root.title("🐉 Dragon Battle Game")
         self.root.geometry("1000x800")
         self.root.configure(bg='#1a1a2e')
         
-        # Load user data
-        self.user_data = self.load_user_data()
+        # User data, shared with the other windows through the main window's profile
+        self.profile = profile or ProfileStore.open(self.root)
+        self.user_data = self.profile.data
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Game state
-        player_data = self.user_data.get('player', {})
-        self.player = {
-            'name': 'Hero',
-            'hp': player_data.get('max_hp', 100),
-            'max_hp': player_data.get('max_hp', 100),
-            'attack': player_data.get('attack', 20),
-            'defense': player_data.get('defense', 10),
-            'level': player_data.get('level', 1),
-            'exp': player_data.get('exp', 0),
-            'inventory': player_data.get('inventory', {
-                'potions': 0,
-                'iron_sword': 0,
-                'iron_armor': 0
-            })
-        }
+        self.player = self.load_player()
 
         # Dragon theme configurations
         self.dragon_themes = {
@@ -81,44 +68,38 @@ class DragonGameInterface:
         # Create interface
         self.create_widgets()
         self.update_display()
+        self.profile.subscribe(self.on_profile_change)
         
-    def load_user_data(self):
-        """Load user data"""
-        try:
-            if os.path.exists('user_data.json'):
-                with open('user_data.json', 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except:
-            pass
-        
-        # Default user data
+    def load_player(self):
+        """The hero as saved in the user data (at full HP)"""
+        player_data = self.user_data.get('player', {})
         return {
-            'total_co2_saved': 0.0,
-            'total_calories': 0.0,
-            'game_challenges': 0,
-            'inventory': {
-                'potions': 0,
-                'iron_sword': 0,
-                'iron_armor': 0
-            },
-            'eco_routes_taken': 0
+            'name': 'Hero',
+            'hp': player_data.get('max_hp', 100),
+            'max_hp': player_data.get('max_hp', 100),
+            'attack': player_data.get('attack', 20),
+            'defense': player_data.get('defense', 10),
+            'level': player_data.get('level', 1),
+            'exp': player_data.get('exp', 0),
+            'inventory': self.user_data['inventory']
         }
     
-    def save_user_data(self):
-        """Save user data (including character status)"""
-        try:
-            self.user_data['player'] = {
-                'level': self.player['level'],
-                'exp': self.player['exp'],
-                'attack': self.player['attack'],
-                'defense': self.player['defense'],
-                'max_hp': self.player['max_hp'],
-                'inventory': self.player['inventory']
-            }
-            with open('user_data.json', 'w', encoding='utf-8') as f:
-                json.dump(self.user_data, f, ensure_ascii=False, indent=2)
-        except:
-            pass
+    def on_close(self):
+        """Write pending progress and close the window"""
+        self.profile.unsubscribe(self.on_profile_change)
+        self.profile.flush()
+        self.root.destroy()
+    
+    def save_user_data(self, *fields):
+        """Save user data (including character status) shortly and show it in every window"""
+        self.user_data['player'] = {
+            'level': self.player['level'],
+            'exp': self.player['exp'],
+            'attack': self.player['attack'],
+            'defense': self.player['defense'],
+            'max_hp': self.player['max_hp']
+        }
+        self.profile.changed('player', *fields)
 
         
     def create_widgets(self):
@@ -547,12 +528,27 @@ class DragonGameInterface:
         self.dragon_info.config(text=dragon_text)
         
         # Update right side info
-        self.challenge_label.config(text=f"Remaining Challenges: {self.user_data.get('game_challenges', 0)} times")
+        self.on_profile_change(PROFILE_FIELDS)
+    
+    def on_profile_change(self, fields):
+        """Update the side labels of fields changed in this or another window"""
+        if 'user' in fields:
+            # Another user logged in on the kiosk: bring in their hero, drop any battle
+            self.user_data = self.profile.data
+            self.player = self.load_player()
+            self.reset_battle()
+            return
+        if 'game_challenges' in fields:
+            self.challenge_label.config(text=f"Remaining Challenges: {self.user_data.get('game_challenges', 0)} times")
+        if 'eco_routes_taken' in fields:
+            self.eco_routes_label.config(text=f"🌍 Eco Routes: {self.user_data.get('eco_routes_taken', 0)} times")
+        if 'total_co2_saved' in fields:
+            self.co2_saved_label.config(text=f"🌱 CO₂ Reduced: {self.user_data.get('total_co2_saved', 0):.1f} kg")
+        if 'inventory' not in fields:
+            return
         self.potion_count_label.config(text=f"💊 HP Potions: {self.player['inventory']['potions']}")
         self.sword_count_label.config(text=f"⚔️ Iron Sword: {self.player['inventory']['iron_sword']}")
         self.armor_count_label.config(text=f"🛡️ Iron Armor: {self.player['inventory']['iron_armor']}")
-        self.eco_routes_label.config(text=f"🌍 Eco Routes: {self.user_data.get('eco_routes_taken', 0)} times")
-        self.co2_saved_label.config(text=f"🌱 CO₂ Reduced: {self.user_data.get('total_co2_saved', 0):.1f} kg")
         
         # Update equipment button states
         if self.player['inventory']['iron_sword'] > 0:
@@ -578,7 +574,7 @@ class DragonGameInterface:
         # Consume challenge count
         self.user_data['game_challenges'] -= 1
         self.challenges_used += 1
-        self.save_user_data()
+        self.save_user_data('game_challenges')
         
         self.game_state = 'battle'
         self.battle_log = []
@@ -691,6 +687,8 @@ class DragonGameInterface:
         self.use_potion_button.config(state='disabled')
         self.start_button.config(state='normal')
         
+        # Save the experience and level (this moves the hero on the leaderboard)
+        self.save_user_data()
         self.update_display()
     
     def show_eco_action_popup(self):
@@ -871,13 +869,14 @@ class DragonGameInterface:
             'defense': 10,
             'level': 1,
             'exp': 0,
-            'inventory': {
-                'potions': self.user_data.get('inventory', {}).get('potions', 0),
-                'iron_sword': self.user_data.get('inventory', {}).get('iron_sword', 0),
-                'iron_armor': self.user_data.get('inventory', {}).get('iron_armor', 0)
-            }
+            'inventory': self.user_data['inventory']
         }
-        
+        self.reset_battle()
+        self.add_log("🎮 Game restarted!")
+        self.add_log(f"{self.dragon['emoji']} Ready to face {self.dragon['name']}?")
+    
+    def reset_battle(self):
+        """Fresh dragon and an idle battle area"""
         self.dragon = self.dragon_themes[self.current_theme].copy()
         
         self.game_state = 'menu'
@@ -895,8 +894,6 @@ class DragonGameInterface:
         self.restart_button.config(state='disabled')
         
         self.update_display()
-        self.add_log("🎮 Game restarted!")
-        self.add_log(f"{self.dragon['emoji']} Ready to face {self.dragon['name']}?")
     
     def use_potion(self):
         """Use HP potion"""
@@ -915,7 +912,7 @@ class DragonGameInterface:
         self.add_log(f"🧪 Used HP potion, restored {heal_amount} HP!")
         self.add_log(f"Remaining potions: {self.player['inventory']['potions']}")
         
-        self.save_user_data()
+        self.save_user_data('inventory')
         self.update_display()
         self.dragon_attack()
     
@@ -931,7 +928,7 @@ class DragonGameInterface:
         
         self.add_log("⚔️ Equipped iron sword! Attack +10")
         self.update_display()
-        self.save_user_data()
+        self.save_user_data('inventory')
         
         messagebox.showinfo("Equipment Success", "Successfully equipped iron sword!\nAttack +10")
     
@@ -947,6 +944,6 @@ class DragonGameInterface:
         
         self.add_log("🛡️ Equipped iron armor! Defense +8")
         self.update_display()
-        self.save_user_data()
+        self.save_user_data('inventory')
         
         messagebox.showinfo("Equipment Success", "Successfully equipped iron armor!\nDefense +8")
\ No newline at end of file
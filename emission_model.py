@@ -0,0 +1,86 @@
+import numpy as np
+
+from road_network import DEFAULT_SPEEDS
+
+# kg CO₂ emitted per km by each mode
+CO2_PER_MODE = {
+    'driving': 0.2,
+    'bus': 0.05,
+    'walking': 0.0,
+    'cycling': 0.0
+}
+
+# Per-mode factors: kg CO₂ per km and average speed (km/h); the speeds are the road
+# network's defaults, so estimated routes and routes on the network agree
+MODE_FACTORS = {mode: {'co2_per_km': co2, 'speed_kmh': DEFAULT_SPEEDS[mode]} for mode, co2 in CO2_PER_MODE.items()}
+
+# Integer codes so segment modes can live in a NumPy array
+MODES = tuple(MODE_FACTORS)
+MODE_CODES = {mode: code for code, mode in enumerate(MODES)}
+CO2_PER_KM = np.array([MODE_FACTORS[mode]['co2_per_km'] for mode in MODES])
+SPEED_KMH = np.array([MODE_FACTORS[mode]['speed_kmh'] for mode in MODES])
+DRIVING_CO2_PER_KM = MODE_FACTORS['driving']['co2_per_km']
+
+
+def co2_emitted(mode, distance):
+    """kg CO₂ emitted travelling distance km with one mode"""
+    return distance * MODE_FACTORS[mode]['co2_per_km']
+
+
+def co2_saved(distance, co2):
+    """kg CO₂ saved by a route of distance km emitting co2 kg, compared with driving it"""
+    return distance * DRIVING_CO2_PER_KM - co2
+
+
+def travel_time(mode, distance):
+    """Minutes needed for distance km at the mode's average speed"""
+    return distance / MODE_FACTORS[mode]['speed_kmh'] * 60
+
+
+def encode_modes(modes):
+    """Mode names to an array of mode codes"""
+    return np.fromiter((MODE_CODES[mode] for mode in modes), dtype=np.int8, count=len(modes))
+
+
+def score_segments(modes, distances, durations=None, trip_ids=None, trip_count=None):
+    """Distance, time, CO₂ and CO₂ saved for many segments in one call
+
+    modes holds mode codes (see encode_modes) and distances km per segment.
+    durations (minutes) may be given where they are known, NaN entries
+    fall back to the mode's average speed. With trip_ids, segments are
+    summed per trip (ids 0..trip_count-1) and one row per trip is returned;
+    CO₂ saved is always measured against driving the same distance.
+    """
+    modes = np.asarray(modes, dtype=np.intp)
+    distances = np.asarray(distances, dtype=np.float64)
+
+    times = distances / SPEED_KMH[modes] * 60
+    if durations is not None:
+        durations = np.asarray(durations, dtype=np.float64)
+        times = np.where(np.isnan(durations), times, durations)
+    co2 = distances * CO2_PER_KM[modes]
+
+    if trip_ids is not None:
+        trip_ids = np.asarray(trip_ids, dtype=np.intp)
+        size = trip_count if trip_count is not None else int(trip_ids.max()) + 1
+        distances = np.bincount(trip_ids, weights=distances, minlength=size)
+        times = np.bincount(trip_ids, weights=times, minlength=size)
+        co2 = np.bincount(trip_ids, weights=co2, minlength=size)
+
+    return {
+        'distance': distances,
+        'time': times,
+        'co2': co2,
+        'co2_saved': distances * DRIVING_CO2_PER_KM - co2
+    }
+
+
+def score_trips(trips):
+    """Score a list of trips, each a list of (mode, distance km) segments"""
+    modes, distances, trip_ids = [], [], []
+    for trip_id, segments in enumerate(trips):
+        for mode, distance in segments:
+            modes.append(MODE_CODES[mode])
+            distances.append(distance)
+            trip_ids.append(trip_id)
+    return score_segments(modes, distances, trip_ids=trip_ids, trip_count=len(trips))
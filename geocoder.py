@@ -0,0 +1,222 @@
+import bisect
+import csv
+import itertools
+import os
+import pickle
+from array import array
+from collections import Counter
+
+# Address / POI list: name, lat, lon
+DEFAULT_ADDRESS_FILE = os.path.join('network', 'addresses.csv')
+CACHE_VERSION = 1
+
+# Typo correction: vocabulary words checked per query word, spellings kept per word
+FUZZY_CANDIDATES = 40
+FUZZY_SPELLINGS = 3
+
+
+def normalize_query(text):
+    """Lower-case, drop punctuation and collapse whitespace"""
+    cleaned = ''.join(ch if ch.isalnum() else ' ' for ch in text.casefold())
+    return ' '.join(cleaned.split())
+
+
+def trigrams(key):
+    """Character trigrams of a normalized key, padded at the start"""
+    padded = f"  {key}"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Edit distance counting swapped neighbours as one edit
+
+    Gives up (returns limit + 1) as soon as the distance exceeds limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before = None
+    previous = list(range(len(b) + 1))
+    for i, ch in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ch != other))
+            if before is not None and j > 1 and ch == b[j - 2] and a[i - 2] == other:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+class Geocoder:
+    """Offline address lookup and as-you-type completion
+
+    Entries are kept in a sorted array of normalized names, so a prefix
+    query is one binary search plus a short scan. Typos are handled per
+    word: a trigram index over the (much smaller) vocabulary of words
+    suggests close spellings, which are then prefix-searched like any
+    other query.
+    """
+
+    def __init__(self, keys, names, lat, lon, words, postings):
+        self.keys = keys            # sorted normalized names
+        self.names = names          # display names in the same order
+        self.lat = lat              # degrees
+        self.lon = lon
+        self.words = words          # sorted vocabulary of words used in keys
+        self.postings = postings    # trigram -> array('i') of word positions
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def build(cls, rows):
+        """Build the index from (name, lat, lon) rows"""
+        entries = sorted(
+            (normalize_query(name), name, float(lat), float(lon))
+            for name, lat, lon in rows
+            if normalize_query(name)
+        )
+        keys = [entry[0] for entry in entries]
+        names = [entry[1] for entry in entries]
+        lat = array('d', (entry[2] for entry in entries))
+        lon = array('d', (entry[3] for entry in entries))
+
+        words = sorted({word for key in keys for word in key.split()})
+        postings = {}
+        for position, word in enumerate(words):
+            for gram in trigrams(word):
+                positions = postings.get(gram)
+                if positions is None:
+                    positions = postings[gram] = array('i')
+                positions.append(position)
+        return cls(keys, names, lat, lon, words, postings)
+
+    @classmethod
+    def load(cls, path=DEFAULT_ADDRESS_FILE):
+        """Load an address CSV (name, lat, lon), using a pickled index when current"""
+        cache_path = path + '.cache'
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        try:
+            with open(cache_path, 'rb') as f:
+                version, cached_signature, tables = pickle.load(f)
+            if version == CACHE_VERSION and cached_signature == signature:
+                return cls(*tables)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+            pass
+
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            col = {name: i for i, name in enumerate(next(reader))}
+            name_col, lat_col, lon_col = col['name'], col['lat'], col['lon']
+            geocoder = cls.build((row[name_col], row[lat_col], row[lon_col]) for row in reader)
+
+        try:
+            with open(cache_path, 'wb') as f:
+                tables = (geocoder.keys, geocoder.names, geocoder.lat, geocoder.lon,
+                          geocoder.words, geocoder.postings)
+                pickle.dump((CACHE_VERSION, signature, tables), f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            pass
+        return geocoder
+
+    def prefix_matches(self, prefix, limit):
+        """Positions of entries whose normalized name starts with prefix"""
+        start = bisect.bisect_left(self.keys, prefix)
+        matches = []
+        for position in range(start, min(start + limit, len(self.keys))):
+            if not self.keys[position].startswith(prefix):
+                break
+            matches.append(position)
+        return matches
+
+    def is_word(self, word, as_prefix):
+        """Whether word (or, as_prefix, some word starting with it) is in the vocabulary"""
+        position = bisect.bisect_left(self.words, word)
+        if position == len(self.words):
+            return False
+        candidate = self.words[position]
+        return candidate.startswith(word) if as_prefix else candidate == word
+
+    def spellings(self, word, as_prefix, max_edits):
+        """Vocabulary words within max_edits of word (of their start, as_prefix)"""
+        counts = Counter()
+        for gram in trigrams(word):
+            if gram in self.postings:
+                counts.update(self.postings[gram])
+
+        scored = []
+        for position, _ in counts.most_common(FUZZY_CANDIDATES):
+            candidate = self.words[position]
+            compared = candidate[:len(word)] if as_prefix else candidate
+            edits = edit_distance(word, compared, max_edits)
+            if edits <= max_edits:
+                scored.append((edits, candidate))
+        scored.sort()
+        return [candidate for _, candidate in scored[:FUZZY_SPELLINGS]]
+
+    def fuzzy_matches(self, query, limit):
+        """Positions of entries matching query after correcting misspelled words"""
+        words = query.split()
+        options = []
+        for i, word in enumerate(words):
+            # The last word may still be half typed, so treat it as a prefix
+            as_prefix = i == len(words) - 1
+            if word.isdigit() or self.is_word(word, as_prefix):
+                options.append([word])
+                continue
+            corrected = self.spellings(word, as_prefix, 1 if len(word) < 6 else 2)
+            if not corrected:
+                return []
+            options.append(corrected)
+
+        matches = []
+        for combination in itertools.islice(itertools.product(*options), FUZZY_SPELLINGS ** 2):
+            matches.extend(self.prefix_matches(' '.join(combination), limit))
+            if len(matches) >= limit:
+                break
+        return matches[:limit]
+
+    def complete(self, text, limit=8):
+        """Display names for an as-you-type query, prefix matches first"""
+        query = normalize_query(text)
+        if not query:
+            return []
+
+        positions = self.prefix_matches(query, limit * 4)
+        if len(positions) < limit and len(query) >= 3:
+            positions.extend(self.fuzzy_matches(query, limit * 4))
+
+        # The same address can be listed more than once (e.g. several entrances)
+        suggestions = []
+        for position in positions:
+            name = self.names[position]
+            if name not in suggestions:
+                suggestions.append(name)
+                if len(suggestions) == limit:
+                    break
+        return suggestions
+
+    def locate(self, text):
+        """(lat, lon) for an address, tolerating small typos (None if unknown)"""
+        query = normalize_query(text)
+        if not query:
+            return None
+
+        position = bisect.bisect_left(self.keys, query)
+        if position < len(self.keys) and self.keys[position] == query:
+            return self.lat[position], self.lon[position]
+
+        for position in self.fuzzy_matches(query, 1):
+            if edit_distance(query, self.keys[position], 2) <= 2:
+                return self.lat[position], self.lon[position]
+        return None
+
+
+def load_geocoder(path=DEFAULT_ADDRESS_FILE):
+    """Load the address index if the address file exists, otherwise return None"""
+    if not os.path.exists(path):
+        return None
+    return Geocoder.load(path)
@@ -0,0 +1,305 @@
+import csv
+import os
+import pickle
+from array import array
+
+from road_network import DEFAULT_SPEEDS
+from spatial_index import GridIndex, distance_km
+
+# Default GTFS location (stops.txt, routes.txt, trips.txt, stop_times.txt, ...)
+DEFAULT_FEED_DIR = 'gtfs'
+
+# Packed tables are cached here so later starts skip the CSV import
+CACHE_FILE = 'feed.cache'
+CACHE_VERSION = 2
+
+# Stops this close are linked by a walking transfer unless transfers.txt says otherwise (km)
+TRANSFER_WALK_KM = 0.4
+
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+ALL_DAYS = 0b1111111
+
+
+def parse_time(text):
+    """GTFS HH:MM:SS (hours may exceed 24) to seconds after midnight"""
+    text = text.strip()
+    return int(text[:-6]) * 3600 + int(text[-5:-3]) * 60 + int(text[-2:])
+
+
+def format_time(seconds):
+    """Seconds after midnight to HH:MM"""
+    minutes = int(seconds) // 60
+    return f"{minutes // 60 % 24:02d}:{minutes % 60:02d}"
+
+
+def read_rows(directory, name):
+    """Yield rows of a GTFS file as dicts (nothing if the file is missing)"""
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        return
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        yield from csv.DictReader(f)
+
+
+class TransitFeed:
+    """GTFS timetable packed into flat arrays for RAPTOR
+
+    Trips that serve the same stop sequence of a route are grouped into a
+    pattern. Each pattern owns a slice of pattern_stops and a block of
+    stop times laid out trip-major (trip * stop_count + position), with its
+    trips sorted by departure so the earliest catchable trip can be found
+    by binary search.
+    """
+
+    def __init__(self):
+        # Stops
+        self.stop_ids = []
+        self.stop_names = []
+        self.stop_lat = array('d')
+        self.stop_lon = array('d')
+
+        # Routes (display names)
+        self.route_names = []
+
+        # Patterns
+        self.pattern_route = array('i')
+        self.pattern_stop_offsets = array('i', [0])
+        self.pattern_stops = array('i')
+        self.pattern_trip_offsets = array('i', [0])   # trips of pattern p: offsets[p]..offsets[p+1]-1
+        self.pattern_time_offsets = array('i', [0])   # start of the pattern's stop-time block
+        self.arrivals = array('i')
+        self.departures = array('i')
+        self.trip_days = array('B')                   # weekday bitmask per packed trip
+
+        # Stop -> (pattern, position) lookup in CSR form
+        self.stop_pattern_offsets = array('i')
+        self.stop_patterns = array('i')
+        self.stop_positions = array('i')
+
+        # Footpaths between stops (CSR, seconds)
+        self.transfer_offsets = array('i')
+        self.transfer_targets = array('i')
+        self.transfer_times = array('i')
+
+        # Grid over the stop locations, built on first use (see spatial_index.py)
+        self.stop_grid = None
+
+    @property
+    def stop_count(self):
+        return len(self.stop_ids)
+
+    @property
+    def pattern_count(self):
+        return len(self.pattern_route)
+
+    @classmethod
+    def import_gtfs(cls, directory=DEFAULT_FEED_DIR):
+        """Read a GTFS folder and pack it"""
+        feed = cls()
+
+        stop_index = {}
+        for row in read_rows(directory, 'stops.txt'):
+            stop_index[row['stop_id']] = len(feed.stop_ids)
+            feed.stop_ids.append(row['stop_id'])
+            feed.stop_names.append(row.get('stop_name', '') or row['stop_id'])
+            feed.stop_lat.append(float(row['stop_lat']))
+            feed.stop_lon.append(float(row['stop_lon']))
+
+        route_index = {}
+        for row in read_rows(directory, 'routes.txt'):
+            route_index[row['route_id']] = len(feed.route_names)
+            feed.route_names.append(row.get('route_short_name') or row.get('route_long_name') or row['route_id'])
+
+        service_days = {}
+        for row in read_rows(directory, 'calendar.txt'):
+            mask = 0
+            for bit, day in enumerate(WEEKDAYS):
+                if row.get(day, '0').strip() == '1':
+                    mask |= 1 << bit
+            service_days[row['service_id']] = mask
+
+        trip_route = {}
+        trip_service = {}
+        for row in read_rows(directory, 'trips.txt'):
+            trip_route[row['trip_id']] = route_index[row['route_id']]
+            trip_service[row['trip_id']] = service_days.get(row.get('service_id'), ALL_DAYS)
+
+        # Group stop times per trip (plain csv.reader: this is by far the largest file)
+        trip_stop_times = {}
+        seconds = {}  # distinct HH:MM:SS strings are few, parse each once
+        with open(os.path.join(directory, 'stop_times.txt'), newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            col = {name: i for i, name in enumerate(next(reader))}
+            trip_col, stop_col, sequence_col = col['trip_id'], col['stop_id'], col['stop_sequence']
+            arrival_col, departure_col = col['arrival_time'], col['departure_time']
+            for row in reader:
+                arrival = row[arrival_col] or row[departure_col]
+                departure = row[departure_col] or row[arrival_col]
+                if not arrival:
+                    continue  # untimed stop
+                stop_times = trip_stop_times.get(row[trip_col])
+                if stop_times is None:
+                    stop_times = trip_stop_times[row[trip_col]] = []
+                if arrival not in seconds:
+                    seconds[arrival] = parse_time(arrival)
+                if departure not in seconds:
+                    seconds[departure] = parse_time(departure)
+                stop_times.append((
+                    int(row[sequence_col]),
+                    stop_index[row[stop_col]],
+                    seconds[arrival],
+                    seconds[departure]
+                ))
+
+        # Group trips into patterns (same route, same stop sequence)
+        patterns = {}
+        for trip_id, stop_times in trip_stop_times.items():
+            stop_times.sort()
+            stops = tuple(stop for _, stop, _, _ in stop_times)
+            if len(stops) < 2:
+                continue
+            key = (trip_route[trip_id], stops)
+            patterns.setdefault(key, []).append((
+                [arrival for _, _, arrival, _ in stop_times],
+                [departure for _, _, _, departure in stop_times],
+                trip_service[trip_id]
+            ))
+
+        for (route, stops), trips in patterns.items():
+            trips.sort(key=lambda trip: trip[1][0])
+            feed.pattern_route.append(route)
+            feed.pattern_stops.extend(stops)
+            feed.pattern_stop_offsets.append(len(feed.pattern_stops))
+            for arrivals, departures, days in trips:
+                feed.arrivals.extend(arrivals)
+                feed.departures.extend(departures)
+                feed.trip_days.append(days)
+            feed.pattern_trip_offsets.append(len(feed.trip_days))
+            feed.pattern_time_offsets.append(len(feed.arrivals))
+
+        feed.build_stop_patterns()
+        feed.build_transfers(read_rows(directory, 'transfers.txt'), stop_index)
+        return feed
+
+    def build_stop_patterns(self):
+        """Index which patterns serve each stop and at which position"""
+        served = [[] for _ in range(self.stop_count)]
+        for p in range(self.pattern_count):
+            start = self.pattern_stop_offsets[p]
+            for position in range(self.pattern_stop_offsets[p + 1] - start):
+                served[self.pattern_stops[start + position]].append((p, position))
+
+        self.stop_pattern_offsets = array('i', [0])
+        for entries in served:
+            for p, position in entries:
+                self.stop_patterns.append(p)
+                self.stop_positions.append(position)
+            self.stop_pattern_offsets.append(len(self.stop_patterns))
+
+    def build_transfers(self, rows, stop_index):
+        """Footpaths between stops (seconds)
+
+        Every pair of stops within TRANSFER_WALK_KM is linked by a walk at
+        walking speed, found through the stop grid. transfers.txt overrides
+        the time of a pair (min_transfer_time) or forbids it (transfer_type 3),
+        and can add pairs farther apart.
+        """
+        listed = {}
+        for row in rows:
+            origin = stop_index.get(row['from_stop_id'])
+            destination = stop_index.get(row['to_stop_id'])
+            if origin is None or destination is None or origin == destination:
+                continue
+            if row.get('transfer_type', '0').strip() == '3':
+                listed[origin, destination] = None  # transfer not possible
+                continue
+            seconds = int(row.get('min_transfer_time') or 0)
+            if not seconds:
+                seconds = self.walk_seconds(self.stop_distance(origin, destination))
+            listed[origin, destination] = seconds
+
+        paths = [{} for _ in range(self.stop_count)]
+        grid = self.stop_index()
+        for origin in range(self.stop_count):
+            for destination, km in grid.within(self.stop_lat[origin], self.stop_lon[origin], TRANSFER_WALK_KM):
+                if destination != origin:
+                    paths[origin][destination] = self.walk_seconds(km)
+        for (origin, destination), seconds in listed.items():
+            if seconds is None:
+                paths[origin].pop(destination, None)
+            else:
+                paths[origin][destination] = seconds
+
+        self.transfer_offsets = array('i', [0])
+        for entries in paths:
+            for destination, seconds in sorted(entries.items()):
+                self.transfer_targets.append(destination)
+                self.transfer_times.append(seconds)
+            self.transfer_offsets.append(len(self.transfer_targets))
+
+    def walk_seconds(self, km):
+        return int(km / DEFAULT_SPEEDS['walking'] * 3600)
+
+    def stop_distance(self, a, b):
+        """Straight-line distance between two stops in km"""
+        return distance_km(self.stop_lat[a], self.stop_lon[a], self.stop_lat[b], self.stop_lon[b])
+
+    def stop_index(self):
+        """Grid index over the stops, built on first use"""
+        if self.stop_grid is None:
+            self.stop_grid = GridIndex(self.stop_lat, self.stop_lon)
+        return self.stop_grid
+
+    def stops_near(self, lat, lon, radius_km):
+        """(stop, distance km) pairs within radius of a point, nearest first"""
+        return self.stop_index().within(lat, lon, radius_km)
+
+    def pattern_distance(self, pattern, board, alight):
+        """Straight-line length of a ride between two positions of a pattern"""
+        start = self.pattern_stop_offsets[pattern]
+        stops = self.pattern_stops
+        return sum(
+            self.stop_distance(stops[start + i], stops[start + i + 1])
+            for i in range(board, alight)
+        )
+
+
+def feed_signature(directory):
+    """Modification times and sizes of the GTFS files, used to detect updates"""
+    signature = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.txt'):
+            stat = os.stat(os.path.join(directory, name))
+            signature.append((name, stat.st_mtime_ns, stat.st_size))
+    return signature
+
+
+def load_feed(directory=DEFAULT_FEED_DIR):
+    """Load the transit feed, using the packed cache when it is up to date
+
+    Returns None if no GTFS folder is installed.
+    """
+    if not os.path.exists(os.path.join(directory, 'stop_times.txt')):
+        return None
+
+    cache_path = os.path.join(directory, CACHE_FILE)
+    signature = feed_signature(directory)
+    try:
+        with open(cache_path, 'rb') as f:
+            cached_signature = pickle.load(f)
+            version, tables = pickle.load(f)
+        if cached_signature == signature and version == CACHE_VERSION:
+            feed = TransitFeed()
+            feed.__dict__.update(tables)
+            return feed
+    except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+        pass
+
+    feed = TransitFeed.import_gtfs(directory)
+    try:
+        with open(cache_path, 'wb') as f:
+            pickle.dump(signature, f)
+            pickle.dump((CACHE_VERSION, feed.__dict__), f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass
+    return feed
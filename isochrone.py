@@ -0,0 +1,170 @@
+import heapq
+import math
+from array import array
+from bisect import bisect_right
+
+from emission_model import co2_emitted, co2_saved
+from pareto_search import SWITCHES, BOARDING_SECONDS
+from spatial_index import distance_km, KM_PER_DEGREE
+from speed_profiles import TIME_DEPENDENT_MODES, MINUTES_PER_DAY
+
+# Eco modes of the reachable area: (states a search starts in, states it may use)
+ISOCHRONE_MODES = {
+    'walking': (('walking',), ('walking',)),
+    'cycling': (('cycling',), ('cycling',)),
+    'bus': (('walking',), ('walking', 'bus')),
+    'bus_cycling': (('walking',), ('walking', 'bus', 'cycling'))
+}
+
+# Size of the squares counted to measure the reachable area (km)
+AREA_CELL_KM = 0.2
+
+
+class Isochrone:
+    """Places reachable from a source in one eco mode, grown as the time budget widens
+
+    A Dijkstra search over (node, travel state) ordered by time, with the
+    mode switches of the Pareto search (board at any node, get off and walk
+    on, or pick up a bike at a dock; without a docks file there are no bikes
+    to pick up). extend() settles labels up to a budget
+    and keeps its heap, so a wider budget carries on where the last one
+    stopped. Nodes are recorded in the order they are first reached, so the
+    summary for any smaller budget is a binary search away.
+
+    Bus legs use the bus speeds of the road network, not a timetable. With
+    a departure (seconds after midnight) they follow the speed profiles,
+    and boarding waits half the headway at the time.
+    """
+
+    def __init__(self, network, source, mode, departure=None):
+        self.network = network
+        self.source = source
+        self.mode = mode
+        self.departure = departure
+        start_states, self.states = ISOCHRONE_MODES[mode]
+        self.co2_per_m = {state: co2_emitted(state, 1.0) / 1000 for state in self.states}
+        self.budget = 0.0
+
+        # Search state: heap of (seconds, metres, kg CO₂, node, state) and settled labels
+        self.heap = [(0.0, 0.0, 0.0, source, state) for state in start_states]
+        self.tentative = {(source, state): 0.0 for state in start_states}
+        self.settled = set()
+        self.seen = set()
+
+        # Reached nodes in order of first arrival, with running maxima for the summary
+        self.nodes = array('i')
+        self.times = array('d')          # seconds
+        self.distances = array('d')      # km travelled
+        self.co2 = array('d')            # kg CO₂ emitted on the way
+        self.farthest = array('d')       # straight-line km of the farthest node so far
+        self.best = array('i')           # position of the node with the most CO₂ saved so far
+        self.cell_times = array('d')     # seconds when each area cell was first reached
+        self.cells = set()
+
+        self.origin = network.node_location(source)
+        self.cell_lat = AREA_CELL_KM / KM_PER_DEGREE
+        self.cell_lon = AREA_CELL_KM / (KM_PER_DEGREE * max(math.cos(math.radians(self.origin[0])), 0.01))
+
+    def extend(self, budget_seconds):
+        """Settle every label reachable within budget (nothing to do if it shrank)"""
+        if budget_seconds <= self.budget:
+            return
+        self.budget = budget_seconds
+
+        network = self.network
+        offsets, targets, lengths = network.offsets, network.targets, network.lengths
+        edge_times = network.edge_times
+        profiles = network.profiles
+        tables, edge_profiles = profiles.tables, network.edge_profiles
+        departure = self.departure
+        dock_nodes = network.dock_nodes
+        states = self.states
+        co2_per_m = self.co2_per_m
+        heap, tentative, settled = self.heap, self.tentative, self.settled
+        heappush, heappop = heapq.heappush, heapq.heappop
+
+        def push(seconds, metres, co2, node, state):
+            key = (node, state)
+            if key not in settled and seconds < tentative.get(key, math.inf):
+                tentative[key] = seconds
+                heappush(heap, (seconds, metres, co2, node, state))
+
+        while heap and heap[0][0] <= budget_seconds:
+            seconds, metres, co2, node, state = heappop(heap)
+            key = (node, state)
+            if key in settled:
+                continue
+            settled.add(key)
+            del tentative[key]
+            self.record(node, seconds, metres / 1000, co2)
+
+            # Change mode without moving
+            for other in SWITCHES[state]:
+                if other not in states:
+                    continue
+                if other == 'bus':
+                    wait = BOARDING_SECONDS if departure is None else profiles.boarding_seconds(departure + seconds)
+                    push(seconds + wait, metres, co2, node, 'bus')
+                elif other == 'walking' or (dock_nodes is not None and node in dock_nodes):
+                    push(seconds, metres, co2, node, other)
+
+            # Move along an edge in the current mode
+            weights = edge_times[state]
+            per_m = co2_per_m[state]
+            time_dependent = departure is not None and state in TIME_DEPENDENT_MODES
+            minute = int((departure + seconds) // 60) % MINUTES_PER_DAY if time_dependent else 0
+            for e in range(offsets[node], offsets[node + 1]):
+                w = weights[e]
+                if w >= 0:
+                    if time_dependent:
+                        w /= tables[edge_profiles[e]][minute]
+                    push(seconds + w, metres + lengths[e], co2 + lengths[e] * per_m, targets[e], state)
+
+    def record(self, node, seconds, km, co2):
+        """Add a node the first time any travel state reaches it"""
+        if node in self.seen:
+            return
+        self.seen.add(node)
+        position = len(self.nodes)
+        lat, lon = self.network.node_location(node)
+        distance = distance_km(self.origin[0], self.origin[1], lat, lon)
+
+        self.nodes.append(node)
+        self.times.append(seconds)
+        self.distances.append(km)
+        self.co2.append(co2)
+        self.farthest.append(max(distance, self.farthest[-1]) if position else distance)
+        if position and co2_saved(km, co2) <= self.saved(self.best[-1]):
+            self.best.append(self.best[-1])
+        else:
+            self.best.append(position)
+
+        cell = (math.floor(lat / self.cell_lat), math.floor(lon / self.cell_lon))
+        if cell not in self.cells:
+            self.cells.add(cell)
+            self.cell_times.append(seconds)
+
+    def saved(self, position):
+        """kg CO₂ saved compared with driving to the node at a position"""
+        return co2_saved(self.distances[position], self.co2[position])
+
+    def points(self, budget_seconds):
+        """(node, minutes, kg CO₂ saved) of every node reachable within budget"""
+        count = bisect_right(self.times, budget_seconds)
+        return [(self.nodes[i], self.times[i] / 60, self.saved(i)) for i in range(count)]
+
+    def summary(self, budget_seconds):
+        """Size of the area reachable within budget and the most CO₂ saved in it"""
+        count = bisect_right(self.times, budget_seconds)
+        if not count:
+            return {'mode': self.mode, 'places': 0, 'area': 0.0, 'farthest': 0.0,
+                    'co2_saved': 0.0, 'best_node': None}
+        best = self.best[count - 1]
+        return {
+            'mode': self.mode,
+            'places': count,                                                    # nodes reached
+            'area': bisect_right(self.cell_times, budget_seconds) * AREA_CELL_KM ** 2,  # km²
+            'farthest': self.farthest[count - 1],                               # km, straight line
+            'co2_saved': self.saved(best),                                      # kg CO₂
+            'best_node': self.nodes[best]
+        }
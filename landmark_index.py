@@ -0,0 +1,233 @@
+import hashlib
+import heapq
+import os
+import struct
+import sys
+from array import array
+
+# File written next to nodes.csv / edges.csv
+INDEX_FILE = 'landmarks.alt'
+INDEX_MAGIC = b'ALT2'
+
+# Bytes of the network fingerprint stored in the index header
+FINGERPRINT_SIZE = 16
+
+# Distance stored for nodes a landmark cannot reach (finite so that
+# differences between two unreachable entries stay 0 instead of NaN)
+UNREACHABLE = 1e30
+
+# Landmarks used per query (the ones giving the best bound for the pair)
+ACTIVE_LANDMARKS = 4
+
+
+def one_to_all(offsets, targets, weights, source):
+    """Plain Dijkstra from source over a CSR graph, returns seconds per node"""
+    dist = array('d', [UNREACHABLE]) * (len(offsets) - 1)
+    dist[source] = 0.0
+    heap = [(0.0, source)]
+    heappush, heappop = heapq.heappush, heapq.heappop
+    while heap:
+        d, u = heappop(heap)
+        if d > dist[u]:
+            continue
+        for e in range(offsets[u], offsets[u + 1]):
+            w = weights[e]
+            if w < 0:
+                continue
+            v = targets[e]
+            nd = d + w
+            if nd < dist[v]:
+                dist[v] = nd
+                heappush(heap, (nd, v))
+    # Stored as float32 to halve the size of the index
+    return array('f', dist)
+
+
+def network_fingerprint(network):
+    """Digest of a network's edge arrays, so an index is only used with the edges it was built for"""
+    digest = hashlib.blake2b(digest_size=FINGERPRINT_SIZE)
+    digest.update(network.offsets.tobytes())
+    digest.update(network.targets.tobytes())
+    for mode in sorted(network.edge_times):
+        digest.update(mode.encode('utf-8'))
+        digest.update(network.edge_times[mode].tobytes())
+    return digest.digest()
+
+
+def reverse_graph(network):
+    """CSR arrays of the reversed network (edge order shared by all modes)"""
+    node_count = network.node_count
+    offsets = network.offsets
+    reverse_offsets = array('i', [0]) * (node_count + 1)
+    for v in network.targets:
+        reverse_offsets[v + 1] += 1
+    for i in range(node_count):
+        reverse_offsets[i + 1] += reverse_offsets[i]
+
+    position = array('i', reverse_offsets[:-1])
+    reverse_targets = array('i', [0]) * network.edge_count
+    edge_order = array('i', [0]) * network.edge_count
+    for u in range(node_count):
+        for e in range(offsets[u], offsets[u + 1]):
+            v = network.targets[e]
+            reverse_targets[position[v]] = u
+            edge_order[position[v]] = e
+            position[v] += 1
+    return reverse_offsets, reverse_targets, edge_order
+
+
+class LandmarkIndex:
+    """ALT (A*, landmarks, triangle inequality) preprocessing for a road network
+
+    For every mode a few landmark nodes are picked and the travel time from
+    and to every node is stored. At query time the triangle inequality turns
+    these tables into a much tighter A* lower bound than straight-line
+    distance, so far fewer nodes are settled per query.
+    """
+
+    def __init__(self, node_count, landmarks, forward, backward, fingerprint=bytes(FINGERPRINT_SIZE)):
+        self.node_count = node_count
+        self.fingerprint = fingerprint  # network_fingerprint() of the network it was built for
+        self.landmarks = landmarks      # mode -> list of landmark nodes
+        self.forward = forward          # mode -> list of arrays d(L, v)
+        self.backward = backward        # mode -> list of arrays d(v, L)
+
+    @classmethod
+    def build(cls, network, count=8, modes=None):
+        """Pick landmarks by farthest-point selection and compute their tables"""
+        modes = modes or list(network.edge_times)
+        reverse_offsets, reverse_targets, edge_order = reverse_graph(network)
+        landmarks, forward, backward = {}, {}, {}
+
+        for mode in modes:
+            weights = network.edge_times[mode]
+            reverse_weights = array('f', (weights[e] for e in edge_order))
+            landmarks[mode], forward[mode], backward[mode] = [], [], []
+
+            # Start from the node farthest away from node 0, then keep adding
+            # the node farthest from every landmark chosen so far
+            start_dist = one_to_all(network.offsets, network.targets, weights, 0)
+            candidate = farthest_node(start_dist, None)
+            closest = None
+            for _ in range(count):
+                if candidate is None:
+                    break
+                dist_from = one_to_all(network.offsets, network.targets, weights, candidate)
+                dist_to = one_to_all(reverse_offsets, reverse_targets, reverse_weights, candidate)
+                landmarks[mode].append(candidate)
+                forward[mode].append(dist_from)
+                backward[mode].append(dist_to)
+
+                if closest is None:
+                    closest = array('f', dist_from)
+                else:
+                    for v, d in enumerate(dist_from):
+                        if d < closest[v]:
+                            closest[v] = d
+                candidate = farthest_node(closest, landmarks[mode])
+
+        return cls(network.node_count, landmarks, forward, backward, network_fingerprint(network))
+
+    def save(self, path):
+        """Write the index as a small header followed by raw float32 tables"""
+        with open(path, 'wb') as f:
+            f.write(INDEX_MAGIC)
+            f.write(struct.pack('<II', self.node_count, len(self.landmarks)))
+            f.write(self.fingerprint)
+            for mode, nodes in self.landmarks.items():
+                name = mode.encode('utf-8')
+                f.write(struct.pack('<BI', len(name), len(nodes)))
+                f.write(name)
+                array('i', nodes).tofile(f)
+                for dist_from, dist_to in zip(self.forward[mode], self.backward[mode]):
+                    dist_from.tofile(f)
+                    dist_to.tofile(f)
+
+    @classmethod
+    def load(cls, path, fingerprint=None):
+        """Read an index written by save
+
+        Returns None if the file is not an index of this version, or was
+        built for a network with another fingerprint (edges or speeds changed).
+        """
+        with open(path, 'rb') as f:
+            if f.read(4) != INDEX_MAGIC:
+                return None
+            stored_count, mode_count = struct.unpack('<II', f.read(8))
+            stored_fingerprint = f.read(FINGERPRINT_SIZE)
+            if fingerprint is not None and stored_fingerprint != fingerprint:
+                return None
+
+            landmarks, forward, backward = {}, {}, {}
+            for _ in range(mode_count):
+                name_length, landmark_count = struct.unpack('<BI', f.read(5))
+                mode = f.read(name_length).decode('utf-8')
+                nodes = array('i')
+                nodes.fromfile(f, landmark_count)
+                landmarks[mode] = list(nodes)
+                forward[mode], backward[mode] = [], []
+                for _ in range(landmark_count):
+                    dist_from = array('f')
+                    dist_from.fromfile(f, stored_count)
+                    dist_to = array('f')
+                    dist_to.fromfile(f, stored_count)
+                    forward[mode].append(dist_from)
+                    backward[mode].append(dist_to)
+
+        return cls(stored_count, landmarks, forward, backward, stored_fingerprint)
+
+    def heuristic(self, mode, source, target):
+        """A* lower bound (seconds to target) using the best landmarks for this pair"""
+        tables = list(zip(self.forward[mode], self.backward[mode]))
+
+        def bound(pair, v):
+            dist_from, dist_to = pair
+            return max(dist_from[target] - dist_from[v], dist_to[v] - dist_to[target])
+
+        tables.sort(key=lambda pair: bound(pair, source), reverse=True)
+        active = [
+            (dist_from, dist_from[target], dist_to, dist_to[target])
+            for dist_from, dist_to in tables[:ACTIVE_LANDMARKS]
+        ]
+
+        def lower_bound(v):
+            best = 0.0
+            for dist_from, from_target, dist_to, to_target in active:
+                d = from_target - dist_from[v]
+                if d > best:
+                    best = d
+                d = dist_to[v] - to_target
+                if d > best:
+                    best = d
+            return best
+
+        return lower_bound
+
+
+def farthest_node(dist, chosen):
+    """Reachable node with the largest distance (None if nothing is left)"""
+    best, best_dist = None, 0.0
+    for v, d in enumerate(dist):
+        if best_dist < d < UNREACHABLE and (chosen is None or v not in chosen):
+            best, best_dist = v, d
+    return best
+
+
+def index_path(directory):
+    return os.path.join(directory, INDEX_FILE)
+
+
+def build_index(directory, count=8):
+    """Preprocess a network directory and save the landmark index next to it"""
+    from road_network import RoadNetwork
+    network = RoadNetwork.load(directory)
+    index = LandmarkIndex.build(network, count)
+    index.save(index_path(directory))
+    return index
+
+
+if __name__ == '__main__':
+    network_dir = sys.argv[1] if len(sys.argv) > 1 else 'network'
+    landmark_count = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    build_index(network_dir, landmark_count)
+    print(f"Saved landmark index to {index_path(network_dir)}")
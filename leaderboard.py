@@ -0,0 +1,226 @@
+import random
+
+from co2_ledger import saved_totals
+from user_store import KEY_SEPARATOR
+
+# Board ranked by the CO₂ saved over all time (the ledger's saved_g, in grams), so
+# exchanging CO₂ for dragon challenges does not cost a user their place
+CO2_BOARD = 'co2'
+
+# Boards ranked by a profile field (the fields the progress panel shows)
+PROFILE_BOARDS = {
+    'eco_routes': 'eco_routes_taken',
+    'level': 'player.level'
+}
+
+BOARDS = (CO2_BOARD,) + tuple(PROFILE_BOARDS)
+
+# Top-level profile fields whose change can move a user on a board
+# (changed('total_co2_saved') is how a new ledger event is announced)
+SCORE_FIELDS = frozenset(['total_co2_saved'] +
+                         [name.split(KEY_SEPARATOR)[0] for name in PROFILE_BOARDS.values()])
+
+
+def field_value(data, name):
+    """Value of a flattened field name in a nested profile, or None if it is missing"""
+    for key in name.split(KEY_SEPARATOR):
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    return data
+
+
+class RankNode:
+    __slots__ = ('key', 'priority', 'size', 'left', 'right')
+
+    def __init__(self, key):
+        self.key = key
+        self.priority = random.random()
+        self.size = 1
+        self.left = None
+        self.right = None
+
+
+def size(node):
+    return node.size if node else 0
+
+
+def split(node, key):
+    """(nodes with keys < key, the rest)"""
+    if node is None:
+        return None, None
+    if node.key < key:
+        node.right, right = split(node.right, key)
+        node.size = 1 + size(node.left) + size(node.right)
+        return node, right
+    left, node.left = split(node.left, key)
+    node.size = 1 + size(node.left) + size(node.right)
+    return left, node
+
+
+def merge(left, right):
+    """Join two treaps where every key of left is smaller than every key of right"""
+    if left is None or right is None:
+        return left or right
+    if left.priority > right.priority:
+        left.right = merge(left.right, right)
+        left.size = 1 + size(left.left) + size(left.right)
+        return left
+    right.left = merge(left, right.left)
+    right.size = 1 + size(right.left) + size(right.right)
+    return right
+
+
+def remove(node, key):
+    """Treap without key (which must be in it)"""
+    if node.key == key:
+        return merge(node.left, node.right)
+    if key < node.key:
+        node.left = remove(node.left, key)
+    else:
+        node.right = remove(node.right, key)
+    node.size -= 1
+    return node
+
+
+class RankTree:
+    """Users ordered by score, highest first (ties by user ID)
+
+    An order-statistics treap: every node knows the size of its subtree,
+    so changing a score, finding a user's rank and reading the top k all
+    take O(log n) expected time (plus k), without looking at other users.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.scores = {}   # user -> score
+
+    @classmethod
+    def build(cls, scores):
+        """Tree of a {user: score} dict, built from the sorted keys in one pass"""
+        tree = cls()
+        tree.scores = dict(scores)
+        # Cartesian tree: the stack holds the right spine, priorities decreasing
+        spine = []
+        for key in sorted((-score, user) for user, score in tree.scores.items()):
+            node = RankNode(key)
+            below = None
+            while spine and spine[-1].priority < node.priority:
+                below = spine.pop()
+            node.left = below
+            if spine:
+                spine[-1].right = node
+            spine.append(node)
+        tree.root = spine[0] if spine else None
+
+        # Subtree sizes, children before parents
+        order = [tree.root] if tree.root else []
+        for node in order:
+            order.extend(child for child in (node.left, node.right) if child)
+        for node in reversed(order):
+            node.size = 1 + size(node.left) + size(node.right)
+        return tree
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __contains__(self, user):
+        return user in self.scores
+
+    def update(self, user, score):
+        """Set a user's score (adding the user if new)"""
+        if user in self.scores:
+            old = self.scores[user]
+            if old == score:
+                return
+            self.root = remove(self.root, (-old, user))
+        self.scores[user] = score
+        left, right = split(self.root, (-score, user))
+        self.root = merge(merge(left, RankNode((-score, user))), right)
+
+    def discard(self, user):
+        if user in self.scores:
+            self.root = remove(self.root, (-self.scores.pop(user), user))
+
+    def rank(self, user):
+        """1-based rank of a user, or None if they are not on the board"""
+        if user not in self.scores:
+            return None
+        key = (-self.scores[user], user)
+        node = self.root
+        before = 0
+        while node.key != key:
+            if key < node.key:
+                node = node.left
+            else:
+                before += size(node.left) + 1
+                node = node.right
+        return before + size(node.left) + 1
+
+    def top(self, count, start=0):
+        """(user, score) of ranks start + 1 to start + count"""
+        entries = []
+        stack = []
+        node = self.root
+        # Descend to rank start + 1, keeping the ancestors an in-order walk still has to visit
+        skip = start
+        while node is not None:
+            if skip < size(node.left):
+                stack.append(node)
+                node = node.left
+            else:
+                skip -= size(node.left) + 1
+                if skip < 0:
+                    stack.append(node)
+                    break
+                node = node.right
+        while stack and len(entries) < count:
+            node = stack.pop()
+            entries.append((node.key[1], -node.key[0]))
+            node = node.right
+            while node is not None:
+                stack.append(node)
+                node = node.left
+        return entries
+
+
+class Leaderboard:
+    """One RankTree per board in BOARDS, kept up to date as profiles change
+
+    load() reads the scores of every stored profile once; after that
+    update() moves a single user in O(log n), so ranks and top lists never
+    scan the profiles.
+    """
+
+    def __init__(self):
+        self.boards = {board: RankTree() for board in BOARDS}
+
+    @classmethod
+    def load(cls, connection):
+        """Leaderboard of every profile and ledger in a UserStore database"""
+        leaderboard = cls()
+        fields = {name: board for board, name in PROFILE_BOARDS.items()}
+        scores = {board: {} for board in BOARDS}
+        scores[CO2_BOARD] = saved_totals(connection)
+        rows = connection.execute(
+            'SELECT user_id, name, value FROM profile_fields WHERE name IN (%s)' % ', '.join('?' * len(fields)),
+            list(fields))
+        for user, name, value in rows:
+            if isinstance(value, (int, float)):
+                scores[fields[name]][user] = value
+        leaderboard.boards = {board: RankTree.build(scores[board]) for board in BOARDS}
+        return leaderboard
+
+    def update(self, user, data, ledger):
+        """Move a user to the scores of their profile and CO2Ledger"""
+        self.boards[CO2_BOARD].update(user, ledger.totals['saved_g'])
+        for board, name in PROFILE_BOARDS.items():
+            value = field_value(data, name)
+            if isinstance(value, (int, float)):
+                self.boards[board].update(user, value)
+
+    def rank(self, board, user):
+        return self.boards[board].rank(user)
+
+    def top(self, board, count):
+        return self.boards[board].top(count)
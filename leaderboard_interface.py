@@ -0,0 +1,98 @@
+import tkinter as tk
+from profile_store import ProfileStore
+from leaderboard import SCORE_FIELDS
+
+# Users listed on each board
+LEADERBOARD_SIZE = 10
+
+# Board titles and how a score is shown
+BOARD_TITLES = {
+    'co2': ('🌱 CO₂ Saved', lambda score: f"{score / 1000:.2f} kg"),
+    'eco_routes': ('🚲 Eco Routes', lambda score: f"{score} routes"),
+    'level': ('🐉 Dragon Level', lambda score: f"Lv.{score}")
+}
+
+class LeaderboardInterface:
+    def __init__(self, root, profile=None):
+        self.root = root
+        self.root.title("🏆 Leaderboard")
+        self.root.geometry("900x450")
+        self.root.configure(bg='#f0f0f0')
+        
+        # Rankings of every user, kept up to date by the shared profile
+        self.profile = profile or ProfileStore.open(self.root)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        self.create_widgets()
+        self.update_boards()
+        self.profile.subscribe(self.on_profile_change)
+    
+    def on_close(self):
+        self.profile.unsubscribe(self.on_profile_change)
+        self.root.destroy()
+    
+    def create_widgets(self):
+        # Title
+        title_label = tk.Label(
+            self.root,
+            text="🏆 Workplace Challenge Leaderboard",
+            font=("Arial", 20, "bold"),
+            bg='#f0f0f0',
+            fg='#333333'
+        )
+        title_label.pack(pady=20)
+        
+        boards_frame = tk.Frame(self.root, bg='#f0f0f0')
+        boards_frame.pack(expand=True, fill='both', padx=20)
+        
+        # One column per board: the top users, then the current user's rank
+        self.board_labels = {}
+        self.rank_labels = {}
+        for board, (title, _) in BOARD_TITLES.items():
+            board_frame = tk.LabelFrame(
+                boards_frame,
+                text=title,
+                font=("Arial", 14, "bold"),
+                bg='#f0f0f0',
+                fg='#4CAF50',
+                padx=10,
+                pady=10
+            )
+            board_frame.pack(side='left', expand=True, fill='both', padx=5)
+        
+            self.board_labels[board] = tk.Label(
+                board_frame,
+                text="",
+                font=("Arial", 11),
+                bg='#f0f0f0',
+                justify='left'
+            )
+            self.board_labels[board].pack(anchor='w')
+        
+            self.rank_labels[board] = tk.Label(
+                board_frame,
+                text="",
+                font=("Arial", 11, "bold"),
+                bg='#f0f0f0',
+                fg='#1976d2'
+            )
+            self.rank_labels[board].pack(anchor='w', pady=(10, 0))
+    
+    def on_profile_change(self, fields):
+        """Redraw the boards when a score changed or another user logged in"""
+        if 'user' in fields or not SCORE_FIELDS.isdisjoint(fields):
+            self.update_boards()
+    
+    def update_boards(self):
+        leaderboard = self.profile.ranking()
+        user = self.profile.user
+        for board, (_, show) in BOARD_TITLES.items():
+            lines = [f"{rank}. {name}  {show(score)}"
+                     for rank, (name, score) in enumerate(leaderboard.top(board, LEADERBOARD_SIZE), 1)]
+            self.board_labels[board].config(text="\n".join(lines) or "No scores yet")
+        
+            rank = leaderboard.rank(board, user)
+            count = len(leaderboard.boards[board])
+            self.rank_labels[board].config(
+                text=f"You ({user}): #{rank} of {count}" if rank else f"You ({user}): not ranked yet"
+            )
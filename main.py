@@ -1,7 +1,17 @@
+import sqlite3
+import sys
 import tkinter as tk
 from tkinter import ttk, messagebox
 from navigation_interface import NavigationInterface
 from dragon_game import DragonGameInterface
+from route_cache import RouteCache, ROUTE_CACHE_FILE
+from route_planner import data_fingerprint
+from od_matrix import ODMatrix, OD_HISTORY_FILE
+from profile_store import ProfileStore
+from leaderboard_interface import LeaderboardInterface
+
+# How often planned-ahead routes are moved into the route cache (ms)
+OD_POLL_MS = 500
 
 class MainApplication:
     def __init__(self, root):
@@ -10,9 +20,48 @@ class MainApplication:
         self.root.geometry("800x600")
         self.root.configure(bg='#f0f0f0')
         
+        # The user's profile, loaded once and shared by every window
+        # (user_data.json is imported into the profile database on first start)
+        try:
+            self.profile = ProfileStore.open(self.root)
+        except (ValueError, sqlite3.Error) as e:
+            # Starting with a new profile instead would overwrite the stored one
+            messagebox.showerror("Error", f"Could not load your progress: {e}")
+            self.root.destroy()
+            sys.exit(1)
+        self.profile.on_error = self.show_save_error
+        
+        # Route cache shared by every navigation window, kept warm for common trips
+        self.route_cache = RouteCache.load(ROUTE_CACHE_FILE, fingerprint=data_fingerprint())
+        self.od_matrix = ODMatrix(self.route_cache)
+        self.od_matrix.load(OD_HISTORY_FILE)
+        self.od_matrix.start()
+        self.root.after(OD_POLL_MS, self.poll_od_matrix)
+        
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
         # Create main menu
         self.create_main_menu()
         
+    def poll_od_matrix(self):
+        self.od_matrix.poll()
+        self.root.after(OD_POLL_MS, self.poll_od_matrix)
+        
+    def on_close(self):
+        """Stop planning ahead, save the route cache and query history and quit"""
+        self.od_matrix.stop()
+        try:
+            self.route_cache.save(ROUTE_CACHE_FILE)
+            self.od_matrix.save(OD_HISTORY_FILE)
+        except OSError:
+            pass
+        self.profile.flush()
+        self.profile.user_store.close()
+        self.root.destroy()
+        
+    def show_save_error(self, error):
+        messagebox.showwarning("Warning", f"Could not save your progress: {error}")
+        
     def create_main_menu(self):
         # Title
         title_label = tk.Label(
@@ -24,6 +73,39 @@ class MainApplication:
         )
         title_label.pack(pady=30)
         
+        # User login (kiosks are shared: each user ID keeps its own progress)
+        user_frame = tk.Frame(self.root, bg='#f0f0f0')
+        user_frame.pack()
+        
+        user_prompt = tk.Label(
+            user_frame,
+            text="👤 User ID:",
+            font=("Arial", 12),
+            bg='#f0f0f0'
+        )
+        user_prompt.pack(side='left')
+        
+        self.user_entry = tk.Entry(user_frame, font=("Arial", 12), width=20)
+        self.user_entry.pack(side='left', padx=5)
+        self.user_entry.bind('<Return>', lambda event: self.switch_user())
+        
+        login_button = tk.Button(
+            user_frame,
+            text="Log In",
+            font=("Arial", 12),
+            command=self.switch_user
+        )
+        login_button.pack(side='left')
+        
+        self.user_label = tk.Label(
+            self.root,
+            text=f"Logged in as {self.profile.user}",
+            font=("Arial", 11),
+            bg='#f0f0f0',
+            fg='#666666'
+        )
+        self.user_label.pack(pady=(5, 0))
+        
         # Button frame
         button_frame = tk.Frame(self.root, bg='#f0f0f0')
         button_frame.pack(expand=True)
@@ -55,14 +137,45 @@ class MainApplication:
         )
         game_button.pack(pady=10)
         
+        # Leaderboard button
+        leaderboard_button = tk.Button(
+            button_frame,
+            text="🏆 Leaderboard",
+            font=("Arial", 14),
+            bg='#2196F3',
+            fg='white',
+            width=25,
+            height=3,
+            command=self.open_leaderboard
+        )
+        leaderboard_button.pack(pady=10)
+        
+    def switch_user(self):
+        """Log in as the user ID typed in (open windows switch to their progress)"""
+        user = self.user_entry.get().strip()
+        if not user:
+            messagebox.showwarning("Warning", "Please enter a user ID!")
+            return
+        try:
+            self.profile.switch_user(user)
+        except (ValueError, sqlite3.Error) as e:
+            messagebox.showerror("Login Failed", f"Could not load the progress of {user}: {e}")
+            return
+        self.user_entry.delete(0, tk.END)
+        self.user_label.config(text=f"Logged in as {user}")
+        
     def open_navigation(self):
         nav_window = tk.Toplevel(self.root)
-        NavigationInterface(nav_window)
+        NavigationInterface(nav_window, self.route_cache, self.od_matrix, self.profile)
         
         
     def open_dragon_game(self):
         game_window = tk.Toplevel(self.root)
-        DragonGameInterface(game_window)
+        DragonGameInterface(game_window, self.profile)
+        
+    def open_leaderboard(self):
+        leaderboard_window = tk.Toplevel(self.root)
+        LeaderboardInterface(leaderboard_window, self.profile)
 
 if __name__ == '__main__':
     root = tk.Tk()
@@ -1,54 +1,101 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import random
-import json
-import os
 import math
+from route_planner import RoutePlanner, data_fingerprint
+from route_cache import RouteCache, ROUTE_CACHE_FILE
+from route_list import RouteList
+from route_worker import RouteWorker
+from emission_model import co2_saved
+from profile_store import ProfileStore, PROFILE_FIELDS
+from co2_ledger import CHALLENGE_GRAMS
+
+# How often the window checks for routes planned on the worker thread (ms)
+ROUTE_POLL_MS = 50
+
+# Time budget slider of the reachable area (minutes)
+ISOCHRONE_MINUTES = 30
+ISOCHRONE_MIN_MINUTES = 5
+ISOCHRONE_MAX_MINUTES = 60
+
+# Bars of the sparkline of CO₂ saved per day, lowest first
+TREND_BARS = '▁▂▃▄▅▆▇█'
+
+ISOCHRONE_LABELS = {
+    'walking': '🚶 Walking',
+    'cycling': '🚴 Cycling',
+    'bus': '🚌 Bus + Walking',
+    'bus_cycling': '🚴 Bus + Cycling'
+}
 
 class NavigationInterface:
-    def __init__(self, root):
+    def __init__(self, root, route_cache=None, od_matrix=None, profile=None):
         self.root = root
         self.root.title("🌱 Low-Carbon Navigation Interface")
         self.root.geometry("1200x800")
         self.root.configure(bg='#e8f5e8')
         
-        # User data
-        self.user_data = self.load_user_data()
+        # User data, shared with the other windows through the main window's profile
+        self.profile = profile or ProfileStore.open(self.root)
+        self.user_data = self.profile.data
         self.generated_routes = []
         self.selected_route = None
         
+        # Route options from the installed road network, GTFS feed and address list
+        # (loaded once by the main window's od_matrix and shared with it; None until
+        # it has loaded them, see on_data_reload)
+        self.od_matrix = od_matrix
+        self.planner = od_matrix.planner() if od_matrix is not None else RoutePlanner.load()
+        
+        # Offline address index for autocomplete (None if no address file is installed)
+        self.geocoder = self.planner.geocoder if self.planner is not None else None
+        self.suggestion_box = None
+        
+        # Routes are planned on a worker thread and picked up by poll_routes
+        # (queries sent while the data files are loading wait there for the planner)
+        self.route_worker = RouteWorker(self.planner)
+        self.pending_query = None
+        self.poll_job = None
+        
+        # Start address of the reachable area shown (None when there is none)
+        self.isochrone_start = None
+        
+        # Recently generated route options (persisted when the window closes), shared
+        # with the main window, which plans common trips ahead into it (od_matrix)
+        if route_cache is None:
+            route_cache = RouteCache.load(ROUTE_CACHE_FILE, fingerprint=data_fingerprint())
+        self.route_cache = route_cache
+        if od_matrix is not None:
+            od_matrix.subscribe(self.on_data_reload)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
         # Create main framework
         self.create_widgets()
         self.update_progress_display()
-        
-    def load_user_data(self):
-        """Load user data"""
-        try:
-            if os.path.exists('user_data.json'):
-                with open('user_data.json', 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except:
-            pass
-        
-        # Default user data
-        return {
-            'total_co2_saved': 0.0,  # Total CO₂ reduction (kg CO₂)
-            'game_challenges': 0,    # Game challenge count
-            'inventory': {           # Inventory items
-                'potions': 0,        # HP potions
-                'iron_sword': 0,     # Iron sword
-                'iron_armor': 0      # Iron armor
-            },
-            'eco_routes_taken': 0    # Eco-friendly routes taken
-        }
+        self.profile.subscribe(self.on_profile_change)
     
-    def save_user_data(self):
-        """Save user data"""
+    def on_close(self):
+        """Stop the route worker, persist progress and the route cache and close the window"""
+        self.route_worker.stop()
+        self.profile.unsubscribe(self.on_profile_change)
+        if self.od_matrix is not None:
+            self.od_matrix.unsubscribe(self.on_data_reload)
+        self.profile.flush()
         try:
-            with open('user_data.json', 'w', encoding='utf-8') as f:
-                json.dump(self.user_data, f, ensure_ascii=False, indent=2)
-        except:
+            self.route_cache.save(ROUTE_CACHE_FILE)
+        except OSError:
             pass
+        self.root.destroy()
+        
+    def on_data_reload(self):
+        """The network and timetable files were loaded or changed: plan the next queries on them"""
+        self.planner = self.od_matrix.planner()
+        self.geocoder = self.planner.geocoder
+        self.route_worker.set_planner(self.planner)
+        
+    def save_user_data(self, *fields):
+        """Save user data shortly and show the changed fields in every window"""
+        self.profile.changed(*fields)
         
     def create_widgets(self):
         # Title
@@ -76,6 +123,7 @@ class NavigationInterface:
         
         self.create_input_area(left_frame)
         self.create_progress_area(right_frame)
+        self.create_isochrone_area(left_frame)
         self.create_routes_area(left_frame)
         
     def create_input_area(self, parent):
@@ -139,6 +187,12 @@ class NavigationInterface:
         self.end_entry.bind('<FocusIn>', self.clear_end_placeholder)
         self.end_entry.bind('<FocusOut>', self.add_end_placeholder)
         
+        # As-you-type address suggestions (when an address file is installed)
+        for entry in (self.start_entry, self.end_entry):
+            entry.bind('<KeyRelease>', lambda event, entry=entry: self.update_suggestions(entry, event))
+            entry.bind('<Down>', self.focus_suggestions)
+            entry.bind('<Escape>', lambda event: self.hide_suggestions())
+        
         # Button area
         button_frame = tk.Frame(input_frame, bg='#e8f5e8')
         button_frame.pack(fill='x', pady=10)
@@ -169,6 +223,19 @@ class NavigationInterface:
         )
         clear_button.pack(side='left')
         
+        # Reachable area button
+        isochrone_button = tk.Button(
+            button_frame,
+            text="🗺️ Reachable Area",
+            font=("Arial", 12),
+            bg='#2196f3',
+            fg='white',
+            width=15,
+            height=2,
+            command=self.generate_isochrones
+        )
+        isochrone_button.pack(side='left', padx=(10, 0))
+        
     def create_progress_area(self, parent):
         # Progress area frame
         progress_frame = tk.LabelFrame(
@@ -224,6 +291,28 @@ class NavigationInterface:
         )
         self.challenge_label.pack(anchor='w')
         
+        # Recent trips (read from the daily/weekly/monthly rollups of the trip history)
+        trend_frame = tk.Frame(progress_frame, bg='#e8f5e8')
+        trend_frame.pack(fill='x', pady=5)
+        
+        tk.Label(
+            trend_frame,
+            text="📈 Recent Trips:",
+            font=("Arial", 11, "bold"),
+            bg='#e8f5e8',
+            fg='#00695c'
+        ).pack(anchor='w')
+        
+        self.trend_label = tk.Label(
+            trend_frame,
+            text="",
+            font=("Arial", 10),
+            bg='#e8f5e8',
+            fg='#00796b',
+            justify='left'
+        )
+        self.trend_label.pack(anchor='w')
+        
         # Exchange button
         exchange_button = tk.Button(
             progress_frame,
@@ -306,6 +395,46 @@ class NavigationInterface:
         scrollbar.pack(side="right", fill="y")
         self.reward_text.configure(yscrollcommand=scrollbar.set)
         
+    def create_isochrone_area(self, parent):
+        # Reachable area display: one line per eco mode, and the time budget slider
+        isochrone_frame = tk.LabelFrame(
+            parent,
+            text="🗺️ Reachable Area",
+            font=("Arial", 14, "bold"),
+            bg='#e8f5e8',
+            fg='#1976d2',
+            padx=15,
+            pady=10
+        )
+        isochrone_frame.pack(fill='x')
+        self.isochrone_area = isochrone_frame
+        
+        self.budget_var = tk.IntVar(value=ISOCHRONE_MINUTES)
+        tk.Scale(
+            isochrone_frame,
+            label="⏱️ Time budget (min)",
+            from_=ISOCHRONE_MIN_MINUTES,
+            to=ISOCHRONE_MAX_MINUTES,
+            resolution=5,
+            orient='horizontal',
+            variable=self.budget_var,
+            bg='#e8f5e8',
+            command=self.on_budget_change
+        ).pack(fill='x')
+        
+        self.isochrone_labels = {}
+        for mode in ISOCHRONE_LABELS:
+            label = tk.Label(
+                isochrone_frame,
+                text=f"{ISOCHRONE_LABELS[mode]}: -",
+                font=("Arial", 10),
+                bg='#e8f5e8',
+                fg='#2e7d32',
+                anchor='w'
+            )
+            label.pack(fill='x')
+            self.isochrone_labels[mode] = label
+        
     def create_routes_area(self, parent):
         # Route display area
         routes_frame = tk.LabelFrame(
@@ -318,24 +447,11 @@ class NavigationInterface:
             pady=10
         )
         routes_frame.pack(fill='both', expand=True, pady=(15, 0))
+        self.routes_area = routes_frame
         
-        # Create scrollable frame
-        canvas = tk.Canvas(routes_frame, bg='white', height=300)
-        scrollbar = tk.Scrollbar(routes_frame, orient="vertical", command=canvas.yview)
-        scrollable_frame = tk.Frame(canvas, bg='white')
-        
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-        
-        self.routes_frame = scrollable_frame
+        # Virtualized list: only the visible cards are built, and they are reused
+        self.route_var = tk.StringVar()
+        self.route_list = RouteList(routes_frame, self.route_var, self.select_route)
         
     def clear_start_placeholder(self, event):
         if self.start_entry.get() == "Please enter start address...":
@@ -357,7 +473,65 @@ class NavigationInterface:
             self.end_entry.insert(0, "Please enter end address...")
             self.end_entry.config(fg='gray')
     
+    def update_suggestions(self, entry, event):
+        """Show address suggestions below the entry being typed in"""
+        if self.geocoder is None or event.keysym in ('Down', 'Up', 'Return', 'Escape', 'Tab'):
+            return
+        
+        suggestions = self.geocoder.complete(entry.get())
+        if not suggestions:
+            self.hide_suggestions()
+            return
+        
+        if self.suggestion_box is None:
+            self.suggestion_box = tk.Listbox(
+                self.root,
+                font=("Arial", 11),
+                relief='solid',
+                bd=1,
+                activestyle='dotbox'
+            )
+            self.suggestion_box.bind('<ButtonRelease-1>', lambda event: self.choose_suggestion())
+            self.suggestion_box.bind('<Return>', lambda event: self.choose_suggestion())
+            self.suggestion_box.bind('<Escape>', lambda event: self.hide_suggestions())
+        
+        self.suggestion_entry = entry
+        self.suggestion_box.delete(0, tk.END)
+        for suggestion in suggestions:
+            self.suggestion_box.insert(tk.END, suggestion)
+        self.suggestion_box.config(height=len(suggestions))
+        
+        # Place the list right under the entry
+        x = entry.winfo_rootx() - self.root.winfo_rootx()
+        y = entry.winfo_rooty() - self.root.winfo_rooty() + entry.winfo_height()
+        self.suggestion_box.place(x=x, y=y, width=entry.winfo_width())
+        self.suggestion_box.lift()
+    
+    def focus_suggestions(self, event):
+        """Move keyboard focus into the suggestion list"""
+        if self.suggestion_box is not None and self.suggestion_box.winfo_ismapped():
+            self.suggestion_box.focus_set()
+            self.suggestion_box.selection_clear(0, tk.END)
+            self.suggestion_box.selection_set(0)
+            self.suggestion_box.activate(0)
+    
+    def choose_suggestion(self):
+        """Copy the selected suggestion into its entry"""
+        selection = self.suggestion_box.curselection()
+        if selection:
+            entry = self.suggestion_entry
+            entry.delete(0, tk.END)
+            entry.insert(0, self.suggestion_box.get(selection[0]))
+            entry.config(fg='black')
+            entry.focus_set()
+        self.hide_suggestions()
+    
+    def hide_suggestions(self):
+        if self.suggestion_box is not None:
+            self.suggestion_box.place_forget()
+    
     def generate_routes(self):
+        self.hide_suggestions()
         start = self.start_entry.get()
         end = self.end_entry.get()
         
@@ -374,88 +548,125 @@ class NavigationInterface:
         self.generate_route_options(start, end)
         
     def generate_route_options(self, start, end):
-        # Clear existing routes
-        for widget in self.routes_frame.winfo_children():
-            widget.destroy()
-        
-        # Calculate base distance
-        base_distance = random.randint(5, 50)  # kilometers
-        
-        # Generate different types of routes
-        route_types = [
-            {
-                'name': '🚗 Driving Route',
-                'type': 'driving',
-                'eco': False,
-                'distance': base_distance,
-                'time': base_distance * 2,  # minutes
-                'co2': base_distance * 0.2,  # kg CO₂
-                'color': '#f44336',
-                'rewards': [],
-                'transfer_info': ''
-            },
-            {
-                'name': '🚌 Bus Route',
-                'type': 'bus',
-                'eco': True,
-                'distance': base_distance * 1.2,
-                'time': base_distance * 3,
-                'co2': base_distance * 0.05,
-                'color': '#2196f3',
-                'rewards': self.generate_eco_rewards(),
-                'transfer_info': self.generate_bus_transfer()
-            },
-            {
-                'name': '🚶 Bus + Walking Route A',
-                'type': 'bus_walking_a',
-                'eco': True,
-                'distance': base_distance,
-                'time': base_distance * 2.5 + 12,  # bus + walking last 1km
-                'co2': base_distance * 0.05 - 0.2,  # CO₂ reduction vs driving
-                'color': '#4caf50',
-                'rewards': self.generate_eco_rewards(),
-                'transfer_info': self.generate_bus_transfer_with_walking(1.0)
-            },
-            {
-                'name': '🚶 Bus + Walking Route B',
-                'type': 'bus_walking_b',
-                'eco': True,
-                'distance': base_distance,
-                'time': base_distance * 2.3 + 18,  # bus + walking last 1.5km
-                'co2': base_distance * 0.05 - 0.3,  # CO₂ reduction vs driving
-                'color': '#4caf50',
-                'rewards': self.generate_eco_rewards(),
-                'transfer_info': self.generate_bus_transfer_with_walking(1.5)
-            },
-            {
-                'name': '🚴 Bus + Cycling Route A',
-                'type': 'bus_cycling_a',
-                'eco': True,
-                'distance': base_distance,
-                'time': base_distance * 2.5 + 12,  # bus + cycling last 3km
-                'co2': base_distance * 0.05 - 0.6,  # CO₂ reduction vs driving
-                'color': '#ff9800',
-                'rewards': self.generate_eco_rewards(),
-                'transfer_info': self.generate_bus_transfer_with_cycling(3.0)
-            },
-            {
-                'name': '🚴 Bus + Cycling Route B',
-                'type': 'bus_cycling_b',
-                'eco': True,
-                'distance': base_distance,
-                'time': base_distance * 2.2 + 20,  # bus + cycling last 5km
-                'co2': base_distance * 0.05 - 1.0,  # CO₂ reduction vs driving
-                'color': '#ff9800',
-                'rewards': self.generate_eco_rewards(),
-                'transfer_info': self.generate_bus_transfer_with_cycling(5.0)
-            }
-        ]
+        # Clear existing routes and cancel a query that is still being planned
+        self.generated_routes = []
+        self.route_list.clear()
+        self.route_worker.cancel()
+        if self.pending_query is not None and self.pending_query['kind'] == 'isochrone':
+            self.isochrone_area.config(text="🗺️ Reachable Area")
+        self.pending_query = None
+        if self.od_matrix is not None:
+            self.od_matrix.record(start, end)
+        
+        cache_key = self.route_cache.make_key(start, end)
+        cached_routes = self.route_cache.get(cache_key)
+        if cached_routes is not None:
+            self.generated_routes = self.reuse_cached_routes(cached_routes)
+            self.route_list.set_routes(self.generated_routes)
+            return
         
-        self.generated_routes = route_types
-        self.route_var = tk.StringVar()
+        # Plan in the background; cards appear as each mode is done, driving first
+        self.route_worker.submit(start, end)
+        self.pending_query = {'kind': 'routes', 'key': cache_key, 'routes': [], 'rewarded': {}}
+        self.routes_area.config(text="🛣️ Available Routes (searching...)")
+        if self.poll_job is None:
+            self.poll_job = self.root.after(ROUTE_POLL_MS, self.poll_routes)
+    
+    def poll_routes(self):
+        """Show route options and reachable areas handed back by the worker thread"""
+        self.poll_job = None
+        query = self.pending_query
+        if query is None:
+            return
+        if query['kind'] == 'isochrone':
+            self.poll_isochrones(query)
+            return
+        
+        for kind, payload in self.route_worker.poll():
+            if kind == 'result':
+                # Roll rewards once per route, not again for every update
+                for route in payload:
+                    if route['eco'] and id(route) not in query['rewarded']:
+                        route['rewards'] = self.generate_eco_rewards()
+                        query['rewarded'][id(route)] = route
+                query['routes'] = payload
+                self.generated_routes = payload
+                self.route_list.update_routes(payload)
+                continue
+            
+            self.pending_query = None
+            self.routes_area.config(text="🛣️ Available Routes")
+            if kind == 'error':
+                messagebox.showwarning("Warning", payload)
+            elif not query['routes']:
+                messagebox.showwarning("Warning", "No route found between these addresses!")
+            elif self.planner.network is not None:
+                # Rough estimates (no road network installed) are not worth caching
+                self.route_cache.put(query['key'], [dict(route, rewards=[]) for route in query['routes']])
+            return
+        
+        self.poll_job = self.root.after(ROUTE_POLL_MS, self.poll_routes)
+    
+    def generate_isochrones(self):
+        """Show how far each eco mode gets from the start address within the time budget"""
+        self.hide_suggestions()
+        start = self.start_entry.get()
+        if start == "Please enter start address..." or not start.strip():
+            messagebox.showwarning("Warning", "Please enter start address!")
+            return
+        
+        self.isochrone_start = start
+        self.request_isochrones()
+    
+    def on_budget_change(self, value):
+        """Time budget slider moved: grow or shrink the reachable area shown"""
+        if self.isochrone_start is not None:
+            self.request_isochrones()
+    
+    def request_isochrones(self):
+        # The worker keeps its searches, so a wider budget only explores the extra minutes
+        minutes = self.budget_var.get()
+        self.route_worker.submit_isochrone(self.isochrone_start, minutes)
+        self.pending_query = {'kind': 'isochrone', 'minutes': minutes}
+        self.isochrone_area.config(text=f"🗺️ Reachable Area in {minutes} min (searching...)")
+        if self.poll_job is None:
+            self.poll_job = self.root.after(ROUTE_POLL_MS, self.poll_routes)
+    
+    def poll_isochrones(self, query):
+        """Show reachable area summaries handed back by the worker thread"""
+        for kind, payload in self.route_worker.poll():
+            if kind == 'result':
+                self.show_isochrones(payload)
+                continue
+            
+            self.pending_query = None
+            self.isochrone_area.config(text=f"🗺️ Reachable Area in {query['minutes']} min")
+            if kind == 'error':
+                self.isochrone_start = None
+                messagebox.showwarning("Warning", payload)
+            return
         
-        for i, route in enumerate(route_types):
-            self.create_route_item(route, i)
+        self.poll_job = self.root.after(ROUTE_POLL_MS, self.poll_routes)
+    
+    def show_isochrones(self, summaries):
+        """One line per eco mode: places reached, area, and the most CO₂ saved compared with driving"""
+        for mode, summary in summaries.items():
+            text = (f"{ISOCHRONE_LABELS[mode]}: {summary['places']} places, {summary['area']:.1f} km², "
+                    f"up to {summary['farthest']:.1f} km away")
+            if summary['co2_saved'] > 0:
+                text += f", saves up to {summary['co2_saved']:.2f} kg CO₂"
+                name = self.planner.network.names[summary['best_node']]
+                if name:
+                    text += f" (to {name})"
+            self.isochrone_labels[mode].config(text=text)
+    
+    def reuse_cached_routes(self, cached_routes):
+        """Copy cached route options and roll fresh rewards for the eco routes"""
+        # Segments are never modified, so they can be shared with the cache
+        return [
+            dict(route, rewards=self.generate_eco_rewards() if route['eco'] else [])
+            for route in cached_routes
+        ]
     
     def generate_eco_rewards(self):
         """Generate eco-friendly route rewards"""
@@ -474,95 +685,19 @@ class NavigationInterface:
         
         return rewards
     
-    def generate_bus_transfer(self):
-        """Generate bus transfer information"""
-        bus_routes = ['R1', 'R2', 'R3', 'R4', 'R5', 'R6', 'R7', 'R8', 'R9', 'R10', 
-                     'R101', 'R102', 'R103', 'R104', 'R105', 'R106', 'R107', 'R108', 'R109', 'R110']
-        
-        # Randomly select 2-4 bus routes
-        transfer_count = random.randint(2, 4)
-        selected_routes = random.sample(bus_routes, transfer_count)
-        
-        return ' -> '.join(selected_routes)
-    
-    def generate_bus_transfer_with_walking(self, final_walk_distance):
-        """Generate bus transfer with walking information"""
-        bus_routes = ['R1', 'R2', 'R3', 'R4', 'R5', 'R6', 'R7', 'R8', 'R9', 'R10', 
-                     'R101', 'R102', 'R103', 'R104', 'R105', 'R106', 'R107', 'R108', 'R109', 'R110']
-        
-        # Randomly select 2-4 bus routes
-        transfer_count = random.randint(2, 4)
-        selected_routes = random.sample(bus_routes, transfer_count)
-        
-        # Randomly select 1-2 transfer points that require walking
-        walk_transfers = random.randint(1, min(2, transfer_count-1))
-        walk_indices = random.sample(range(transfer_count-1), walk_transfers)
-        
-        transfer_parts = []
-        for i, route in enumerate(selected_routes):
-            transfer_parts.append(route)
-            if i in walk_indices:
-                walk_distance = random.uniform(0.2, 0.8)
-                transfer_parts.append(f"(walk {walk_distance:.1f}km)")
-        
-        transfer_text = ' -> '.join(transfer_parts)
-        transfer_text += f" -> walk {final_walk_distance:.1f}km to destination"
-        
-        return transfer_text
-    
-    def generate_bus_transfer_with_cycling(self, final_cycle_distance):
-        """Generate bus transfer with cycling information"""
-        bus_routes = ['R1', 'R2', 'R3', 'R4', 'R5', 'R6', 'R7', 'R8', 'R9', 'R10', 
-                     'R101', 'R102', 'R103', 'R104', 'R105', 'R106', 'R107', 'R108', 'R109', 'R110']
-        
-        # Randomly select 2-4 bus routes
-        transfer_count = random.randint(2, 4)
-        selected_routes = random.sample(bus_routes, transfer_count)
-        
-        # Randomly select 1-2 transfer points that require cycling
-        cycle_transfers = random.randint(1, min(2, transfer_count-1))
-        cycle_indices = random.sample(range(transfer_count-1), cycle_transfers)
-        
-        transfer_parts = []
-        for i, route in enumerate(selected_routes):
-            transfer_parts.append(route)
-            if i in cycle_indices:
-                cycle_distance = random.uniform(0.5, 2.0)
-                transfer_parts.append(f"(cycle {cycle_distance:.1f}km)")
-        
-        transfer_text = ' -> '.join(transfer_parts)
-        transfer_text += f" -> cycle {final_cycle_distance:.1f}km to destination"
-        
-        return transfer_text
-    
     def show_route_popups(self, route):
         """Show popups for each segment of the route"""
         if not route['eco']:
             return
             
-        # Parse transfer info to show popups
-        transfer_info = route['transfer_info']
-        if not transfer_info:
-            return
-            
-        # Split transfer info into segments
-        segments = transfer_info.split(' -> ')
-        
+        segments = route['segments']
         for i, segment in enumerate(segments):
-            if segment.startswith('R'):  # Bus route
-                self.show_bus_popup(segment, i == len(segments) - 1)
-            elif 'walk' in segment.lower():  # Walking segment
-                distance = self.extract_distance(segment)
-                self.show_walking_popup(distance)
-            elif 'cycle' in segment.lower():  # Cycling segment
-                distance = self.extract_distance(segment)
-                self.show_cycling_popup(distance)
-    
-    def extract_distance(self, segment):
-        """Extract distance from segment text"""
-        import re
-        match = re.search(r'(\d+\.?\d*)', segment)
-        return float(match.group(1)) if match else 1.0
+            if segment.mode == 'walking':
+                self.show_walking_popup(segment.distance)
+            elif segment.mode == 'cycling':
+                self.show_cycling_popup(segment.distance)
+            elif segment.mode == 'bus':  # e.g. "R3" or "370 08:05"
+                self.show_bus_popup(segment.line_text(), i == len(segments) - 1)
     
     def show_bus_popup(self, route_number, is_last=False):
         """Show bus route popup"""
@@ -745,141 +880,6 @@ class NavigationInterface:
         )
         complete_button.pack(pady=20)
     
-    def create_route_item(self, route, index):
-        # Route container
-        route_container = tk.Frame(
-            self.routes_frame,
-            bg='white',
-            relief='solid',
-            bd=2
-        )
-        route_container.pack(fill='x', padx=10, pady=5)
-        
-        # If it's an eco-friendly route, add special border
-        if route['eco']:
-            route_container.config(bg='#e8f5e8', relief='solid', bd=3)
-        
-        # Selection button
-        radio_button = tk.Radiobutton(
-            route_container,
-            variable=self.route_var,
-            value=index,
-            bg='white' if not route['eco'] else '#e8f5e8',
-            command=lambda: self.select_route(index)
-        )
-        radio_button.pack(side='left', padx=10, pady=10)
-        
-        # Route info frame
-        info_frame = tk.Frame(route_container, bg='white' if not route['eco'] else '#e8f5e8')
-        info_frame.pack(side='left', fill='x', expand=True, padx=(0, 10), pady=10)
-        
-        # Route name and icon
-        name_frame = tk.Frame(info_frame, bg='white' if not route['eco'] else '#e8f5e8')
-        name_frame.pack(fill='x')
-        
-        name_label = tk.Label(
-            name_frame,
-            text=route['name'],
-            font=("Arial", 14, "bold"),
-            bg='white' if not route['eco'] else '#e8f5e8',
-            fg=route['color']
-        )
-        name_label.pack(side='left')
-        
-        # Eco-friendly label
-        if route['eco']:
-            eco_label = tk.Label(
-                name_frame,
-                text="🌱 Eco Route",
-                font=("Arial", 10, "bold"),
-                bg='#e8f5e8',
-                fg='#2e7d32'
-            )
-            eco_label.pack(side='left', padx=(10, 0))
-        
-        # Route details
-        details_frame = tk.Frame(info_frame, bg='white' if not route['eco'] else '#e8f5e8')
-        details_frame.pack(fill='x', pady=(5, 0))
-        
-        # Distance
-        distance_label = tk.Label(
-            details_frame,
-            text=f"📏 {route['distance']:.1f} km",
-            font=("Arial", 11),
-            bg='white' if not route['eco'] else '#e8f5e8',
-            fg='#1976d2'
-        )
-        distance_label.pack(side='left', padx=(0, 15))
-        
-        # Time
-        time_label = tk.Label(
-            details_frame,
-            text=f"⏱️ {route['time']:.0f} min",
-            font=("Arial", 11),
-            bg='white' if not route['eco'] else '#e8f5e8',
-            fg='#388e3c'
-        )
-        time_label.pack(side='left', padx=(0, 15))
-        
-        # CO₂ emission
-        if route['eco']:
-            # Calculate CO₂ reduction compared to driving
-            driving_co2 = route['distance'] * 0.2  # Driving route CO₂ emission
-            co2_saved = driving_co2 - route['co2']
-            co2_label = tk.Label(
-                details_frame,
-                text=f"🌍 Reduced {co2_saved:.2f} kg CO₂",
-                font=("Arial", 11, "bold"),
-                bg='#e8f5e8',
-                fg='#2e7d32'
-            )
-            co2_label.pack(side='left', padx=(0, 15))
-        else:
-            co2_label = tk.Label(
-                details_frame,
-                text=f"🌍 Emitted {route['co2']:.2f} kg CO₂",
-                font=("Arial", 11),
-                bg='white',
-                fg='#f44336'
-            )
-            co2_label.pack(side='left', padx=(0, 15))
-        
-        # Bus transfer info display
-        if route['transfer_info']:
-            transfer_label = tk.Label(
-                details_frame,
-                text=f"🚌 Transfer: {route['transfer_info']}",
-                font=("Arial", 10),
-                bg='white' if not route['eco'] else '#e8f5e8',
-                fg='#1976d2'
-            )
-            transfer_label.pack(side='left', padx=(15, 0))
-        
-        # Reward display
-        if route['rewards']:
-            rewards_text = "🎁 Rewards: " + ", ".join([reward['name'] for reward in route['rewards']])
-            rewards_label = tk.Label(
-                details_frame,
-                text=rewards_text,
-                font=("Arial", 10, "bold"),
-                bg='white' if not route['eco'] else '#e8f5e8',
-                fg='#e91e63'
-            )
-            rewards_label.pack(side='left', padx=(15, 0))
-        
-        # Select button
-        select_button = tk.Button(
-            route_container,
-            text="✅ Select",
-            font=("Arial", 10, "bold"),
-            bg='#4caf50' if route['eco'] else '#2196f3',
-            fg='white',
-            width=8,
-            height=1,
-            command=lambda: self.select_route(index)
-        )
-        select_button.pack(side='right', padx=10, pady=10)
-    
     def select_route(self, index):
         self.selected_route = self.generated_routes[index]
         self.route_var.set(index)
@@ -891,7 +891,6 @@ class NavigationInterface:
         
         # Update user data
         self.update_user_data()
-        self.update_progress_display()
         
         # Show selection result
         self.show_route_selection()
@@ -900,7 +899,9 @@ class NavigationInterface:
         """Process route rewards"""
         self.user_data['eco_routes_taken'] += 1
         
-        # Process pre-generated rewards
+        # Process pre-generated rewards (and keep them in the ledger)
+        self.profile.record(*[('reward', 0, reward['type'], reward['count'])
+                              for reward in self.selected_route['rewards']])
         for reward in self.selected_route['rewards']:
             if reward['type'] == 'potion':
                 self.user_data['inventory']['potions'] += reward['count']
@@ -912,7 +913,7 @@ class NavigationInterface:
                 self.user_data['inventory']['iron_armor'] += reward['count']
                 self.add_reward_message(f"🛡️ Got {reward['name']} x{reward['count']}!")
         
-        self.save_user_data()
+        self.save_user_data('eco_routes_taken', 'inventory')
     
     def add_reward_message(self, message):
         """Add reward message"""
@@ -922,39 +923,70 @@ class NavigationInterface:
     def update_user_data(self):
         """Update user data"""
         if self.selected_route:
+            saved_grams = 0
             # Update CO₂ reduction
             if self.selected_route['eco']:
-                # Calculate CO₂ reduction compared to driving
-                driving_co2 = self.selected_route['distance'] * 0.2
-                co2_saved = driving_co2 - self.selected_route['co2']
-                self.user_data['total_co2_saved'] += co2_saved
+                # Calculate CO₂ reduction compared to driving (recorded in whole grams)
+                saved = round(co2_saved(self.selected_route['distance'], self.selected_route['co2']) * 1000)
+                if self.profile.record(('trip', saved, None, 0)):
+                    saved_grams = saved
+                    self.save_user_data('total_co2_saved')
             
-            
-            self.save_user_data()
+            # Every chosen route goes into the trip history, eco-friendly or not
+            self.profile.add_trip(self.selected_route['type'], self.selected_route['eco'],
+                                  self.selected_route['distance'], saved_grams)
     
     def update_progress_display(self):
         """Update progress display"""
-        # Update CO₂ reduction display
-        self.co2_label.config(text=f"{self.user_data['total_co2_saved']:.2f} kg CO₂")
+        self.on_profile_change(PROFILE_FIELDS)
+    
+    def on_profile_change(self, fields):
+        """Update the progress labels of fields changed in this or another window"""
+        # Another user logged in on the kiosk
+        if 'user' in fields:
+            self.user_data = self.profile.data
         
+        # Update CO₂ reduction display
+        if 'total_co2_saved' in fields:
+            self.co2_label.config(text=f"{self.user_data['total_co2_saved']:.2f} kg CO₂")
         
         # Update challenge count display
-        self.challenge_label.config(text=f"{self.user_data['game_challenges']} times")
+        if 'game_challenges' in fields:
+            self.challenge_label.config(text=f"{self.user_data['game_challenges']} times")
         
         # Update inventory display
-        self.potion_label.config(text=f"💊 HP Potions: {self.user_data['inventory']['potions']}")
-        self.sword_label.config(text=f"⚔️ Iron Sword: {self.user_data['inventory']['iron_sword']}")
-        self.armor_label.config(text=f"🛡️ Iron Armor: {self.user_data['inventory']['iron_armor']}")
+        if 'inventory' in fields:
+            self.potion_label.config(text=f"💊 HP Potions: {self.user_data['inventory']['potions']}")
+            self.sword_label.config(text=f"⚔️ Iron Sword: {self.user_data['inventory']['iron_sword']}")
+            self.armor_label.config(text=f"🛡️ Iron Armor: {self.user_data['inventory']['iron_armor']}")
+        
+        # Update recent trips display
+        if 'trips' in fields:
+            self.trend_label.config(text=self.trip_trend_text())
+    
+    def trip_trend_text(self):
+        """CO₂ saved today, this week and this month, eco routes this week and a 7-day sparkline"""
+        trips = self.profile.trips
+        days = trips.series('day', 7)
+        week = trips.current('week')
+        month = trips.current('month')
+        most = max(day['co2_saved_g'] for _, day in days) or 1
+        sparkline = ''.join(TREND_BARS[day['co2_saved_g'] * (len(TREND_BARS) - 1) // most] for _, day in days)
+        return (f"Today {days[-1][1]['co2_saved_g'] / 1000:.2f} · Week {week['co2_saved_g'] / 1000:.2f} · "
+                f"Month {month['co2_saved_g'] / 1000:.2f} kg CO₂\n"
+                f"Eco routes this week: {week['eco_trips']} of {week['trips']}\n"
+                f"Last 7 days: {sparkline}")
     
     def exchange_co2(self):
         """Exchange CO₂ reduction for game challenges"""
-        if self.user_data['total_co2_saved'] >= 10:
-            exchange_count = int(self.user_data['total_co2_saved'] // 10)
-            self.user_data['total_co2_saved'] -= exchange_count * 10
+        balance = self.profile.ledger.totals['balance_g']
+        if balance >= CHALLENGE_GRAMS:
+            exchange_count = balance // CHALLENGE_GRAMS
+            if not self.profile.record(('exchange', -exchange_count * CHALLENGE_GRAMS, None, exchange_count)):
+                return
             self.user_data['game_challenges'] += exchange_count
             
-            self.save_user_data()
-            self.update_progress_display()
+            self.save_user_data('total_co2_saved', 'game_challenges')
             
             messagebox.showinfo(
                 "Exchange Successful", 
@@ -991,6 +1023,8 @@ class NavigationInterface:
     
     def clear_inputs(self):
         """Clear inputs"""
+        self.hide_suggestions()
+        
         self.start_entry.delete(0, tk.END)
         self.start_entry.insert(0, "Please enter start address...")
         self.start_entry.config(fg='gray')
@@ -999,9 +1033,15 @@ class NavigationInterface:
         self.end_entry.insert(0, "Please enter end address...")
         self.end_entry.config(fg='gray')
         
-        # Clear route display
-        for widget in self.routes_frame.winfo_children():
-            widget.destroy()
+        # Clear route and reachable area display and stop planning
+        self.route_worker.cancel()
+        self.pending_query = None
+        self.routes_area.config(text="🛣️ Available Routes")
+        self.route_list.clear()
+        self.isochrone_start = None
+        self.isochrone_area.config(text="🗺️ Reachable Area")
+        for mode, label in self.isochrone_labels.items():
+            label.config(text=f"{ISOCHRONE_LABELS[mode]}: -")
         
         self.generated_routes = []
         self.selected_route = None
\ No newline at end of file
@@ -0,0 +1,182 @@
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime
+
+from road_network import DEFAULT_NETWORK_DIR
+from gtfs_feed import DEFAULT_FEED_DIR
+from geocoder import DEFAULT_ADDRESS_FILE
+from route_planner import RoutePlanner, data_fingerprint
+from route_cache import normalize_address
+
+# Query counts per origin/destination pair (next to user_data.json)
+OD_HISTORY_FILE = 'od_history.json'
+
+# Pairs kept warm, and pairs remembered at most
+OD_TOP_PAIRS = 200
+OD_MAX_HISTORY = 5000
+
+# How often the network, timetable and address files are checked for changes (seconds)
+DATA_CHECK_SECONDS = 5
+
+logger = logging.getLogger(__name__)
+
+
+class ODMatrix:
+    """Route options for the most requested trips, planned ahead on a background thread
+
+    Every route query is counted per start/end pair. After start(), a
+    daemon thread plans the top pairs once per departure bucket of the
+    route cache, so the first click for a common trip is a cache hit.
+    Planned routes are put on a queue and stored by poll() on the Tk
+    thread. A pair that fails to plan is logged and skipped.
+
+    The network, timetable and addresses are loaded once by the thread and
+    shared: planner() hands every navigation window its own planner over
+    them, or None while they are still loading. The thread checks the files
+    every DATA_CHECK_SECONDS and loads them again when they change. After
+    every load, poll() empties the cache if its routes were planned on
+    other files, and tells the subscribed windows to take a new planner().
+    """
+
+    def __init__(self, route_cache, top_pairs=OD_TOP_PAIRS, network_dir=DEFAULT_NETWORK_DIR,
+                 feed_dir=DEFAULT_FEED_DIR, address_file=DEFAULT_ADDRESS_FILE):
+        self.route_cache = route_cache
+        self.top_pairs = top_pairs
+        self.data_files = (network_dir, feed_dir, address_file)
+        self.counts = {}                  # normalized (start, end) -> [start, end, queries]
+        self.lock = threading.Lock()      # counts are read by the warming thread
+        self.shared = None                # RoutePlanner over the loaded files, set by the thread
+        self.subscribers = []             # called on the Tk thread after the files were (re)loaded
+        self.results = queue.Queue()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.warmed = 0                   # route options planned ahead so far
+        self.failed = 0                   # pairs that could not be planned
+
+    def planner(self):
+        """A RoutePlanner of its own over the shared network, feed and addresses (None until loaded)
+
+        Never waits for the files to load: subscribe() to be told when they are.
+        """
+        shared = self.shared
+        return shared.share() if shared is not None else None
+
+    def subscribe(self, callback):
+        """Call callback() on the Tk thread after the data files were loaded (take a new planner())"""
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def record(self, start, end):
+        """Count a route query (the latest spelling of an address is kept for planning)"""
+        key = (normalize_address(start), normalize_address(end))
+        with self.lock:
+            entry = self.counts.get(key)
+            if entry is None:
+                self.counts[key] = [start, end, 1]
+            else:
+                entry[0], entry[1] = start, end
+                entry[2] += 1
+
+    def most_requested(self, count=None):
+        """(start, end) of the most requested pairs, most requested first"""
+        with self.lock:
+            entries = sorted(self.counts.values(), key=lambda entry: entry[2], reverse=True)
+        return [(start, end) for start, end, _ in entries[:count or self.top_pairs]]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name='od-matrix', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        planner = None
+        fingerprint = None
+        warmed_bucket = None
+        while not self.stop_event.is_set():
+            try:
+                current = data_fingerprint(*self.data_files)
+                if current != fingerprint:
+                    # Files still being copied fail to load, and are tried again once they change
+                    fingerprint = current
+                    self.shared = RoutePlanner.load(*self.data_files)
+                    planner = self.shared.share()
+                    warmed_bucket = None
+                    self.results.put(('planner', current))
+            except Exception:
+                logger.exception("Loading the network and timetable failed")
+
+            bucket = self.route_cache.departure_bucket()
+            if planner is not None and bucket != warmed_bucket:
+                self.warm(planner)
+                warmed_bucket = bucket
+            self.stop_event.wait(DATA_CHECK_SECONDS)
+
+    def warm(self, planner):
+        """Plan the most requested pairs missing from the cache for the current departure bucket"""
+        # Rough estimates (no road network installed) are not worth planning ahead
+        if planner.network is None:
+            return
+        departure = datetime.now()
+        for start, end in self.most_requested():
+            if self.stop_event.is_set():
+                return
+            key = self.route_cache.make_key(start, end, departure)
+            if key in self.route_cache:
+                continue
+            try:
+                routes = planner.route_options(start, end, departure)
+            except LookupError:
+                continue  # address not found (the window says so when it is asked)
+            except Exception:
+                # Keep warming the other pairs
+                logger.exception("Planning %s -> %s ahead failed", start, end)
+                self.failed += 1
+                continue
+            if routes:
+                self.results.put(('routes', (key, [dict(route, rewards=[]) for route in routes])))
+
+    def poll(self):
+        """Store route options planned by the thread in the cache (call on the Tk thread)"""
+        while True:
+            try:
+                kind, payload = self.results.get_nowait()
+            except queue.Empty:
+                return
+            if kind == 'planner':
+                if payload != self.route_cache.fingerprint:
+                    self.route_cache.clear()
+                    self.route_cache.fingerprint = payload
+                for callback in list(self.subscribers):
+                    callback()
+            else:
+                key, routes = payload
+                self.route_cache.put(key, routes)
+                self.warmed += 1
+
+    def save(self, path=OD_HISTORY_FILE):
+        """Write the query counts (most requested pairs only)"""
+        with self.lock:
+            entries = sorted(self.counts.values(), key=lambda entry: entry[2], reverse=True)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'pairs': entries[:OD_MAX_HISTORY]}, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def load(self, path=OD_HISTORY_FILE):
+        """Read query counts saved by save (nothing happens if the file is missing or broken)"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self.lock:
+            for start, end, queries in data.get('pairs', []):
+                self.counts[(normalize_address(start), normalize_address(end))] = [start, end, queries]
@@ -0,0 +1,275 @@
+import heapq
+
+from emission_model import co2_emitted
+from speed_profiles import TIME_DEPENDENT_MODES, MINUTES_PER_DAY
+
+# Eco travel states of a label; driving is planned on its own (one car, no switching)
+STATES = ('walking', 'bus', 'cycling')
+
+# Mode changes allowed at a node: walk to a stop and board, get off and walk on,
+# or get off and pick up a bike for the rest of the trip (only at a bike share
+# dock, so not at all on networks without docks installed)
+SWITCHES = {
+    'walking': ('bus',),
+    'bus': ('walking', 'cycling'),
+    'cycling': ()
+}
+
+# Average wait when boarding a bus with no departure time (seconds), and limits that keep trips sensible
+BOARDING_SECONDS = 300
+MAX_BOARDINGS = 3
+MAX_WALKING_KM = 2.0
+MAX_CYCLING_KM = 8.0
+
+# Trips more than this much slower than the fastest eco trip are not offered
+MAX_SLOWDOWN = 1.5
+
+# Labels created per search: at most MAX_LABELS, and at most SLOWER_TRIP_LABELS more once
+# the fastest trip has been found; the search then returns the trips it has so far
+MAX_LABELS = 60000
+SLOWER_TRIP_LABELS = 20000
+
+# Epsilon dominance: labels closer than this in every criterion count as equal,
+# which keeps the label sets (and the final menu) small on large graphs
+TIME_SLACK = 180       # seconds
+CO2_SLACK = 0.1        # kg CO₂
+ACTIVE_SLACK = 0.5     # km
+
+
+def dominates(a, b):
+    """Whether criteria tuple a = (seconds, co2, boardings, active km) dominates b"""
+    return (a[0] <= b[0] + TIME_SLACK and a[1] <= b[1] + CO2_SLACK
+            and a[2] <= b[2] and a[3] <= b[3] + ACTIVE_SLACK)
+
+
+def trip_family(route):
+    """Kind of trip an option is (its route type without the Route A, B, ... variant letter)"""
+    base, _, letter = route['type'].rpartition('_')
+    return base if base and len(letter) == 1 else route['type']
+
+
+def non_dominated(route_types):
+    """Route options not dominated on time, CO₂, transfers and active distance
+
+    Options equal in every criterion are kept once (the first one listed).
+    Every kind of trip keeps at least its fastest option, so walking stays
+    on the menu when cycling the same streets beats it.
+    """
+    def criteria(route):
+        return (route['time'], route['co2'], route.get('transfers', 0), route.get('active_distance', 0.0))
+
+    kept = []
+    for route in route_types:
+        mine = criteria(route)
+        if any(criteria(other) == mine for other in kept):
+            continue
+        if any(
+            all(x <= y for x, y in zip(criteria(other), mine)) and criteria(other) != mine
+            for other in route_types
+        ):
+            continue
+        kept.append(route)
+
+    families = {trip_family(route) for route in kept}
+    fastest = {}
+    for route in route_types:
+        family = trip_family(route)
+        if family not in families and (family not in fastest or route['time'] < fastest[family]['time']):
+            fastest[family] = route
+    kept.extend(fastest.values())
+    return [route for route in route_types if any(route is other for other in kept)]
+
+
+class ParetoSearch:
+    """Multi-criteria label-setting search over walking, bus and cycling
+
+    A label is one way of reaching a node in a travel state, with four
+    criteria: travel time, CO₂ emitted, bus boardings and walking/cycling
+    distance. Labels are settled in order of time plus a lower bound on
+    the remaining time (as in A*). A label is dropped as soon as an
+    already settled label at the same node and state, or a complete trip
+    at the target, dominates it. What is left at the target is the
+    Pareto-optimal set of trips.
+    """
+
+    def __init__(self, network):
+        self.network = network
+        # kg CO₂ per metre for every state
+        self.co2_per_m = {state: co2_emitted(state, 1.0) / 1000 for state in STATES}
+        # Nodes a bus leaves from (boarding anywhere else would lead nowhere)
+        bus_times = network.edge_times['bus']
+        self.bus_nodes = {
+            node for node in range(network.node_count)
+            if any(bus_times[e] >= 0 for e in range(network.offsets[node], network.offsets[node + 1]))
+        }
+
+    def lower_bounds(self, source, target):
+        """Per-state lower bound on the remaining seconds to target
+
+        Cycling labels stay on the bike to the end, so the cycling ALT bound
+        holds for them. Walking and bus labels may still switch modes, and a
+        bound for one mode is not a bound for a trip mixing several: they
+        get the straight-line distance at the top speed of any eco mode.
+        """
+        network = self.network
+        index = network.landmark_index
+        if index and 'cycling' in index.landmarks:
+            cycling_heuristic = index.heuristic('cycling', source, target)
+        else:
+            cycling_heuristic = network.straight_line_heuristic('cycling', target)
+        fastest = max(STATES, key=lambda mode: network.max_speed[mode])
+        any_mode_heuristic = network.straight_line_heuristic(fastest, target)
+
+        any_mode = {}
+        cycling = {}
+
+        def bound(node, state):
+            if state == 'cycling':
+                if node not in cycling:
+                    cycling[node] = cycling_heuristic(node)
+                return cycling[node]
+            if node not in any_mode:
+                any_mode[node] = any_mode_heuristic(node)
+            return any_mode[node]
+
+        return bound
+
+    def search(self, source, target, departure=None):
+        """Pareto-optimal eco trips from source to target, fastest first
+
+        Each trip is a dict with time (min), co2 (kg), transfers,
+        active_distance (km), distance (km) and legs, a list of
+        {'mode', 'distance', 'time'} dicts. With a departure (seconds after
+        midnight), bus edges follow the speed profiles and boarding waits
+        half the headway at the time of boarding.
+        """
+        network = self.network
+        offsets, targets, lengths = network.offsets, network.targets, network.lengths
+        edge_times = network.edge_times
+        profiles = network.profiles
+        tables, edge_profiles = profiles.tables, network.edge_profiles
+        co2_per_m = self.co2_per_m
+        bound = self.lower_bounds(source, target)
+        dock_nodes = network.dock_nodes
+        bus_nodes = self.bus_nodes
+        limits = {'walking': MAX_WALKING_KM * 1000, 'bus': float('inf'), 'cycling': MAX_CYCLING_KM * 1000}
+
+        # Cycling labels cannot switch again, so they must reach the target within the
+        # ride limit: drop those whose straight-line distance left is already too far
+        cycling_seconds = network.straight_line_heuristic('cycling', target)
+        metres_per_second = network.max_speed['cycling']
+        cycling_limit = limits['cycling']
+        cycling_left = {}
+
+        # labels[i] = (seconds, co2, boardings, active m, state metres, node, state, parent, edge)
+        labels = []
+        settled = {}            # (node, state) -> criteria of settled labels
+        solutions = []          # label ids that reached the target
+        solution_criteria = []
+        time_limit = float('inf')
+        label_limit = MAX_LABELS
+        heap = []
+        heappush, heappop = heapq.heappush, heapq.heappop
+
+        def add(seconds, co2, boardings, active, state_m, node, state, parent, edge):
+            if state == 'cycling':
+                if node not in cycling_left:
+                    cycling_left[node] = cycling_seconds(node) * metres_per_second
+                if state_m + cycling_left[node] > cycling_limit:
+                    return
+            criteria = (seconds, co2, boardings, active / 1000)
+            for other in settled.get((node, state), ()):
+                if dominates(other, criteria):
+                    return
+            labels.append((seconds, co2, boardings, active, state_m, node, state, parent, edge))
+            heappush(heap, (seconds + bound(node, state), seconds, len(labels) - 1))
+
+        for state in ('walking', 'cycling'):
+            add(0.0, 0.0, 0, 0.0, 0.0, source, state, -1, -1)
+
+        while heap:
+            estimate, _, label_id = heappop(heap)
+            seconds, co2, boardings, active, state_m, node, state, _, _ = labels[label_id]
+            criteria = (seconds, co2, boardings, active / 1000)
+
+            # Prune against trips already found (the bound keeps this exact for time)
+            if estimate > time_limit or len(labels) > label_limit:
+                break
+            lower = (estimate, co2, boardings, active / 1000)
+            if any(dominates(other, lower) for other in solution_criteria):
+                continue
+            bag = settled.setdefault((node, state), [])
+            if any(dominates(other, criteria) for other in bag):
+                continue
+            bag.append(criteria)
+
+            if node == target:
+                if not solutions:
+                    # Labels come out in order of estimate, so this is the fastest trip
+                    time_limit = seconds * MAX_SLOWDOWN + TIME_SLACK
+                    label_limit = min(label_limit, len(labels) + SLOWER_TRIP_LABELS)
+                solutions.append(label_id)
+                solution_criteria.append(criteria)
+                continue
+
+            # Change mode without moving
+            for other in SWITCHES[state]:
+                if other == 'bus':
+                    if boardings < MAX_BOARDINGS and node in bus_nodes:
+                        wait = BOARDING_SECONDS if departure is None else profiles.boarding_seconds(departure + seconds)
+                        add(seconds + wait, co2, boardings + 1, active, 0.0, node, 'bus', label_id, -1)
+                elif state_m > 0 and (other == 'walking' or (dock_nodes is not None and node in dock_nodes)):
+                    # Only get off after riding somewhere
+                    add(seconds, co2, boardings, active, 0.0, node, other, label_id, -1)
+
+            # Move along an edge in the current mode
+            weights = edge_times[state]
+            active_mode = state != 'bus'
+            time_dependent = departure is not None and state in TIME_DEPENDENT_MODES
+            limit = limits[state]
+            for e in range(offsets[node], offsets[node + 1]):
+                w = weights[e]
+                if w < 0:
+                    continue
+                if time_dependent:
+                    w /= tables[edge_profiles[e]][int((departure + seconds) // 60) % MINUTES_PER_DAY]
+                length = lengths[e]
+                if active_mode and state_m + length > limit:
+                    continue
+                add(seconds + w, co2 + length * co2_per_m[state], boardings,
+                    active + length if active_mode else active, state_m + length,
+                    targets[e], state, label_id, e)
+
+        # Labels may reach the target slightly out of order, so filter once more
+        trips = []
+        for label_id in sorted(solutions, key=lambda label_id: labels[label_id][0]):
+            criteria = labels[label_id][:3] + (labels[label_id][3] / 1000,)
+            if not any(dominates(other, criteria) for other, _ in trips):
+                trips.append((criteria, label_id))
+        return [self.build_trip(labels, label_id) for _, label_id in trips]
+
+    def build_trip(self, labels, label_id):
+        """Follow parent pointers back and group edges into legs"""
+        lengths = self.network.lengths
+        seconds, co2, boardings, active = labels[label_id][:4]
+        legs = []
+        while label_id >= 0:
+            end_seconds, state, parent, edge = labels[label_id][0], labels[label_id][6], labels[label_id][7], labels[label_id][8]
+            if edge >= 0:
+                start_seconds = labels[parent][0]
+                if legs and legs[-1]['mode'] == state:
+                    legs[-1]['distance'] += lengths[edge] / 1000
+                    legs[-1]['time'] += (end_seconds - start_seconds) / 60
+                else:
+                    legs.append({'mode': state, 'distance': lengths[edge] / 1000,
+                                 'time': (end_seconds - start_seconds) / 60})
+            label_id = parent
+        legs.reverse()
+        return {
+            'time': seconds / 60,
+            'co2': co2,
+            'transfers': max(boardings - 1, 0),
+            'active_distance': active / 1000,
+            'distance': sum(leg['distance'] for leg in legs),
+            'legs': legs
+        }
@@ -0,0 +1,146 @@
+import json
+import sys
+import time
+
+from user_store import UserStore, USER_DB_FILE, unflatten
+
+# Version of the profile layout the windows use (stored in the profile as schema_version)
+SCHEMA_VERSION = 3
+
+# Profiles written per transaction by the bulk migrators
+MIGRATE_CHUNK = 1000
+
+
+def upgrade_1(data):
+    """Navigation window layout: no calories and no dragon hero yet"""
+    data.setdefault('total_calories', 0.0)
+
+
+def upgrade_2(data):
+    """Dragon window layout: the hero kept a second inventory, merged into the top-level one
+
+    A new game copied the top-level items into the hero's inventory, so the
+    same items were usually held in both: each item keeps the larger count.
+    """
+    player = data.get('player')
+    if not isinstance(player, dict) or not isinstance(player.get('inventory'), dict):
+        return
+    inventory = data.setdefault('inventory', {})
+    for item, count in player.pop('inventory').items():
+        inventory[item] = max(inventory.get(item, 0), count)
+
+
+# Upgrade from each version to the next, applied in order
+UPGRADES = {
+    1: upgrade_1,
+    2: upgrade_2
+}
+
+
+def profile_version(data):
+    """Schema version of a profile (profiles saved before versioning are told apart by their fields)"""
+    if 'schema_version' in data:
+        return data['schema_version']
+    if 'player' in data or 'total_calories' in data:
+        return 2
+    return 1
+
+
+def upgrade(data):
+    """Bring a profile up to SCHEMA_VERSION in place; returns whether anything was upgraded
+
+    Profiles are upgraded lazily as they are loaded; the new version is
+    stored along with the next save.
+    """
+    version = profile_version(data)
+    if version > SCHEMA_VERSION:
+        raise ValueError(f"Profile schema version {version} is newer than this app ({SCHEMA_VERSION})")
+    if version == SCHEMA_VERSION:
+        return False
+    while version < SCHEMA_VERSION:
+        UPGRADES[version](data)
+        version += 1
+    data['schema_version'] = SCHEMA_VERSION
+    return True
+
+
+def stored_profiles(connection, chunk=MIGRATE_CHUNK):
+    """(user, {field name: value}) of every stored profile, in user order
+
+    Reads chunk users at a time, continuing after the last user read, so
+    memory stays constant and profiles rewritten meanwhile are not read again.
+    """
+    last = ''
+    while True:
+        rows = connection.execute(
+            'SELECT user_id, name, value FROM profile_fields WHERE user_id IN'
+            ' (SELECT DISTINCT user_id FROM profile_fields WHERE user_id > ? ORDER BY user_id LIMIT ?)'
+            ' ORDER BY user_id', (last, chunk)).fetchall()
+        if not rows:
+            return
+        user, fields = rows[0][0], {}
+        for row_user, name, value in rows:
+            if row_user != user:
+                yield user, fields
+                user, fields = row_user, {}
+            fields[name] = value
+        yield user, fields
+        last = user
+
+
+def migrate_database(store, chunk=MIGRATE_CHUNK):
+    """Upgrade every profile in a UserStore; returns (profiles read, profiles upgraded)"""
+    read = upgraded = 0
+    pending = []
+    for user, fields in stored_profiles(store.connection, chunk):
+        read += 1
+        data = unflatten(fields)
+        if upgrade(data):
+            pending.append((user, data))
+        if len(pending) >= chunk:
+            store.save_many(pending)
+            upgraded += len(pending)
+            pending = []
+    store.save_many(pending)
+    return read, upgraded + len(pending)
+
+
+def import_jsonl(store, path, chunk=MIGRATE_CHUNK):
+    """Import and upgrade profiles from a JSON Lines file of {"user_id": ..., "profile": {...}}
+
+    The file is read one line at a time; returns how many profiles were imported.
+    """
+    imported = 0
+    pending = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            data = record['profile']
+            upgrade(data)
+            pending.append((record['user_id'], data))
+            if len(pending) >= chunk:
+                store.save_many(pending)
+                imported += len(pending)
+                pending = []
+    store.save_many(pending)
+    return imported + len(pending)
+
+
+if __name__ == '__main__':
+    # python profile_schema.py migrate [database] | import profiles.jsonl [database]
+    command = sys.argv[1] if len(sys.argv) > 1 else 'migrate'
+    start = time.perf_counter()
+    if command == 'migrate':
+        store = UserStore(sys.argv[2] if len(sys.argv) > 2 else USER_DB_FILE)
+        read, upgraded = migrate_database(store)
+        print(f"Upgraded {upgraded} of {read} profiles to schema version {SCHEMA_VERSION} "
+              f"in {time.perf_counter() - start:.1f} s")
+    elif command == 'import' and len(sys.argv) > 2:
+        store = UserStore(sys.argv[3] if len(sys.argv) > 3 else USER_DB_FILE)
+        imported = import_jsonl(store, sys.argv[2])
+        print(f"Imported {imported} profiles from {sys.argv[2]} in {time.perf_counter() - start:.1f} s")
+    else:
+        sys.exit("Usage: python profile_schema.py migrate [database] | import profiles.jsonl [database]")
+    store.close()
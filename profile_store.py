@@ -0,0 +1,196 @@
+import sqlite3
+from collections import OrderedDict
+
+from user_store import UserStore, SaveScheduler, DEFAULT_USER
+from co2_ledger import CO2Ledger, create_tables
+from trip_history import TripHistory, create_tables as create_trip_tables
+from leaderboard import Leaderboard, SCORE_FIELDS
+from profile_schema import SCHEMA_VERSION, upgrade
+
+# Profile of a new user ('player' holds the dragon hero once it has been saved)
+DEFAULT_PROFILE = {
+    'total_co2_saved': 0.0,  # Total CO₂ reduction (kg CO₂)
+    'total_calories': 0.0,
+    'game_challenges': 0,    # Game challenge count
+    'inventory': {           # Inventory items, shared by route rewards and the dragon hero
+        'potions': 0,        # HP potions
+        'iron_sword': 0,     # Iron sword
+        'iron_armor': 0      # Iron armor
+    },
+    'eco_routes_taken': 0,   # Eco-friendly routes taken
+    'schema_version': SCHEMA_VERSION
+}
+
+# Top-level fields a window may show (passed to subscribers to redraw everything);
+# 'trips' stands for the trip history, which lives outside the profile data
+PROFILE_FIELDS = frozenset(DEFAULT_PROFILE) | {'player', 'trips'}
+
+# Profiles kept in memory, so users taking turns at a shared kiosk switch instantly
+HOT_PROFILES = 8
+
+
+def default_profile():
+    return {key: dict(value) if isinstance(value, dict) else value for key, value in DEFAULT_PROFILE.items()}
+
+
+class ProfileStore:
+    """The current user's profile, loaded once and shared by every window of the process
+
+    Windows change data in place and then call changed() with the top-level
+    fields they touched. Every subscriber is called with that set, so a
+    window only redraws the labels of those fields, and one write-behind
+    save is scheduled for all of them.
+
+    switch_user() writes the current profile and makes another user's the
+    current one; subscribers then get 'user' among the fields and must pick
+    up the new data dict. The last hot_profiles profiles stay in memory.
+
+    CO₂ savings, rewards and exchanges go through record() into the user's
+    ledger (see CO2Ledger); total_co2_saved is kept equal to its balance.
+    Chosen routes go through add_trip() into the user's TripHistory. Both
+    are written by the same write-behind save as the profile fields, in
+    one transaction, so picking a route costs no extra disk sync.
+    ranking() is the Leaderboard of every user, moved by changed().
+    """
+
+    def __init__(self, user_store, root, user=DEFAULT_USER, hot_profiles=HOT_PROFILES):
+        self.user_store = user_store
+        self.hot_profiles = hot_profiles
+        self.hot = OrderedDict()      # user -> (profile data, CO2Ledger, TripHistory), most recently used last
+        create_tables(user_store.connection)
+        create_trip_tables(user_store.connection)
+        self.user = user
+        self.data, self.ledger, self.trips = self.load(user)
+        self.subscribers = []
+        self.save_scheduler = SaveScheduler(root, self.write)
+        self.on_error = None      # called with the exception when a save fails
+        self.leaderboard = None   # built by the first ranking()
+
+    @classmethod
+    def open(cls, root, user=DEFAULT_USER):
+        """Profile from the default database (for a window opened on its own)"""
+        return cls(UserStore.open(), root, user)
+
+    def load(self, user):
+        """(profile, ledger, trip history) of a user from memory, or the database (a new profile if there is none)"""
+        entry = self.hot.pop(user, None)
+        if entry is None:
+            data = self.read(user)
+            entry = (data, self.open_ledger(user, data), TripHistory(self.user_store.connection, user))
+        self.hot[user] = entry
+        if len(self.hot) > self.hot_profiles:
+            self.hot.popitem(last=False)
+        return entry
+
+    def open_ledger(self, user, data):
+        ledger = CO2Ledger(self.user_store.connection, user)
+        if not len(ledger) and data['total_co2_saved']:
+            # Balance saved before there was a ledger (a float in kg)
+            ledger.record('opening', round(data['total_co2_saved'] * 1000))
+        data['total_co2_saved'] = ledger.balance_kg()
+        return ledger
+
+    def read(self, user):
+        """Profile of a user, upgraded to SCHEMA_VERSION (a new profile if none is stored)
+
+        Raises sqlite3.Error if the profile cannot be read and ValueError if
+        it was saved by a newer version: falling back to a new profile would
+        overwrite the stored one with the next save.
+        """
+        data = self.user_store.load(user)
+        if data is None:
+            return default_profile()
+        # Profiles saved by earlier versions are upgraded here, and stored with the next save
+        upgrade(data)
+        for key, value in DEFAULT_PROFILE.items():
+            if key not in data:
+                data[key] = dict(value) if isinstance(value, dict) else value
+        return data
+
+    def subscribe(self, callback):
+        """Call callback(fields) after every change (fields is a set of top-level keys)"""
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def switch_user(self, user):
+        """Save the current profile and make user's profile the current one
+
+        Raises like read() if user's profile cannot be loaded; the current
+        user then stays logged in.
+        """
+        if user == self.user:
+            return
+        self.flush()
+        entry = self.load(user)
+        self.user = user
+        self.data, self.ledger, self.trips = entry
+        for callback in list(self.subscribers):
+            callback(PROFILE_FIELDS | {'user'})
+
+    def record(self, *events):
+        """Append (kind, grams, item, count) events to the user's ledger; False if that failed
+
+        The events are written with the next save. Call
+        changed('total_co2_saved') afterwards when grams were moved.
+        """
+        if not events:
+            return True
+        try:
+            self.ledger.stage(events)
+        except ValueError as e:
+            if self.on_error is None:
+                raise
+            self.on_error(e)
+            return False
+        self.data['total_co2_saved'] = self.ledger.balance_kg()
+        self.save_scheduler.request()
+        return True
+
+    def add_trip(self, route_type, eco, distance_km, co2_saved_g):
+        """Add a chosen route to the user's trip history (written with the next save) and tell subscribers ('trips')"""
+        self.trips.add(route_type, eco, distance_km, co2_saved_g)
+        self.save_scheduler.request()
+        for callback in list(self.subscribers):
+            callback({'trips'})
+
+    def ranking(self):
+        """Leaderboard of every user (read from the database the first time)"""
+        if self.leaderboard is None:
+            self.leaderboard = Leaderboard.load(self.user_store.connection)
+            # Profiles in memory may have changes not written yet
+            for user, (data, ledger, _) in self.hot.items():
+                self.leaderboard.update(user, data, ledger)
+        return self.leaderboard
+
+    def changed(self, *fields):
+        """Tell subscribers which fields changed and schedule a save"""
+        self.save_scheduler.request()
+        fields = set(fields)
+        if self.leaderboard is not None and not SCORE_FIELDS.isdisjoint(fields):
+            self.leaderboard.update(self.user, self.data, self.ledger)
+        for callback in list(self.subscribers):
+            callback(fields)
+
+    def flush(self):
+        """Write a pending save now (call before exiting)"""
+        self.save_scheduler.flush()
+
+    def write(self):
+        """Write the profile, and the ledger events and trips added since the last write, in one transaction"""
+        try:
+            with self.user_store.connection:
+                fields, _ = self.user_store.write_fields(self.user, self.data)
+                self.ledger.write_pending()
+                self.trips.write_pending()
+        except (sqlite3.Error, ValueError) as e:
+            # Nothing was written; the ledger events and trips stay pending for the next save
+            if self.on_error is None:
+                raise
+            self.on_error(e)
+            return
+        self.user_store.remember(self.user, fields)
+        self.ledger.clear_pending()
+        self.trips.clear_pending()
@@ -0,0 +1,202 @@
+from gtfs_feed import ALL_DAYS
+
+INFINITY = 2 ** 31 - 1
+
+# Rounds = maximum number of vehicles in one journey
+MAX_ROUNDS = 5
+
+
+class RaptorPlanner:
+    """Round-based public transit routing (RAPTOR) over a TransitFeed
+
+    Round k finds the earliest arrival at every stop using at most k trips.
+    Each round scans only the patterns serving stops improved in the
+    previous round, then relaxes footpaths from the newly improved stops.
+    Footpaths are relaxed from the access stops too, so the first trip can
+    be boarded at a stop a short walk away from one of them.
+    """
+
+    def __init__(self, feed):
+        self.feed = feed
+
+    def earliest_trip(self, pattern, position, time, day_mask):
+        """First trip of a pattern departing from position at or after time (None if none)"""
+        feed = self.feed
+        first_trip = feed.pattern_trip_offsets[pattern]
+        trip_count = feed.pattern_trip_offsets[pattern + 1] - first_trip
+        stop_count = feed.pattern_stop_offsets[pattern + 1] - feed.pattern_stop_offsets[pattern]
+        base = feed.pattern_time_offsets[pattern] + position
+        departures = feed.departures
+
+        # Binary search over the trip-major block (trips are sorted by departure)
+        low, high = 0, trip_count
+        while low < high:
+            middle = (low + high) // 2
+            if departures[base + middle * stop_count] < time:
+                low = middle + 1
+            else:
+                high = middle
+        while low < trip_count and not feed.trip_days[first_trip + low] & day_mask:
+            low += 1
+        return low if low < trip_count else None
+
+    def plan(self, access, egress, departure, weekday=None, max_rounds=MAX_ROUNDS):
+        """Journeys from access stops to egress stops
+
+        access and egress map stop -> seconds needed to walk/ride between
+        the stop and the trip origin/destination. Returns the Pareto set of
+        journeys over (arrival time, number of trips), fastest first.
+        """
+        feed = self.feed
+        day_mask = ALL_DAYS if weekday is None else 1 << weekday
+        stop_count = feed.stop_count
+
+        best = [INFINITY] * stop_count                  # best arrival over all rounds
+        labels = [[INFINITY] * stop_count]              # labels[k][stop]
+        parents = [[None] * stop_count]                 # how labels[k][stop] was reached
+        marked = set()
+        for stop, seconds in access.items():
+            arrival = departure + seconds
+            if arrival < labels[0][stop]:
+                labels[0][stop] = best[stop] = arrival
+                parents[0][stop] = ('access', seconds)
+                marked.add(stop)
+        self.relax_footpaths(labels[0], parents[0], best, marked, INFINITY)
+
+        target_best = INFINITY
+        journeys = []
+
+        # Local names for the hot loops below
+        stop_pattern_offsets = feed.stop_pattern_offsets
+        stop_patterns, stop_positions = feed.stop_patterns, feed.stop_positions
+        pattern_stop_offsets, pattern_stops = feed.pattern_stop_offsets, feed.pattern_stops
+        pattern_time_offsets = feed.pattern_time_offsets
+        arrivals, departures = feed.arrivals, feed.departures
+
+        for k in range(1, max_rounds + 1):
+            previous = labels[k - 1]
+            current = list(previous)
+            parent = [None] * stop_count
+            labels.append(current)
+            parents.append(parent)
+
+            # Collect patterns to scan, starting from their earliest marked stop
+            queue = {}
+            for stop in marked:
+                for i in range(stop_pattern_offsets[stop], stop_pattern_offsets[stop + 1]):
+                    pattern = stop_patterns[i]
+                    position = stop_positions[i]
+                    if position < queue.get(pattern, INFINITY):
+                        queue[pattern] = position
+            marked = set()
+
+            # Scan each pattern once
+            for pattern, start in queue.items():
+                stop_start = pattern_stop_offsets[pattern]
+                stop_total = pattern_stop_offsets[pattern + 1] - stop_start
+                time_base = pattern_time_offsets[pattern]
+                trip = None
+                trip_base = 0
+                board_position = 0
+                for position in range(start, stop_total):
+                    stop = pattern_stops[stop_start + position]
+                    if trip is not None:
+                        arrival = arrivals[trip_base + position]
+                        if arrival < best[stop] and arrival < target_best:
+                            current[stop] = best[stop] = arrival
+                            parent[stop] = ('ride', pattern, trip, board_position, position)
+                            marked.add(stop)
+                    # Catch an earlier trip if the previous round reached this stop sooner
+                    reached = previous[stop]
+                    if reached < INFINITY and (trip is None or reached <= departures[trip_base + position]):
+                        earlier = self.earliest_trip(pattern, position, reached, day_mask)
+                        if earlier is not None and (trip is None or earlier < trip):
+                            trip = earlier
+                            trip_base = time_base + trip * stop_total
+                            board_position = position
+
+            # Footpaths from stops improved by this round
+            self.relax_footpaths(current, parent, best, marked, target_best)
+
+            # Best way to leave the network after k trips
+            round_best, round_stop = INFINITY, None
+            for stop, seconds in egress.items():
+                if current[stop] < INFINITY and current[stop] + seconds < round_best:
+                    round_best, round_stop = current[stop] + seconds, stop
+            if round_stop is not None and round_best < target_best:
+                target_best = round_best
+                journeys.append(self.build_journey(labels, parents, k, round_stop, egress[round_stop], departure))
+
+            if not marked:
+                break
+
+        journeys.reverse()
+        return journeys
+
+    def relax_footpaths(self, labels, parents, best, marked, limit):
+        """Walk from the marked stops to their neighbours, marking the ones reached sooner (before limit)"""
+        feed = self.feed
+        transfer_offsets = feed.transfer_offsets
+        transfer_targets, transfer_times = feed.transfer_targets, feed.transfer_times
+        for stop in list(marked):
+            for i in range(transfer_offsets[stop], transfer_offsets[stop + 1]):
+                other = transfer_targets[i]
+                arrival = labels[stop] + transfer_times[i]
+                if arrival < min(best[other], limit):
+                    labels[other] = best[other] = arrival
+                    parents[other] = ('walk', stop, transfer_times[i])
+                    marked.add(other)
+
+    def build_journey(self, labels, parents, k, stop, egress_seconds, departure):
+        """Follow parent pointers back from stop in round k"""
+        feed = self.feed
+        legs = []
+        while True:
+            parent = parents[k][stop]
+            if parent is None:
+                # Label was carried over from the previous round
+                k -= 1
+                continue
+            if parent[0] == 'access':
+                access_seconds = parent[1]
+                break
+            if parent[0] == 'walk':
+                _, origin, seconds = parent
+                legs.append({
+                    'type': 'walk',
+                    'from_stop': origin,
+                    'to_stop': stop,
+                    'distance': feed.stop_distance(origin, stop),
+                    'departure': labels[k][origin],
+                    'arrival': labels[k][origin] + seconds
+                })
+                stop = origin
+                continue
+
+            _, pattern, trip, board, alight = parent
+            stop_start = feed.pattern_stop_offsets[pattern]
+            stop_total = feed.pattern_stop_offsets[pattern + 1] - stop_start
+            time_base = feed.pattern_time_offsets[pattern] + trip * stop_total
+            board_stop = feed.pattern_stops[stop_start + board]
+            legs.append({
+                'type': 'bus',
+                'route': feed.route_names[feed.pattern_route[pattern]],
+                'from_stop': board_stop,
+                'to_stop': stop,
+                'distance': feed.pattern_distance(pattern, board, alight),
+                'departure': feed.departures[time_base + board],
+                'arrival': feed.arrivals[time_base + alight]
+            })
+            stop = board_stop
+            k -= 1
+
+        legs.reverse()
+        arrival = legs[-1]['arrival'] + egress_seconds if legs else departure + access_seconds + egress_seconds
+        return {
+            'departure': departure,
+            'arrival': arrival,
+            'access_seconds': access_seconds,
+            'egress_seconds': egress_seconds,
+            'legs': legs,
+            'trips': sum(1 for leg in legs if leg['type'] == 'bus')
+        }
@@ -0,0 +1,348 @@
+import csv
+import heapq
+import math
+import os
+import threading
+from array import array
+from collections import OrderedDict
+
+from landmark_index import LandmarkIndex, index_path, network_fingerprint
+from spatial_index import GridIndex
+from speed_profiles import SpeedProfiles, TIME_DEPENDENT_MODES, MINUTES_PER_DAY
+
+# Travel modes supported by the road network
+MODES = ('driving', 'bus', 'walking', 'cycling')
+
+# Default network location (nodes.csv + edges.csv)
+DEFAULT_NETWORK_DIR = 'network'
+
+# Optional bike share docks next to the network (columns name, lat, lon)
+BIKE_DOCK_FILE = 'bike_docks.csv'
+
+# Recent point-to-point answers kept per network (repeated kiosk queries)
+PATH_CACHE_SIZE = 256
+
+# Departures within the same slot (seconds) share cached time-dependent paths
+DEPARTURE_SLOT = 300
+
+# Speeds used when an edge row leaves a mode column empty (km/h, 0 = not allowed);
+# also the average speeds of the emission model
+DEFAULT_SPEEDS = {
+    'driving': 40.0,
+    'bus': 25.0,
+    'walking': 5.0,
+    'cycling': 15.0
+}
+
+EARTH_RADIUS_M = 6371000.0
+
+
+def normalize_name(text):
+    """Normalize a place name for lookups"""
+    return ' '.join(text.casefold().split())
+
+
+class RoadNetwork:
+    """Road network stored as compressed (CSR) adjacency arrays
+
+    Nodes are numbered 0..n-1. The outgoing edges of node u are
+    offsets[u]..offsets[u+1]-1, and every mode has its own array of edge
+    travel times in seconds (-1 means the mode may not use the edge).
+    These are free-flow times; for a departure time, driving and bus
+    times are divided by the speed factor of the edge's profile (one byte
+    per edge indexing the shared SpeedProfiles tables).
+    """
+
+    def __init__(self, node_ids, lat, lon, names, sources, targets, lengths, mode_times,
+                 edge_profiles=None, profiles=None):
+        self.node_ids = node_ids        # internal index -> id from nodes.csv
+        self.lat = lat                  # radians
+        self.lon = lon                  # radians
+        self.names = names              # internal index -> display name ('' if unnamed)
+        self.node_index = {node_id: i for i, node_id in enumerate(node_ids)}
+        self.directory = None
+        self.landmark_index = None      # optional ALT index, see landmark_index.py
+        self.node_grid = None           # GridIndex over the nodes, built on first use
+        self.bike_docks = None          # GridIndex over bike share docks, if installed
+        self.dock_nodes = None          # set of nodes nearest to a dock, if installed
+        self.path_cache = OrderedDict()
+        self.path_cache_lock = threading.Lock()   # planners on several threads share a network
+
+        # Build CSR adjacency sorted by source node
+        node_count = len(node_ids)
+        order = sorted(range(len(sources)), key=sources.__getitem__)
+        self.offsets = array('i', [0]) * (node_count + 1)
+        for s in sources:
+            self.offsets[s + 1] += 1
+        for i in range(node_count):
+            self.offsets[i + 1] += self.offsets[i]
+        self.targets = array('i', (targets[e] for e in order))
+        self.lengths = array('f', (lengths[e] for e in order))
+        self.edge_times = {
+            mode: array('f', (times[e] for e in order))
+            for mode, times in mode_times.items()
+        }
+        self.profiles = profiles or SpeedProfiles()
+        if edge_profiles is None:
+            default = self.profiles.profile_index(None)
+            self.edge_profiles = array('B', [default]) * len(order)
+        else:
+            self.edge_profiles = array('B', (edge_profiles[e] for e in order))
+
+        # Fastest speed per mode (m/s) keeps the A* heuristic admissible
+        self.max_speed = {}
+        for mode in MODES:
+            best = 0.0
+            for length, seconds in zip(self.lengths, self.edge_times[mode]):
+                if seconds > 0 and length / seconds > best:
+                    best = length / seconds
+            self.max_speed[mode] = best or DEFAULT_SPEEDS[mode] / 3.6
+
+        # Name lookup (first node wins for duplicate names)
+        self.name_index = {}
+        for i, name in enumerate(names):
+            if name:
+                self.name_index.setdefault(normalize_name(name), i)
+
+    @property
+    def node_count(self):
+        return len(self.node_ids)
+
+    @property
+    def edge_count(self):
+        return len(self.targets)
+
+    @classmethod
+    def load(cls, directory=DEFAULT_NETWORK_DIR):
+        """Load nodes.csv and edges.csv from a network directory
+
+        nodes.csv columns: id, lat, lon[, name]
+        edges.csv columns: source, target, length_m[, oneway][, <mode>_kmh ...][, profile]
+        """
+        profiles = SpeedProfiles.load(directory)
+        node_ids = []
+        lat = array('d')
+        lon = array('d')
+        names = []
+        with open(os.path.join(directory, 'nodes.csv'), newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                node_ids.append(row['id'])
+                lat.append(math.radians(float(row['lat'])))
+                lon.append(math.radians(float(row['lon'])))
+                names.append((row.get('name') or '').strip())
+
+        node_index = {node_id: i for i, node_id in enumerate(node_ids)}
+        sources = array('i')
+        targets = array('i')
+        lengths = array('f')
+        mode_times = {mode: array('f') for mode in MODES}
+        edge_profiles = array('B')
+
+        with open(os.path.join(directory, 'edges.csv'), newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            col = {name: i for i, name in enumerate(header)}
+            source_col, target_col, length_col = col['source'], col['target'], col['length_m']
+            oneway_col = col.get('oneway')
+            profile_col = col.get('profile')
+            default_profile = profiles.profile_index(None)
+            speed_cols = [(col.get(f'{mode}_kmh'), DEFAULT_SPEEDS[mode], mode_times[mode]) for mode in MODES]
+
+            for row in reader:
+                u = node_index[row[source_col]]
+                v = node_index[row[target_col]]
+                length = float(row[length_col])
+                both_ways = oneway_col is None or row[oneway_col].strip() not in ('1', 'true', 'yes')
+
+                profile = profiles.profile_index(row[profile_col]) if profile_col is not None else default_profile
+
+                sources.append(u)
+                targets.append(v)
+                lengths.append(length)
+                edge_profiles.append(profile)
+                if both_ways:
+                    sources.append(v)
+                    targets.append(u)
+                    lengths.append(length)
+                    edge_profiles.append(profile)
+                for speed_col, default_speed, times in speed_cols:
+                    speed = float(row[speed_col]) if speed_col is not None and row[speed_col] else default_speed
+                    seconds = length * 3.6 / speed if speed > 0 else -1.0
+                    times.append(seconds)
+                    if both_ways:
+                        times.append(seconds)
+
+        network = cls(node_ids, lat, lon, names, sources, targets, lengths, mode_times,
+                      edge_profiles, profiles)
+        network.directory = directory
+        return network
+
+    def load_landmark_index(self):
+        """Attach the preprocessed landmark index saved next to the network, if any
+
+        An index built before the edges or speeds changed would give wrong
+        bounds, so it is rebuilt and saved again.
+        """
+        path = index_path(self.directory)
+        if os.path.exists(path):
+            self.landmark_index = LandmarkIndex.load(path, network_fingerprint(self))
+            if self.landmark_index is None:
+                self.landmark_index = LandmarkIndex.build(self)
+                self.landmark_index.save(path)
+        return self.landmark_index is not None
+
+    def load_bike_docks(self):
+        """Attach the bike share docks listed next to the network, if any"""
+        path = os.path.join(self.directory, BIKE_DOCK_FILE)
+        if os.path.exists(path):
+            self.bike_docks = GridIndex.load_csv(path)
+            self.dock_nodes = {
+                self.nearest_node(self.bike_docks.lat[dock], self.bike_docks.lon[dock])
+                for dock in range(len(self.bike_docks))
+            }
+        return self.bike_docks is not None
+
+    def find_node(self, text):
+        """Resolve a place name or "lat, lon" text to a node index (None if unknown)"""
+        key = normalize_name(text)
+        if key in self.name_index:
+            return self.name_index[key]
+
+        parts = key.replace(';', ',').split(',')
+        if len(parts) == 2:
+            try:
+                return self.nearest_node(float(parts[0]), float(parts[1]))
+            except ValueError:
+                pass
+        return None
+
+    def node_location(self, node):
+        """(lat, lon) of a node in degrees"""
+        return math.degrees(self.lat[node]), math.degrees(self.lon[node])
+
+    def nearest_node(self, lat_deg, lon_deg):
+        """Closest node to a coordinate given in degrees"""
+        if self.node_grid is None:
+            self.node_grid = GridIndex(map(math.degrees, self.lat), map(math.degrees, self.lon))
+        nearest = self.node_grid.nearest(lat_deg, lon_deg)
+        return nearest[0][0] if nearest else None
+
+    def shortest_path(self, source, target, mode, use_index=True, departure=None):
+        """A* search from source to target for one travel mode
+
+        Uses the landmark index as heuristic when one is loaded, otherwise
+        straight-line distance, and answers repeated queries from a small LRU
+        of recent paths. With a departure (seconds after midnight), driving
+        and bus follow the speed profiles, giving the earliest arrival.
+        Returns a dict with the node list, distance (km) and time (min), or
+        None if the target cannot be reached.
+        """
+        if source == target:
+            return {'nodes': [source], 'edges': [], 'distance': 0.0, 'time': 0.0}
+
+        if departure is not None and mode not in TIME_DEPENDENT_MODES:
+            departure = None
+        slot = None if departure is None else int(departure // DEPARTURE_SLOT)
+        key = (source, target, mode, slot)
+        if use_index:
+            with self.path_cache_lock:
+                if key in self.path_cache:
+                    self.path_cache.move_to_end(key)
+                    return self.path_cache[key]
+
+        path = self.search(source, target, mode, use_index, departure)
+        if use_index:
+            with self.path_cache_lock:
+                self.path_cache[key] = path
+                if len(self.path_cache) > PATH_CACHE_SIZE:
+                    self.path_cache.popitem(last=False)
+        return path
+
+    def search(self, source, target, mode, use_index=True, departure=None):
+        """Run the A* search behind shortest_path (no caching)
+
+        Free-flow times bound the time-dependent ones from below, so the
+        heuristics stay admissible.
+        """
+        weights = self.edge_times[mode]
+        offsets = self.offsets
+        targets = self.targets
+        time_dependent = departure is not None and mode in TIME_DEPENDENT_MODES
+        tables = self.profiles.tables
+        edge_profiles = self.edge_profiles
+        if use_index and self.landmark_index and mode in self.landmark_index.landmarks:
+            heuristic = self.landmark_index.heuristic(mode, source, target)
+        else:
+            heuristic = self.straight_line_heuristic(mode, target)
+
+        dist = {source: 0.0}
+        parent = {source: -1}
+        parent_edge = {}
+        closed = set()
+        heap = [(heuristic(source), 0.0, source)]
+        heappush, heappop = heapq.heappush, heapq.heappop
+
+        while heap:
+            _, g, u = heappop(heap)
+            if u == target:
+                break
+            if u in closed:
+                continue
+            closed.add(u)
+            for e in range(offsets[u], offsets[u + 1]):
+                w = weights[e]
+                if w < 0:
+                    continue
+                if time_dependent:
+                    w /= tables[edge_profiles[e]][int((departure + g) // 60) % MINUTES_PER_DAY]
+                v = targets[e]
+                ng = g + w
+                if ng < dist.get(v, math.inf):
+                    dist[v] = ng
+                    parent[v] = u
+                    parent_edge[v] = e
+                    heappush(heap, (ng + heuristic(v), ng, v))
+        else:
+            return None
+
+        return self.build_path(parent, parent_edge, target, dist[target])
+
+    def straight_line_heuristic(self, mode, target):
+        """Haversine distance / fastest speed, which never overestimates"""
+        lat, lon = self.lat, self.lon
+        t_lat, t_lon = lat[target], lon[target]
+        cos_t = math.cos(t_lat)
+        asin, sin, cos, sqrt = math.asin, math.sin, math.cos, math.sqrt
+        scale = 2 * EARTH_RADIUS_M / self.max_speed[mode]
+
+        def heuristic(v):
+            a = sin((t_lat - lat[v]) / 2) ** 2 + cos(lat[v]) * cos_t * sin((t_lon - lon[v]) / 2) ** 2
+            return scale * asin(min(1.0, sqrt(a)))
+
+        return heuristic
+
+    def build_path(self, parent, parent_edge, target, seconds):
+        """Turn parent maps into a path dict"""
+        nodes = [target]
+        edges = []
+        while parent[nodes[-1]] != -1:
+            edges.append(parent_edge[nodes[-1]])
+            nodes.append(parent[nodes[-1]])
+        nodes.reverse()
+        edges.reverse()
+        return {
+            'nodes': nodes,
+            'edges': edges,
+            'distance': sum(self.lengths[e] for e in edges) / 1000,
+            'time': seconds / 60
+        }
+
+
+def load_network(directory=DEFAULT_NETWORK_DIR):
+    """Load the road network if its files exist, otherwise return None"""
+    if not os.path.exists(os.path.join(directory, 'nodes.csv')):
+        return None
+    network = RoadNetwork.load(directory)
+    network.load_landmark_index()
+    network.load_bike_docks()
+    return network
@@ -0,0 +1,144 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from segments import route_to_json, route_from_json
+
+# Default cache file (next to user_data.json)
+ROUTE_CACHE_FILE = 'route_cache.json'
+
+
+def normalize_address(text):
+    """Case- and whitespace-insensitive form of an address"""
+    return ' '.join(text.replace(',', ' ').casefold().split())
+
+
+class RouteCache:
+    """Bounded LRU cache of generated route options with a time-to-live
+
+    Keys are the normalized start/end pair plus a departure bucket (weekday
+    or weekend, and the time of day rounded down to bucket_minutes), so
+    the same commute at the same time of day hits the cache day after day.
+    The fingerprint of the network and timetable files the routes were
+    planned on is saved with the entries; a saved cache with another
+    fingerprint loads empty. The cache is shared by the Tk thread and the
+    OD matrix thread, so entries are only touched under lock.
+    """
+
+    def __init__(self, max_entries=500, ttl=7 * 24 * 3600, bucket_minutes=15, fingerprint=None):
+        self.max_entries = max_entries
+        self.ttl = ttl                        # seconds
+        self.bucket_minutes = bucket_minutes
+        self.fingerprint = fingerprint        # see route_planner.data_fingerprint
+        self.entries = OrderedDict()          # key -> (created timestamp, routes)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def make_key(self, start, end, departure=None):
+        """Cache key for a trip (departure defaults to now)"""
+        return f"{normalize_address(start)}|{normalize_address(end)}|{self.departure_bucket(departure)}"
+
+    def departure_bucket(self, departure=None):
+        """'weekday|34'-style departure part of a key (departure defaults to now)"""
+        departure = departure or datetime.now()
+        day_type = 'weekend' if departure.weekday() >= 5 else 'weekday'
+        return f"{day_type}|{(departure.hour * 60 + departure.minute) // self.bucket_minutes}"
+
+    def __contains__(self, key):
+        """Whether a key has an unexpired entry (without counting a hit or miss)"""
+        with self.lock:
+            entry = self.entries.get(key)
+        return entry is not None and time.time() - entry[0] <= self.ttl
+
+    def get(self, key):
+        """Cached routes for a key, or None (expired entries count as misses)"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.time() - entry[0] > self.ttl:
+                del self.entries[key]
+                self.evictions += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, routes):
+        """Store routes, evicting the least recently used entry when full"""
+        with self.lock:
+            self.entries[key] = (time.time(), routes)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """Hit/miss/eviction counters"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def save(self, path=ROUTE_CACHE_FILE):
+        """Write unexpired entries to disk (oldest first, so LRU order survives)"""
+        now = time.time()
+        with self.lock:
+            entries = list(self.entries.items())
+        data = {
+            'entries': [
+                [key, created, [route_to_json(route) for route in routes]]
+                for key, (created, routes) in entries
+                if now - created <= self.ttl
+            ],
+            'stats': {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions},
+            'fingerprint': self.fingerprint
+        }
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path=ROUTE_CACHE_FILE, **options):
+        """Load a cache saved by save (empty cache if the file is missing or broken)"""
+        cache = cls(**options)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cache
+
+        # Routes planned on other network or timetable files are out of date
+        if cache.fingerprint is not None and data.get('fingerprint') != cache.fingerprint:
+            return cache
+
+        now = time.time()
+        for key, created, routes in data.get('entries', []):
+            # Entries saved before routes had segments are dropped
+            if now - created <= cache.ttl and all('segments' in route for route in routes):
+                cache.entries[key] = (created, [route_from_json(route) for route in routes])
+        while len(cache.entries) > cache.max_entries:
+            cache.entries.popitem(last=False)
+
+        stats = data.get('stats', {})
+        cache.hits = stats.get('hits', 0)
+        cache.misses = stats.get('misses', 0)
+        cache.evictions = stats.get('evictions', 0)
+        return cache
@@ -0,0 +1,302 @@
+import bisect
+import tkinter as tk
+import tkinter.font as tkfont
+
+from emission_model import co2_saved
+from segments import describe_segments
+
+# Height of a card with only its name and first details line, and the gap between cards.
+# Transfer and reward lines wrap below that, and each row is as tall as its lines need;
+# heights are worked out from the text and fonts instead of measuring widgets
+ROW_HEIGHT = 100
+ROW_GAP = 10
+# Space above the wrapped lines and around each of their labels (px)
+EXTRA_GAP = 5
+LABEL_PAD = 4
+TRANSFER_FONT = ("Arial", 10)
+REWARDS_FONT = ("Arial", 10, "bold")
+ECO_BG = '#e8f5e8'
+
+
+def transfer_text(route):
+    transfer_info = describe_segments(route['segments'])
+    return f"🚌 Transfer: {transfer_info}" if transfer_info else ''
+
+
+def rewards_text(route):
+    if not route['rewards']:
+        return ''
+    return "🎁 Rewards: " + ", ".join([reward['name'] for reward in route['rewards']])
+
+
+def wrapped_lines(font, text, width):
+    """Lines a label with this wraplength breaks text into (word by word, as Tk does)"""
+    if font.measure(text) <= width:
+        return 1
+    lines, line = 1, ''
+    for word in text.split(' '):
+        candidate = f"{line} {word}" if line else word
+        if line and font.measure(candidate) > width:
+            lines += 1
+            line = word
+        else:
+            line = candidate
+    return lines
+
+
+class RouteCard:
+    """Widgets of one route card, built once and refilled for whichever row it shows"""
+
+    def __init__(self, route_list):
+        self.route_list = route_list
+        self.index = None
+        self.route = None
+
+        canvas = route_list.canvas
+        self.container = tk.Frame(canvas, bg='white', relief='solid', bd=2)
+        self.window = canvas.create_window(0, 0, window=self.container, anchor='nw',
+                                           height=ROW_HEIGHT - ROW_GAP)
+
+        # Selection button
+        self.radio_button = tk.Radiobutton(
+            self.container,
+            variable=route_list.variable,
+            command=self.select
+        )
+        self.radio_button.pack(side='left', padx=10, pady=10)
+
+        # Select button (packed before the info frame so it keeps its space on the right)
+        self.select_button = tk.Button(
+            self.container,
+            text="✅ Select",
+            font=("Arial", 10, "bold"),
+            fg='white',
+            width=8,
+            height=1,
+            command=self.select
+        )
+        self.select_button.pack(side='right', padx=10, pady=10)
+
+        # Route info frame
+        self.info_frame = tk.Frame(self.container)
+        self.info_frame.pack(side='left', fill='x', expand=True, padx=(0, 10), pady=10)
+
+        # Route name and eco tag
+        self.name_frame = tk.Frame(self.info_frame)
+        self.name_frame.pack(fill='x')
+        self.name_label = tk.Label(self.name_frame, font=("Arial", 14, "bold"))
+        self.name_label.pack(side='left')
+        self.eco_label = tk.Label(
+            self.name_frame,
+            text="🌱 Eco Route",
+            font=("Arial", 10, "bold"),
+            bg=ECO_BG,
+            fg='#2e7d32'
+        )
+
+        # Route details
+        self.details_frame = tk.Frame(self.info_frame)
+        self.details_frame.pack(fill='x', pady=(5, 0))
+        self.distance_label = tk.Label(self.details_frame, font=("Arial", 11), fg='#1976d2')
+        self.distance_label.pack(side='left', padx=(0, 15))
+        self.time_label = tk.Label(self.details_frame, font=("Arial", 11), fg='#388e3c')
+        self.time_label.pack(side='left', padx=(0, 15))
+        self.co2_label = tk.Label(self.details_frame)
+        self.co2_label.pack(side='left', padx=(0, 15))
+
+        # Transfers and rewards, each wrapped over as many lines as it needs
+        self.extra_frame = tk.Frame(self.info_frame)
+        self.transfer_label = tk.Label(self.extra_frame, font=TRANSFER_FONT, fg='#1976d2',
+                                       justify='left', anchor='w')
+        self.rewards_label = tk.Label(self.extra_frame, font=REWARDS_FONT, fg='#e91e63',
+                                      justify='left', anchor='w')
+
+    def text_width(self, card_width):
+        """Width left for the wrapped lines in a card card_width wide"""
+        buttons = self.radio_button.winfo_reqwidth() + self.select_button.winfo_reqwidth()
+        # Button padding, the info frame's right padding, the card border on both sides
+        # and the padding inside the label
+        return max(card_width - buttons - 40 - 10 - 6 - LABEL_PAD, 1)
+
+    def select(self):
+        if self.index is not None:
+            self.route_list.on_select(self.index)
+
+    def show(self, index, route):
+        """Fill the card with a route (skipped if it already shows it)"""
+        if self.index == index and self.route is route:
+            return
+        self.index = index
+        self.route = route
+
+        bg = ECO_BG if route['eco'] else 'white'
+        self.container.config(bg=bg, bd=3 if route['eco'] else 2)
+        for widget in (self.radio_button, self.info_frame, self.name_frame, self.details_frame,
+                       self.extra_frame, self.distance_label, self.time_label, self.transfer_label,
+                       self.rewards_label):
+            widget.config(bg=bg)
+        self.radio_button.config(value=index)
+        self.select_button.config(bg='#4caf50' if route['eco'] else '#2196f3')
+        self.name_label.config(text=route['name'], bg=bg, fg=route['color'])
+        self.distance_label.config(text=f"📏 {route['distance']:.1f} km")
+        self.time_label.config(text=f"⏱️ {route['time']:.0f} min")
+
+        if route['eco']:
+            self.eco_label.pack(side='left', padx=(10, 0))
+            # CO₂ reduction compared to driving
+            self.co2_label.config(
+                text=f"🌍 Reduced {co2_saved(route['distance'], route['co2']):.2f} kg CO₂",
+                font=("Arial", 11, "bold"),
+                bg=bg,
+                fg='#2e7d32'
+            )
+        else:
+            self.eco_label.pack_forget()
+            self.co2_label.config(
+                text=f"🌍 Emitted {route['co2']:.2f} kg CO₂",
+                font=("Arial", 11),
+                bg=bg,
+                fg='#f44336'
+            )
+
+        # Optional lines are re-packed in order so they keep their positions
+        self.extra_frame.pack_forget()
+        self.transfer_label.pack_forget()
+        self.rewards_label.pack_forget()
+        transfer, rewards = transfer_text(route), rewards_text(route)
+        if transfer:
+            self.transfer_label.config(text=transfer)
+            self.transfer_label.pack(fill='x')
+        if rewards:
+            self.rewards_label.config(text=rewards)
+            self.rewards_label.pack(fill='x')
+        if transfer or rewards:
+            self.extra_frame.pack(fill='x', pady=(EXTRA_GAP, 0))
+
+
+class RouteList:
+    """Scrollable list of route cards that only builds widgets for visible rows
+
+    Row heights are worked out from each route's text (see row_height) and
+    rows sit at the running offsets on a canvas. A pool of about one
+    screenful of RouteCards is reused: row i is always drawn by card
+    i % pool size, so scrolling refills only the cards whose rows came into
+    view, and new results refill the existing cards instead of destroying
+    and creating widgets.
+    """
+
+    def __init__(self, parent, variable, on_select):
+        self.variable = variable        # shared by the radio buttons, holds the selected index
+        self.on_select = on_select      # called with the index of the chosen route
+        self.routes = []
+        self.cards = []
+        self.offsets = [0]              # top of each row, then the bottom of the last one
+        self.layout_width = None        # card width the offsets were worked out for
+
+        self.canvas = tk.Canvas(parent, bg='white', height=300, highlightthickness=0)
+        self.scrollbar = tk.Scrollbar(parent, orient="vertical", command=self.yview)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set, yscrollincrement=ROW_HEIGHT // 4)
+        self.transfer_font = tkfont.Font(root=self.canvas, font=TRANSFER_FONT)
+        self.rewards_font = tkfont.Font(root=self.canvas, font=REWARDS_FONT)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.canvas.bind('<Configure>', lambda event: self.refresh())
+        self.canvas.bind('<MouseWheel>', self.on_mousewheel)
+        self.canvas.bind('<Button-4>', lambda event: self.yview('scroll', -1, 'units'))
+        self.canvas.bind('<Button-5>', lambda event: self.yview('scroll', 1, 'units'))
+
+    def set_routes(self, routes):
+        """Show a new list of routes from the top, reusing the existing cards"""
+        self.variable.set('')
+        self.canvas.yview_moveto(0)
+        for card in self.cards:
+            card.route = None
+        self.update_routes(routes)
+
+    def update_routes(self, routes):
+        """Show a newer list of routes for the same query
+
+        The scroll position is kept and cards whose row still shows the same
+        route are left alone. The selected route stays selected at its new
+        row (updates carry over the route dicts already shown).
+        """
+        selected = self.selected_route()
+        self.routes = routes
+        self.layout_width = None
+        if selected is not None:
+            rows = [index for index, route in enumerate(routes) if route is selected]
+            self.variable.set(rows[0] if rows else '')
+        self.refresh()
+
+    def selected_route(self):
+        """Route picked with the radio buttons (None if none)"""
+        value = self.variable.get()
+        if value == '' or int(value) >= len(self.routes):
+            return None
+        return self.routes[int(value)]
+
+    def clear(self):
+        self.set_routes([])
+
+    def yview(self, *args):
+        self.canvas.yview(*args)
+        self.refresh()
+
+    def on_mousewheel(self, event):
+        self.yview('scroll', -1 if event.delta > 0 else 1, 'units')
+
+    def row_height(self, route, text_width):
+        """Height of the row showing route, gap included"""
+        height = ROW_HEIGHT
+        lines = [(self.transfer_font, transfer_text(route)), (self.rewards_font, rewards_text(route))]
+        lines = [(font, text) for font, text in lines if text]
+        if lines:
+            height += EXTRA_GAP
+        for font, text in lines:
+            height += wrapped_lines(font, text, text_width) * font.metrics('linespace') + LABEL_PAD
+        return height
+
+    def layout(self, width, text_width):
+        """Work out the row offsets for cards width wide"""
+        offsets = [0]
+        for route in self.routes:
+            offsets.append(offsets[-1] + self.row_height(route, text_width))
+        self.offsets = offsets
+        self.layout_width = width
+        self.canvas.configure(scrollregion=(0, 0, 0, offsets[-1]))
+
+    def refresh(self):
+        """Place and fill cards for the rows currently in view"""
+        canvas = self.canvas
+        width = max(canvas.winfo_width() - 20, 1)
+        height = max(canvas.winfo_height(), ROW_HEIGHT)
+
+        # No row is shorter than ROW_HEIGHT, so this covers a row partly
+        # scrolled out at the top and one at the bottom
+        pool_size = height // ROW_HEIGHT + 2
+        while len(self.cards) < pool_size:
+            self.cards.append(RouteCard(self))
+        pool_size = len(self.cards)
+
+        text_width = self.cards[0].text_width(width)
+        if self.layout_width != width:
+            self.layout(width, text_width)
+        offsets = self.offsets
+
+        first = max(bisect.bisect_right(offsets, int(canvas.canvasy(0))) - 1, 0)
+        last = min(first + pool_size, len(self.routes))
+        for index in range(first, last):
+            card = self.cards[index % pool_size]
+            card.show(index, self.routes[index])
+            card.transfer_label.config(wraplength=text_width)
+            card.rewards_label.config(wraplength=text_width)
+            canvas.coords(card.window, 10, offsets[index] + ROW_GAP // 2)
+            canvas.itemconfigure(card.window, width=width, state='normal',
+                                 height=offsets[index + 1] - offsets[index] - ROW_GAP)
+
+        # Cards without a row in view stay hidden
+        for index in range(last, first + pool_size):
+            card = self.cards[index % pool_size]
+            card.index = card.route = None
+            canvas.itemconfigure(card.window, state='hidden')
@@ -0,0 +1,500 @@
+import copy
+import os
+import random
+import string
+from datetime import datetime
+from road_network import load_network, DEFAULT_NETWORK_DIR, DEFAULT_SPEEDS, DEPARTURE_SLOT
+from gtfs_feed import load_feed, feed_signature, DEFAULT_FEED_DIR
+from raptor_planner import RaptorPlanner
+from geocoder import load_geocoder, DEFAULT_ADDRESS_FILE
+from emission_model import co2_emitted, encode_modes, score_segments
+from segments import Segment
+from pareto_search import ParetoSearch, non_dominated, MAX_WALKING_KM, MAX_CYCLING_KM
+from spatial_index import distance_km
+from isochrone import Isochrone, ISOCHRONE_MODES
+from alternative_paths import AlternativePaths
+from speed_profiles import SpeedProfiles, TIME_DEPENDENT_MODES, seconds_after_midnight
+
+# Bus lines used for illustrative transfers when no GTFS feed is installed
+FALLBACK_BUS_ROUTES = ['R1', 'R2', 'R3', 'R4', 'R5', 'R6', 'R7', 'R8', 'R9', 'R10',
+                       'R101', 'R102', 'R103', 'R104', 'R105', 'R106', 'R107', 'R108', 'R109', 'R110']
+
+# Line name shown for bus legs found on the road network, which has bus lanes but no line names
+ROAD_BUS_LINE = 'Bus'
+
+# Walking distance allowed to the first stop (km)
+TRANSIT_ACCESS_RADIUS = 1.0
+
+# Walking distance allowed between a stop or the destination and a bike share dock (km)
+DOCK_WALK_RADIUS = 0.3
+
+# (name, type, last mile mode, longest last mile in km, color) of timetabled options;
+# every journey RAPTOR finds (fewer transfers or earlier arrival) is offered
+TRANSIT_OPTIONS = [
+    ('🚌 Bus Route', 'bus', 'walking', 0.5, '#2196f3'),
+    ('🚶 Bus + Walking Route', 'bus_walking', 'walking', MAX_WALKING_KM, '#4caf50'),
+    ('🚴 Bus + Cycling Route', 'bus_cycling', 'cycling', MAX_CYCLING_KM, '#ff9800')
+]
+
+# Walking and cycling options get up to this many different paths (the fastest included)
+ALTERNATIVE_COUNT = 3
+ALTERNATIVE_LIMITS = {'walking': MAX_WALKING_KM, 'cycling': MAX_CYCLING_KM}
+
+# (name, type, color) of eco options found by the Pareto search
+ECO_ROUTE_STYLES = {
+    'walking': ('🚶 Walking Route', 'walking', '#4caf50'),
+    'cycling': ('🚴 Cycling Route', 'cycling', '#ff9800'),
+    'bus': ('🚌 Bus Route', 'bus', '#2196f3'),
+    'bus_walking': ('🚶 Bus + Walking Route', 'bus_walking', '#4caf50'),
+    'bus_cycling': ('🚴 Bus + Cycling Route', 'bus_cycling', '#ff9800')
+}
+
+
+def data_fingerprint(network_dir=DEFAULT_NETWORK_DIR, feed_dir=DEFAULT_FEED_DIR,
+                     address_file=DEFAULT_ADDRESS_FILE):
+    """Modification times and sizes of the network, feed and address files
+
+    Planned routes are only valid while this stays the same.
+    """
+    fingerprint = []
+    if os.path.isdir(network_dir):
+        for name in sorted(os.listdir(network_dir)):
+            if name.endswith('.csv'):
+                stat = os.stat(os.path.join(network_dir, name))
+                fingerprint.append([name, stat.st_mtime_ns, stat.st_size])
+    if os.path.isdir(feed_dir):
+        fingerprint.extend([name, mtime, size] for name, mtime, size in feed_signature(feed_dir))
+    if os.path.exists(address_file):
+        stat = os.stat(address_file)
+        fingerprint.append([address_file, stat.st_mtime_ns, stat.st_size])
+    return fingerprint
+
+
+def leg_seconds(legs):
+    """Seconds to walk/cycle a list of (mode, km) legs"""
+    return int(sum(km / DEFAULT_SPEEDS[mode] * 3600 for mode, km in legs))
+
+
+def label_variants(route_types):
+    """Tell apart options of the same kind: Route A, Route B, ..."""
+    for route_type in {route['type'] for route in route_types}:
+        same = [route for route in route_types if route['type'] == route_type]
+        if len(same) > 1:
+            for letter, route in zip(string.ascii_uppercase, same):
+                route['name'] += f" {letter}"
+                route['type'] += f"_{letter.lower()}"
+    return route_types
+
+
+class RoutePlanner:
+    """Route options (driving, bus, bus + walking/cycling) between two addresses
+
+    Shared by the navigation window and the batch planner. Route options are
+    plain dicts; the eco rewards are rolled by the caller.
+    """
+
+    def __init__(self, network=None, transit_feed=None, geocoder=None):
+        self.network = network            # RoadNetwork, None for rough estimates only
+        self.transit_feed = transit_feed  # TransitFeed, None for illustrative transfers
+        self.transit_planner = RaptorPlanner(transit_feed) if transit_feed else None
+        self.geocoder = geocoder          # Geocoder for address lookup, optional
+        self.pareto_search = ParetoSearch(network) if network else None
+        self.alternative_paths = AlternativePaths(network) if network else None
+        self.stop_docks = {}              # stop -> (dock, km) of its nearest bike share dock
+        self.isochrones = {}              # mode -> Isochrone of the last reachable area start
+        self.profiles = network.profiles if network else SpeedProfiles()
+
+    @classmethod
+    def load(cls, network_dir=DEFAULT_NETWORK_DIR, feed_dir=DEFAULT_FEED_DIR,
+             address_file=DEFAULT_ADDRESS_FILE):
+        """Planner over whatever network, feed and address files are installed"""
+        return cls(load_network(network_dir), load_feed(feed_dir), load_geocoder(address_file))
+
+    def share(self):
+        """Planner for another thread: the same network, feed and addresses, its own search state
+
+        The network, feed, address index and the RAPTOR and Pareto searches
+        are only read while planning (the network's path cache is locked),
+        so threads share them instead of loading them again.
+        """
+        planner = copy.copy(self)
+        planner.alternative_paths = AlternativePaths(self.network) if self.network else None
+        planner.stop_docks = {}
+        planner.isochrones = {}
+        return planner
+
+    def resolve_address(self, text):
+        """Road network node for an address (None if it cannot be found)"""
+        node = self.network.find_node(text)
+        if node is None and self.geocoder:
+            location = self.geocoder.locate(text)
+            if location:
+                node = self.network.nearest_node(*location)
+        return node
+
+    def route_options(self, start, end, departure=None):
+        """Route options between two addresses, leaving at departure (default now)
+
+        Raises LookupError if an address cannot be found. Without a road
+        network the options are a rough estimate.
+        """
+        route_types = []
+        for route_types in self.iter_route_options(start, end, departure):
+            pass
+        return route_types
+
+    def iter_route_options(self, start, end, departure=None):
+        """Like route_options, but yields the options found so far after each mode
+
+        Every yielded list replaces the previous one (the last one is the
+        final answer), so a caller can show driving while transit and the
+        eco modes are still being searched.
+        """
+        if self.network is None:
+            yield self.estimate_route_options(departure)
+            return
+
+        source = self.resolve_address(start)
+        if source is None:
+            raise LookupError(f"Start address not found: {start}")
+        target = self.resolve_address(end)
+        if target is None:
+            raise LookupError(f"End address not found: {end}")
+        yield from self.build_route_options(source, target, departure)
+
+    def iter_isochrones(self, start, minutes, departure=None):
+        """Yield what is reachable from start within minutes, one more eco mode each time
+
+        Every yielded dict maps mode -> Isochrone.summary and replaces the
+        previous one. The searches are kept, so asking again from the same
+        start (leaving in the same departure slot) with a wider budget only
+        explores the extra time.
+        """
+        if self.network is None:
+            raise LookupError("Reachable areas need a road network")
+        source = self.resolve_address(start)
+        if source is None:
+            raise LookupError(f"Start address not found: {start}")
+        seconds = seconds_after_midnight(departure or datetime.now())
+        seconds -= seconds % DEPARTURE_SLOT
+        current = next(iter(self.isochrones.values()), None)
+        if current is None or (current.source, current.departure) != (source, seconds):
+            self.isochrones = {mode: Isochrone(self.network, source, mode, seconds) for mode in ISOCHRONE_MODES}
+
+        budget = minutes * 60
+        summaries = {}
+        for mode, isochrone in self.isochrones.items():
+            isochrone.extend(budget)
+            summaries[mode] = isochrone.summary(budget)
+            yield dict(summaries)
+
+    def build_route_options(self, source, target, departure=None):
+        """Yield growing lists of route options from the road network, driving first"""
+        route_types = []
+        seconds = seconds_after_midnight(departure or datetime.now())
+
+        driving = self.network.shortest_path(source, target, 'driving', departure=seconds)
+        if driving:
+            route_types.append({
+                'name': '🚗 Driving Route',
+                'type': 'driving',
+                'eco': False,
+                'distance': driving['distance'],
+                'time': driving['time'],
+                'co2': co2_emitted('driving', driving['distance']),  # kg CO₂
+                'color': '#f44336',
+                'rewards': [],
+                'segments': [Segment('driving', driving['distance'], driving['time'],
+                                     co2_emitted('driving', driving['distance']))]
+            })
+            yield list(route_types)
+
+        # Only offer options that are better than every other one in some way
+        if self.transit_planner:
+            for route in self.iter_transit_options(source, target, departure):
+                route_types.append(route)
+                yield non_dominated(route_types)
+            # Timetabled journeys stand in for the road network's untimed bus trips
+            route_types += [route for route in self.build_pareto_options(source, target, seconds)
+                            if not route['type'].startswith('bus')]
+        else:
+            route_types += self.build_pareto_options(source, target, seconds)
+        route_types = non_dominated(route_types + self.direct_options(source, target, route_types))
+        # Slower walking/cycling paths along other streets are offered on purpose,
+        # listed right after the option they vary
+        alternatives = self.alternative_options(source, target, route_types)
+        route_types = [option for route in route_types for option in [route] + alternatives.pop(route['type'], [])]
+        yield label_variants(route_types)
+
+    def build_pareto_options(self, source, target, departure=None):
+        """Eco route options from the Pareto set of walking/bus/cycling trips
+
+        departure is in seconds after midnight (free-flow bus times if None).
+        """
+        route_types = []
+        for trip in self.pareto_search.search(source, target, departure):
+            modes = {leg['mode'] for leg in trip['legs']}
+            if 'bus' not in modes:
+                name, route_type, color = ECO_ROUTE_STYLES['cycling' if 'cycling' in modes else 'walking']
+            elif 'cycling' in modes:
+                name, route_type, color = ECO_ROUTE_STYLES['bus_cycling']
+            elif 'walking' in modes:
+                name, route_type, color = ECO_ROUTE_STYLES['bus_walking']
+            else:
+                name, route_type, color = ECO_ROUTE_STYLES['bus']
+            route_types.append({
+                'name': name,
+                'type': route_type,
+                'eco': True,
+                'distance': trip['distance'],
+                'time': trip['time'],
+                'co2': trip['co2'],
+                'transfers': trip['transfers'],
+                'active_distance': trip['active_distance'],
+                'color': color,
+                'rewards': [],
+                'segments': self.trip_segments(trip['legs'])
+            })
+        return route_types
+
+    def direct_options(self, source, target, route_types):
+        """Walking and cycling all the way, for those of the two missing from route_types
+
+        The Pareto search drops walking whenever cycling the same streets is
+        faster; the menu still offers it (see non_dominated).
+        """
+        offered = {route['type'] for route in route_types}
+        options = []
+        for mode, limit in ALTERNATIVE_LIMITS.items():
+            if mode in offered:
+                continue
+            path = self.network.shortest_path(source, target, mode)
+            if path and path['distance'] <= limit:
+                options.append(self.active_option(mode, path))
+        return options
+
+    def alternative_options(self, source, target, route_types):
+        """mode -> other paths for the walking and cycling options among route_types"""
+        alternatives = {}
+        offered = {route['type'] for route in route_types}
+        for mode, limit in ALTERNATIVE_LIMITS.items():
+            if mode not in offered:
+                continue
+            # The first path is the fastest one, which the option already follows
+            alternatives[mode] = [
+                self.active_option(mode, path)
+                for path in self.alternative_paths.search(source, target, mode, ALTERNATIVE_COUNT)[1:]
+                if path['distance'] <= limit
+            ]
+        return alternatives
+
+    def active_option(self, mode, path):
+        """Route option for walking or cycling a road network path"""
+        name, route_type, color = ECO_ROUTE_STYLES[mode]
+        co2 = co2_emitted(mode, path['distance'])
+        return {
+            'name': name,
+            'type': route_type,
+            'eco': True,
+            'distance': path['distance'],
+            'time': path['time'],
+            'co2': co2,
+            'transfers': 0,
+            'active_distance': path['distance'],
+            'color': color,
+            'rewards': [],
+            'segments': [Segment(mode, path['distance'], path['time'], co2)]
+        }
+
+    def iter_transit_options(self, source, target, departure=None):
+        """Yield bus route options from timetabled journeys (RAPTOR over the GTFS feed)"""
+        for name, route_type, mode, radius, color in TRANSIT_OPTIONS:
+            route_types = []
+            for journey in self.plan_transit(source, target, mode, radius, departure):
+                segments = self.journey_segments(journey)
+                route_types.append({
+                    'name': name,
+                    'type': route_type,
+                    'eco': True,
+                    'distance': sum(segment.distance for segment in segments),
+                    'time': (journey['arrival'] - journey['departure']) / 60,  # includes waiting at stops
+                    'co2': sum(segment.co2 for segment in segments),  # only the bus legs emit CO₂
+                    'transfers': journey['trips'] - 1,
+                    'active_distance': sum(segment.distance for segment in segments if segment.mode != 'bus'),
+                    'color': color,
+                    'rewards': [],
+                    'segments': segments
+                })
+            yield from label_variants(route_types)
+
+    def plan_transit(self, source, target, egress_mode, egress_radius, departure=None):
+        """Transit journeys leaving at departure, fastest first (empty if there are none)
+
+        These are the journeys RAPTOR keeps for having fewer trips or an
+        earlier arrival. Each gets access_legs and egress_legs: the
+        (mode, km) legs to its first stop and from its last stop.
+        """
+        origin = self.network.node_location(source)
+        destination = self.network.node_location(target)
+
+        # Walk to nearby stops at the start, walk or cycle from stops at the end
+        access_legs = {
+            stop: [('walking', d)]
+            for stop, d in self.transit_feed.stops_near(*origin, TRANSIT_ACCESS_RADIUS)
+        }
+        egress_legs = self.egress_legs(destination, egress_mode, egress_radius)
+        if not access_legs or not egress_legs:
+            return []
+        access = {stop: leg_seconds(legs) for stop, legs in access_legs.items()}
+        egress = {stop: leg_seconds(legs) for stop, legs in egress_legs.items()}
+
+        departure = departure or datetime.now()
+        seconds = seconds_after_midnight(departure)
+        journeys = self.transit_planner.plan(access, egress, seconds, departure.weekday())
+        journeys = [journey for journey in journeys if journey['trips']]
+        for journey in journeys:
+            journey['access_legs'] = access_legs[journey['legs'][0]['from_stop']]
+            journey['egress_legs'] = egress_legs[journey['legs'][-1]['to_stop']]
+        return journeys
+
+    def egress_legs(self, destination, mode, radius):
+        """stop -> (mode, km) legs from the stops within radius of destination to it
+
+        Bikes cannot be taken on the bus, so cycling goes from the bike share
+        dock nearest the stop to the dock nearest the destination, with a
+        short walk at either end. Without docks there is no bike to ride and
+        no cycling legs are returned.
+        """
+        docks = self.network.bike_docks
+        if mode == 'cycling' and docks is None:
+            return {}
+        stops = self.transit_feed.stops_near(*destination, radius)
+        if mode == 'walking':
+            return {stop: [(mode, d)] for stop, d in stops}
+
+        end = docks.nearest(*destination, 1, DOCK_WALK_RADIUS)
+        if not end:
+            return {}
+        end_dock, end_walk = end[0]
+        legs = {}
+        for stop, _ in stops:
+            start = self.nearest_dock(stop)
+            if start is None or start[0] == end_dock:
+                continue  # no dock to start from, or a walk would do
+            start_dock, start_walk = start
+            ride = distance_km(docks.lat[start_dock], docks.lon[start_dock], docks.lat[end_dock], docks.lon[end_dock])
+            legs[stop] = [('walking', start_walk), ('cycling', ride), ('walking', end_walk)]
+        return legs
+
+    def nearest_dock(self, stop):
+        """(dock, km) of the bike share dock within walking distance of a stop, or None"""
+        if stop not in self.stop_docks:
+            feed = self.transit_feed
+            nearest = self.network.bike_docks.nearest(feed.stop_lat[stop], feed.stop_lon[stop], 1, DOCK_WALK_RADIUS)
+            self.stop_docks[stop] = nearest[0] if nearest else None
+        return self.stop_docks[stop]
+
+    def estimate_route_options(self, departure=None):
+        """Rough route options used when no road network is installed
+
+        Driving and bus legs are slowed by the default speed profile at
+        departure (default now).
+        """
+        base_distance = random.randint(5, 50)  # kilometers
+
+        # (name, type, eco, color, legs as (mode, km, line))
+        templates = [
+            ('🚗 Driving Route', 'driving', False, '#f44336',
+             [('driving', base_distance, '')]),
+            ('🚌 Bus Route', 'bus', True, '#2196f3',
+             self.illustrative_legs(base_distance * 1.2)),
+            ('🚶 Bus + Walking Route A', 'bus_walking_a', True, '#4caf50',
+             self.illustrative_legs(base_distance - 1.0, 'walking', 0.2, 0.8) + [('walking', 1.0, '')]),
+            ('🚶 Bus + Walking Route B', 'bus_walking_b', True, '#4caf50',
+             self.illustrative_legs(base_distance - 1.5, 'walking', 0.2, 0.8) + [('walking', 1.5, '')]),
+            ('🚴 Bus + Cycling Route A', 'bus_cycling_a', True, '#ff9800',
+             self.illustrative_legs(base_distance - 3.0, 'cycling', 0.5, 2.0) + [('cycling', 3.0, '')]),
+            ('🚴 Bus + Cycling Route B', 'bus_cycling_b', True, '#ff9800',
+             self.illustrative_legs(base_distance - 5.0, 'cycling', 0.5, 2.0) + [('cycling', 5.0, '')])
+        ]
+
+        # Score every leg of every route in one call of the emission model
+        legs = [leg for template in templates for leg in template[4]]
+        scores = score_segments(encode_modes([mode for mode, _, _ in legs]), [km for _, km, _ in legs])
+        factor = self.profiles.factor(self.profiles.profile_index(None),
+                                      seconds_after_midnight(departure or datetime.now()))
+
+        route_types = []
+        position = 0
+        for name, route_type, eco, color, route_legs in templates:
+            segments = []
+            for mode, km, line in route_legs:
+                minutes = float(scores['time'][position])
+                if mode in TIME_DEPENDENT_MODES:
+                    minutes /= factor
+                segments.append(Segment(mode, km, minutes, float(scores['co2'][position]), line))
+                position += 1
+            route_types.append({
+                'name': name,
+                'type': route_type,
+                'eco': eco,
+                'distance': sum(segment.distance for segment in segments),
+                'time': sum(segment.duration for segment in segments),  # minutes
+                'co2': sum(segment.co2 for segment in segments),        # kg CO₂
+                'color': color,
+                'rewards': [],
+                'segments': segments
+            })
+        return route_types
+
+    def illustrative_legs(self, bus_distance, activity=None, min_distance=0.0, max_distance=0.0):
+        """Bus legs on 2-4 made-up lines, with 1-2 walked/cycled transfers if an activity is given
+
+        Used when no road network is installed; returns (mode, km, line) tuples.
+        """
+        # Randomly select 2-4 bus routes
+        transfer_count = random.randint(2, 4)
+        selected_routes = random.sample(FALLBACK_BUS_ROUTES, transfer_count)
+
+        # Randomly select 1-2 transfer points that require walking/cycling
+        active = {}
+        if activity:
+            active_transfers = random.randint(1, min(2, transfer_count-1))
+            for i in random.sample(range(transfer_count-1), active_transfers):
+                active[i] = random.uniform(min_distance, max_distance)
+
+        # The transfers are part of the distance; the rest is shared by the buses
+        bus_share = max(bus_distance - sum(active.values()), 0.0) / transfer_count
+        legs = []
+        for i, route in enumerate(selected_routes):
+            legs.append(('bus', bus_share, route))
+            if i in active:
+                legs.append((activity, active[i], ''))
+        return legs
+
+    def trip_segments(self, legs):
+        """Segments for a road network trip (bus legs get the generic ROAD_BUS_LINE name)"""
+        return [
+            Segment(leg['mode'], leg['distance'], leg['time'], co2_emitted(leg['mode'], leg['distance']),
+                    ROAD_BUS_LINE if leg['mode'] == 'bus' else '')
+            for leg in legs
+        ]
+
+    def journey_segments(self, journey):
+        """Segments for a timetabled journey, including the trips to and from the stops"""
+        segments = [
+            Segment(mode, km, km / DEFAULT_SPEEDS[mode] * 60, 0.0)
+            for mode, km in journey['access_legs'] if km > 0
+        ]
+        for leg in journey['legs']:
+            minutes = (leg['arrival'] - leg['departure']) / 60
+            if leg['type'] == 'bus':
+                segments.append(Segment('bus', leg['distance'], minutes, co2_emitted('bus', leg['distance']),
+                                        leg['route'], leg['departure']))
+            else:
+                segments.append(Segment('walking', leg['distance'], minutes, 0.0))
+        segments.extend(
+            Segment(mode, km, km / DEFAULT_SPEEDS[mode] * 60, 0.0)
+            for mode, km in journey['egress_legs'] if km > 0
+        )
+        return segments
@@ -0,0 +1,102 @@
+import queue
+import threading
+
+
+class RouteWorker:
+    """Plans route queries on a background thread so the window stays responsive
+
+    Each window has one worker, which handles its queries one at a time
+    with the planner it was given (from RoutePlanner.share()). That
+    planner's own search state (alternative paths, stop docks, reachable
+    areas) is only touched by this thread. The network, timetable, address
+    index and the RAPTOR and Pareto searches are shared with the other
+    windows and the OD matrix thread but only read while planning; the
+    network's path cache is guarded by its path_cache_lock. The route
+    cache is not used here: the Tk side reads and fills it, alongside the
+    OD matrix thread, under RouteCache.lock. Queries submitted before there
+    is a planner wait until set_planner() hands one over.
+
+    A query is a planner generator method (route options or reachable
+    areas); every snapshot it yields is put on a result queue tagged with
+    its query id, and the Tk side polls it with after(). Submitting a new
+    query cancels the previous one: it stops at its next snapshot and
+    anything it already queued is dropped by poll.
+    """
+
+    def __init__(self, planner):
+        self.planner = planner            # None until set_planner() while the data files load
+        self.ready = threading.Event()    # set once there is a planner
+        if planner is not None:
+            self.ready.set()
+        self.query_id = 0                 # id of the latest query, older ones are cancelled
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name='route-worker', daemon=True)
+        self.thread.start()
+
+    def submit(self, start, end, departure=None):
+        """Queue a route query and return its id"""
+        return self.submit_call('iter_route_options', start, end, departure)
+
+    def submit_isochrone(self, start, minutes):
+        """Queue a reachable area query and return its id"""
+        return self.submit_call('iter_isochrones', start, minutes)
+
+    def submit_call(self, method, *args):
+        self.query_id += 1
+        self.requests.put((self.query_id, method, args))
+        return self.query_id
+
+    def cancel(self):
+        """Cancel the current query without starting a new one"""
+        self.query_id += 1
+
+    def set_planner(self, planner):
+        """Plan the next queries with planner (queries sent before the first one wait for it)"""
+        self.planner = planner
+        self.ready.set()
+
+    def stop(self):
+        self.cancel()
+        self.requests.put(None)
+        self.ready.set()
+
+    def run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            query_id, method, args = request
+            self.ready.wait()
+            if self.planner is None:
+                return  # stopped before the data files were loaded
+            if query_id != self.query_id:
+                continue  # replaced before it started
+
+            try:
+                for snapshot in getattr(self.planner, method)(*args):
+                    if query_id != self.query_id:
+                        break
+                    self.results.put((query_id, 'result', snapshot))
+                else:
+                    self.results.put((query_id, 'done', None))
+            except LookupError as e:
+                self.results.put((query_id, 'error', str(e)))
+            except Exception as e:
+                # Keep the worker alive for the next query
+                self.results.put((query_id, 'error', f"Route planning failed: {e}"))
+
+    def poll(self):
+        """(kind, payload) messages of the current query received since the last poll
+
+        kind is 'result' (payload: the latest snapshot, e.g. all route
+        options found so far), 'done' or 'error' (payload: message).
+        """
+        messages = []
+        while True:
+            try:
+                query_id, kind, payload = self.results.get_nowait()
+            except queue.Empty:
+                return messages
+            if query_id == self.query_id:
+                messages.append((kind, payload))
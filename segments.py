@@ -0,0 +1,71 @@
+from gtfs_feed import format_time
+
+# Word used for active legs in transfer text ("walk 0.4km to destination")
+ACTIVITIES = {'walking': 'walk', 'cycling': 'cycle'}
+
+
+class Segment:
+    """One leg of a route option: a bus ride, a walk, a bike ride or a drive"""
+
+    __slots__ = ('mode', 'line', 'distance', 'duration', 'co2', 'departure')
+
+    def __init__(self, mode, distance, duration, co2, line='', departure=None):
+        self.mode = mode              # 'driving', 'bus', 'walking' or 'cycling'
+        self.distance = distance      # km
+        self.duration = duration      # minutes
+        self.co2 = co2                # kg CO₂
+        self.line = line              # bus line name ('' for other modes)
+        self.departure = departure    # timetabled departure (seconds after midnight) or None
+
+    def __repr__(self):
+        return f"Segment({self.mode!r}, {self.distance:.2f}km, {self.duration:.1f}min, line={self.line!r})"
+
+    def line_text(self):
+        """Bus line with its departure time if timetabled, e.g. 'R3 08:05'"""
+        if self.departure is None:
+            return self.line
+        return f"{self.line} {format_time(self.departure)}"
+
+    def to_list(self):
+        """Compact JSON form"""
+        return [self.mode, self.distance, self.duration, self.co2, self.line, self.departure]
+
+    @classmethod
+    def from_list(cls, data):
+        mode, distance, duration, co2, line, departure = data
+        return cls(mode, distance, duration, co2, line, departure)
+
+
+def describe_segments(segments):
+    """Transfer text, e.g. 'R3 08:05 -> (walk 0.5km) -> R107 -> walk 1.0km to destination'
+
+    Driving routes have no transfers and get an empty text.
+    """
+    if all(segment.mode == 'driving' for segment in segments):
+        return ''
+    parts = []
+    last = len(segments) - 1
+    for i, segment in enumerate(segments):
+        if segment.mode == 'bus':
+            parts.append(segment.line_text())
+        elif i == last:
+            parts.append(f"{ACTIVITIES[segment.mode]} {segment.distance:.1f}km to destination")
+        elif i == 0:
+            parts.append(f"{ACTIVITIES[segment.mode]} {segment.distance:.1f}km to stop")
+        else:
+            parts.append(f"({ACTIVITIES[segment.mode]} {segment.distance:.1f}km)")
+    return ' -> '.join(parts)
+
+
+def route_to_json(route):
+    """Route option dict with its segments in JSON form"""
+    data = dict(route)
+    data['segments'] = [segment.to_list() for segment in route['segments']]
+    return data
+
+
+def route_from_json(data):
+    """Inverse of route_to_json"""
+    route = dict(data)
+    route['segments'] = [Segment.from_list(segment) for segment in data['segments']]
+    return route
@@ -0,0 +1,127 @@
+import json
+import os
+import struct
+
+# First bytes of a binary profile, and the version of its layout
+BINARY_MAGIC = b'SCPF'
+BINARY_VERSION = 1
+
+# Header: magic, layout version, bit mask of the fixed fields present
+BINARY_HEADER = struct.Struct('<4sBH')
+
+# Fixed fields of a binary profile (parent dict or None for top level, key, struct code), in layout order
+BINARY_FIELDS = (
+    (None, 'schema_version', 'H'),
+    (None, 'total_co2_saved', 'd'),
+    (None, 'total_calories', 'd'),
+    (None, 'game_challenges', 'I'),
+    (None, 'eco_routes_taken', 'I'),
+    ('inventory', 'potions', 'I'),
+    ('inventory', 'iron_sword', 'I'),
+    ('inventory', 'iron_armor', 'I'),
+    ('player', 'level', 'I'),
+    ('player', 'exp', 'I'),
+    ('player', 'attack', 'I'),
+    ('player', 'defense', 'I'),
+    ('player', 'max_hp', 'I')
+)
+
+BINARY_BODY = struct.Struct('<' + ''.join(code for _, _, code in BINARY_FIELDS))
+
+# Bit of each fixed field in the header mask
+BINARY_SLOTS = [(1 << bit, parent, key, code) for bit, (parent, key, code) in enumerate(BINARY_FIELDS)]
+
+# Largest value of each integer struct code
+INTEGER_LIMITS = {'H': 0xFFFF, 'I': 0xFFFFFFFF}
+
+
+def fits(value, code):
+    """Whether value round-trips through a struct code unchanged (type included)"""
+    if code == 'd':
+        return type(value) is float
+    return type(value) is int and 0 <= value <= INTEGER_LIMITS[code]
+
+
+class JsonSerializer:
+    """Profiles as JSON text (indented by default, as user_data.json)"""
+
+    name = 'json'
+    extension = '.json'
+
+    def __init__(self, indent=2):
+        self.indent = indent
+
+    def dumps(self, data):
+        return json.dumps(data, ensure_ascii=False, indent=self.indent).encode('utf-8')
+
+    def loads(self, raw):
+        return json.loads(raw.decode('utf-8'))
+
+
+class BinarySerializer:
+    """Profiles as a small header and a struct-packed fixed layout
+
+    The numeric fields every profile has (BINARY_FIELDS) are packed at fixed
+    offsets, with a bit mask of which were present. Anything the layout
+    cannot hold exactly (other fields, strings, negative numbers, an int
+    where a float belongs) follows as compact JSON, so decoding gives back
+    the same profile.
+    """
+
+    name = 'binary'
+    extension = '.scp'
+
+    def dumps(self, data):
+        # Fixed fields are at most two levels deep, so only those levels are copied
+        rest = {key: dict(value) if isinstance(value, dict) else value for key, value in data.items()}
+        present = 0
+        values = []
+        for mask, parent, key, code in BINARY_SLOTS:
+            node = rest if parent is None else rest.get(parent)
+            if isinstance(node, dict) and key in node and fits(node[key], code):
+                present |= mask
+                values.append(node.pop(key))
+            else:
+                values.append(0)
+        # Nested dicts emptied by packing their fields are left out of the JSON
+        for key in [key for key, value in rest.items() if value == {} and data[key] != {}]:
+            del rest[key]
+
+        raw = BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, present) + BINARY_BODY.pack(*values)
+        if rest:
+            raw += json.dumps(rest, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return raw
+
+    def loads(self, raw):
+        offset = BINARY_HEADER.size + BINARY_BODY.size
+        if len(raw) < offset or raw[:len(BINARY_MAGIC)] != BINARY_MAGIC:
+            raise ValueError("Not a binary profile")
+        magic, version, present = BINARY_HEADER.unpack_from(raw)
+        if version != BINARY_VERSION:
+            raise ValueError(f"Binary profile layout {version} is not supported (expected {BINARY_VERSION})")
+        data = json.loads(raw[offset:].decode('utf-8')) if len(raw) > offset else {}
+        for value, (mask, parent, key, _) in zip(BINARY_BODY.unpack_from(raw, BINARY_HEADER.size), BINARY_SLOTS):
+            if present & mask:
+                if parent is None:
+                    data[key] = value
+                elif parent in data:
+                    data[parent][key] = value
+                else:
+                    data[parent] = {key: value}
+        return data
+
+
+# Serializers by name ('json' is the default, and what export writes unless asked otherwise)
+SERIALIZERS = {
+    'json': JsonSerializer(),
+    'binary': BinarySerializer()
+}
+
+
+def serializer_for(path):
+    """Serializer picked by a file's extension (JSON for anything unknown)"""
+    extension = os.path.splitext(path)[1].lower()
+    for serializer in SERIALIZERS.values():
+        if serializer.extension == extension:
+            return serializer
+    return SERIALIZERS['json']
@@ -0,0 +1,145 @@
+import csv
+import math
+from array import array
+
+# Edge of a grid cell in km (about the radius of a typical stop or dock query)
+CELL_KM = 0.5
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km between two points given in degrees"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """Uniform grid over points for within-radius and k-nearest queries
+
+    Points (degrees) are bucketed into cells of cell_km degrees of
+    latitude by the same width in longitude at the points' mean latitude.
+    Point ids are stored sorted by cell in one array, and cells maps a
+    cell to its slice. A query only visits the cells that its radius
+    overlaps and measures exact great-circle distances to the points in
+    them; nearest widens the radius until enough points are found.
+    """
+
+    def __init__(self, lat, lon, cell_km=CELL_KM, names=None):
+        self.lat = array('d', lat)
+        self.lon = array('d', lon)
+        self.names = names                      # optional display name per point
+        self.cell_km = cell_km
+        self.cell_lat = cell_km / KM_PER_DEGREE
+        count = len(self.lat)
+        mean_lat = sum(self.lat) / count if count else 0.0
+        self.cell_lon = cell_km / (KM_PER_DEGREE * max(math.cos(math.radians(mean_lat)), 0.01))
+
+        # Radians and cosines for the distance checks
+        self.lat_rad = array('d', map(math.radians, self.lat))
+        self.lon_rad = array('d', map(math.radians, self.lon))
+        self.cos_lat = array('d', map(math.cos, self.lat_rad))
+
+        # Bucket by cell, then pack the buckets into one id array
+        buckets = {}
+        cell_lat, cell_lon = self.cell_lat, self.cell_lon
+        for i, (la, lo) in enumerate(zip(self.lat, self.lon)):
+            key = (math.floor(la / cell_lat), math.floor(lo / cell_lon))
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = [i]
+            else:
+                bucket.append(i)
+        self.ids = array('i')
+        self.cells = {}
+        for key, bucket in buckets.items():
+            start = len(self.ids)
+            self.ids.extend(bucket)
+            self.cells[key] = (start, len(self.ids))
+
+        # Bounding box, so a search radius that covers every point can stop growing,
+        # and the average density (points per km²) to pick a first search radius
+        if count:
+            self.bounds = (min(self.lat), min(self.lon), max(self.lat), max(self.lon))
+            south, west, north, east = self.bounds
+            area = ((north - south) / cell_lat + 1) * ((east - west) / cell_lon + 1) * cell_km ** 2
+            self.density = count / area
+        else:
+            self.bounds = None
+            self.density = 0.0
+
+    def __len__(self):
+        return len(self.lat)
+
+    @classmethod
+    def load_csv(cls, path, cell_km=CELL_KM):
+        """Index the points of a CSV file with columns name, lat, lon"""
+        lat, lon, names = array('d'), array('d'), []
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            for row in csv.DictReader(f):
+                lat.append(float(row['lat']))
+                lon.append(float(row['lon']))
+                names.append(row.get('name') or '')
+        return cls(lat, lon, cell_km, names)
+
+    def within(self, lat, lon, radius_km):
+        """(point, distance km) pairs within radius of a point, nearest first"""
+        if not self.bounds:
+            return []
+        dlat = radius_km / KM_PER_DEGREE
+        # Longitude degrees widen towards the poles; use the widest span in the box
+        widest = min(max(abs(lat - dlat), abs(lat + dlat)), 89.0)
+        dlon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(widest)), 0.01))
+        # Only cells inside both the query box and the bounding box can hold points
+        south, west, north, east = self.bounds
+        row_min = math.floor(max(lat - dlat, south) / self.cell_lat)
+        row_max = math.floor(min(lat + dlat, north) / self.cell_lat)
+        col_min = math.floor(max(lon - dlon, west) / self.cell_lon)
+        col_max = math.floor(min(lon + dlon, east) / self.cell_lon)
+
+        # Points within radius have a haversine term up to this value
+        limit = math.sin(min(radius_km / EARTH_RADIUS_KM, math.pi) / 2) ** 2
+        lat1 = math.radians(lat)
+        lon1 = math.radians(lon)
+        cos1 = math.cos(lat1)
+        sin = math.sin
+        ids, cells = self.ids, self.cells
+        lat_rad, lon_rad, cos_lat = self.lat_rad, self.lon_rad, self.cos_lat
+
+        found = []
+        for row in range(row_min, row_max + 1):
+            for col in range(col_min, col_max + 1):
+                cell = cells.get((row, col))
+                if cell is None:
+                    continue
+                for i in ids[cell[0]:cell[1]]:
+                    a = sin((lat_rad[i] - lat1) / 2) ** 2 + cos1 * cos_lat[i] * sin((lon_rad[i] - lon1) / 2) ** 2
+                    if a <= limit:
+                        found.append((2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a))), i))
+        found.sort()
+        return [(i, d) for d, i in found]
+
+    def nearest(self, lat, lon, k=1, max_km=None):
+        """Up to k (point, distance km) pairs closest to a point, nearest first
+
+        Points farther than max_km (if given) are left out.
+        """
+        if not self.bounds:
+            return []
+        # Farthest any point can be: distance to the far corner of the bounding box
+        south, west, north, east = self.bounds
+        farthest = max(distance_km(lat, lon, corner_lat, corner_lon)
+                       for corner_lat in (south, north) for corner_lon in (west, east)) + self.cell_km
+        if max_km is not None:
+            farthest = min(farthest, max_km)
+
+        # Start with the radius that holds about 2k points on average
+        radius = math.sqrt(2 * k / (math.pi * self.density))
+        while True:
+            radius = min(radius, farthest)
+            found = self.within(lat, lon, radius)
+            if len(found) >= k or radius >= farthest:
+                return found[:k]
+            radius *= 2
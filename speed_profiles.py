@@ -0,0 +1,103 @@
+import csv
+import os
+from array import array
+
+# Profiles are sampled once per minute of the day
+MINUTES_PER_DAY = 1440
+
+# Optional profile file next to the network (columns profile, time, value)
+PROFILE_FILE = 'speed_profiles.csv'
+
+# Built-in road profiles as (HH:MM, speed factor) breakpoints, linear in between
+# and wrapping around midnight. A factor is the share of the edge's free-flow
+# speed; factors above 1 are capped so free-flow bounds stay admissible.
+DEFAULT_PROFILES = {
+    'free': [('00:00', 1.0)],
+    'urban': [('00:00', 1.0), ('06:30', 1.0), ('08:00', 0.6), ('09:30', 0.85), ('16:00', 0.85),
+              ('17:30', 0.55), ('19:00', 0.85), ('21:00', 1.0)]
+}
+
+# Profile of driving and bus edges without a profile column in edges.csv
+DEFAULT_PROFILE = 'urban'
+
+# Minutes between buses through the day (profile 'headway' in the profile file);
+# boarding waits half a headway on average
+DEFAULT_HEADWAYS = [('00:00', 30), ('06:00', 15), ('07:00', 8), ('09:30', 12), ('16:00', 8),
+                    ('19:00', 15), ('22:00', 30)]
+
+# Lowest speed factor allowed (a factor of 0 would close the road for good)
+MIN_FACTOR = 0.05
+
+# Travel modes whose edge times follow the road profiles
+TIME_DEPENDENT_MODES = ('driving', 'bus')
+
+
+def parse_minutes(text):
+    """HH:MM to minutes after midnight"""
+    hours, minutes = text.strip().split(':')[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def seconds_after_midnight(departure):
+    """Seconds after midnight of a datetime"""
+    return departure.hour * 3600 + departure.minute * 60 + departure.second
+
+
+def sample_profile(points, low=None, high=None):
+    """Per-minute table of a piecewise-linear profile given as (HH:MM, value) points"""
+    points = sorted((parse_minutes(time), float(value)) for time, value in points)
+    if low is not None:
+        points = [(minute, max(value, low)) for minute, value in points]
+    if high is not None:
+        points = [(minute, min(value, high)) for minute, value in points]
+    # Repeat the first point a day later so the last segment wraps around midnight
+    points.append((points[0][0] + MINUTES_PER_DAY, points[0][1]))
+
+    table = array('f', [0.0]) * MINUTES_PER_DAY
+    for (start, start_value), (end, end_value) in zip(points, points[1:]):
+        for minute in range(start, end):
+            share = (minute - start) / (end - start)
+            table[minute % MINUTES_PER_DAY] = start_value + (end_value - start_value) * share
+    return table
+
+
+class SpeedProfiles:
+    """Time-of-day speed factors shared by all edges, and bus headways
+
+    Every profile is one table of MINUTES_PER_DAY factors, and an edge
+    only stores the index of its profile (see RoadNetwork.edge_profiles),
+    so time-dependent weights cost one byte per edge however finely the
+    day is sliced.
+    """
+
+    def __init__(self, profiles=DEFAULT_PROFILES, headways=DEFAULT_HEADWAYS):
+        self.names = list(profiles)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.tables = [sample_profile(profiles[name], MIN_FACTOR, 1.0) for name in self.names]
+        self.headways = sample_profile(headways)     # minutes
+
+    @classmethod
+    def load(cls, directory):
+        """Built-in profiles, extended or replaced by the profile file of a network directory"""
+        path = os.path.join(directory, PROFILE_FILE) if directory else None
+        if not path or not os.path.exists(path):
+            return cls()
+
+        profiles = {}
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            for row in csv.DictReader(f):
+                profiles.setdefault(row['profile'].strip(), []).append((row['time'], row['value']))
+        headways = profiles.pop('headway', DEFAULT_HEADWAYS)
+        return cls({**DEFAULT_PROFILES, **profiles}, headways)
+
+    def profile_index(self, name):
+        """Index of a profile by name (the default profile if unknown or empty)"""
+        return self.index.get(name.strip() if name else DEFAULT_PROFILE, self.index[DEFAULT_PROFILE])
+
+    def factor(self, profile, seconds):
+        """Speed factor of a profile at seconds after midnight"""
+        return self.tables[profile][int(seconds // 60) % MINUTES_PER_DAY]
+
+    def boarding_seconds(self, seconds):
+        """Average wait for a bus at seconds after midnight (half a headway)"""
+        return self.headways[int(seconds // 60) % MINUTES_PER_DAY] * 30
@@ -0,0 +1,41 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from user_store import UserStore
+
+
+class FakeRoot:
+    """Stands in for the Tk root: after() callbacks run only when run_pending() is called"""
+
+    def __init__(self):
+        self.jobs = {}
+        self.next_job = 0
+
+    def after(self, ms, callback):
+        self.next_job += 1
+        self.jobs[self.next_job] = callback
+        return self.next_job
+
+    def after_cancel(self, job):
+        self.jobs.pop(job, None)
+
+    def run_pending(self):
+        jobs, self.jobs = self.jobs, {}
+        for callback in jobs.values():
+            callback()
+
+
+@pytest.fixture
+def root():
+    return FakeRoot()
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = UserStore(str(tmp_path / 'user_data.db'))
+    yield store
+    store.close()
@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+import alternative_paths
+from alternative_paths import AlternativePaths, MAX_OVERLAP, MAX_STRETCH, overlap
+from road_network import RoadNetwork
+from test_landmark_index import write_network
+
+
+@pytest.fixture
+def network(tmp_path):
+    write_network(tmp_path)
+    return RoadNetwork.load(str(tmp_path))
+
+
+def pairs(network, count=30, seed=7):
+    rng = random.Random(seed)
+    return [(rng.randrange(network.node_count), rng.randrange(network.node_count)) for _ in range(count)]
+
+
+def check_path(network, path, source, target, mode):
+    """Edges follow each other from source to target and add up to the path's time"""
+    assert path['nodes'][0] == source and path['nodes'][-1] == target
+    for u, v, e in zip(path['nodes'], path['nodes'][1:], path['edges']):
+        assert network.offsets[u] <= e < network.offsets[u + 1] and network.targets[e] == v
+    assert sum(network.edge_times[mode][e] for e in path['edges']) == pytest.approx(path['time'] * 60, rel=1e-4)
+
+
+def test_alternatives_stay_within_the_stretch_and_overlap_limits(network):
+    search = AlternativePaths(network)
+    found_alternatives = False
+    for mode in ('walking', 'cycling'):
+        for source, target in pairs(network):
+            paths = search.search(source, target, mode)
+            fastest = network.shortest_path(source, target, mode)
+            if fastest is None or source == target:
+                assert paths == []
+                continue
+            assert paths[0]['time'] == pytest.approx(fastest['time'], rel=1e-4)
+            for i, path in enumerate(paths):
+                check_path(network, path, source, target, mode)
+                assert path['time'] <= fastest['time'] * MAX_STRETCH * (1 + 1e-6)
+                for other in paths[:i]:
+                    assert overlap(set(path['edges']), other, network.lengths) <= MAX_OVERLAP
+            found_alternatives = found_alternatives or len(paths) > 1
+    assert found_alternatives
+
+
+def test_tighter_limits_give_fewer_alternatives(network, monkeypatch):
+    loose = sum(len(AlternativePaths(network).search(source, target, 'walking')) for source, target in pairs(network))
+
+    monkeypatch.setattr(alternative_paths, 'MAX_OVERLAP', 0.0)
+    for source, target in pairs(network):
+        paths = AlternativePaths(network).search(source, target, 'walking')
+        for i, path in enumerate(paths):
+            assert not any(set(path['edges']) & set(other['edges']) for other in paths[:i])
+    disjoint = sum(len(AlternativePaths(network).search(source, target, 'walking')) for source, target in pairs(network))
+    assert disjoint < loose
+
+    monkeypatch.setattr(alternative_paths, 'MAX_OVERLAP', 1.0)
+    monkeypatch.setattr(alternative_paths, 'MAX_STRETCH', 1.0)
+    for source, target in pairs(network):
+        fastest = network.shortest_path(source, target, 'walking')
+        for path in AlternativePaths(network).search(source, target, 'walking'):
+            assert path['time'] == pytest.approx(fastest['time'], rel=1e-4)
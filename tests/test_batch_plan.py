@@ -0,0 +1,64 @@
+import csv
+import io
+import json
+
+from batch_plan import plan_pair, read_pairs, run_batch
+
+
+class BrokenPlanner:
+    def route_options(self, start, end, departure=None):
+        raise TypeError("'NoneType' object is not subscriptable")
+
+
+def write_grid(directory, size=4):
+    """Road network of size x size named corners about 100 m apart"""
+    with open(directory / 'nodes.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'name', 'lat', 'lon'])
+        for row in range(size):
+            for col in range(size):
+                writer.writerow([f"n{row}-{col}", f"Corner {row}-{col}", 52.0 + row * 0.0009, 13.0 + col * 0.0015])
+    with open(directory / 'edges.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['source', 'target', 'length_m'])
+        for row in range(size):
+            for col in range(size):
+                for next_row, next_col in ((row + 1, col), (row, col + 1)):
+                    if next_row < size and next_col < size:
+                        writer.writerow([f"n{row}-{col}", f"n{next_row}-{next_col}", 100])
+
+
+def test_read_pairs_numbers_rows_and_fills_in_the_departure(tmp_path):
+    path = tmp_path / 'pairs.csv'
+    path.write_text('start,end,id,departure\nn0-0,n3-3,,\nn1-1,n2-2,trip-7,2026-10-19T08:30\n', encoding='utf-8')
+    assert list(read_pairs(str(path), '2026-10-19T07:00')) == [
+        {'id': 1, 'start': 'n0-0', 'end': 'n3-3', 'departure': '2026-10-19T07:00'},
+        {'id': 'trip-7', 'start': 'n1-1', 'end': 'n2-2', 'departure': '2026-10-19T08:30'}
+    ]
+
+    path = tmp_path / 'pairs.jsonl'
+    path.write_text('{"start": "n0-0", "end": "n3-3"}\n\n{"id": 5, "start": "a", "end": "b"}\n', encoding='utf-8')
+    assert [(pair['id'], pair['departure']) for pair in read_pairs(str(path))] == [(1, None), (5, None)]
+
+
+def test_unexpected_error_becomes_an_error_record():
+    pair = {'id': 3, 'start': 'a', 'end': 'b', 'departure': None}
+    assert plan_pair(BrokenPlanner(), pair) == {'id': 3, 'start': 'a', 'end': 'b', 'error': "TypeError: 'NoneType' object is not subscriptable"}
+
+
+def test_one_failing_pair_does_not_stop_the_batch(tmp_path):
+    write_grid(tmp_path)
+    pairs = [
+        {'id': 1, 'start': 'Corner 0-0', 'end': 'Corner 3-3', 'departure': None},
+        {'id': 2, 'start': None, 'end': 'Corner 3-3', 'departure': None},     # not an address at all
+        {'id': 3, 'start': 'nowhere', 'end': 'Corner 3-3', 'departure': None},
+        {'id': 4, 'start': 'Corner 3-0', 'end': '52.0, 13.0045', 'departure': '2026-10-19T08:30'}
+    ]
+    output = io.StringIO()
+    written = run_batch(pairs, output, workers=1, chunk_size=2, network_dir=str(tmp_path),
+                        feed_dir=str(tmp_path / 'gtfs'), address_file=str(tmp_path / 'addresses.csv'))
+    results = {record['id']: record for record in map(json.loads, output.getvalue().splitlines())}
+    assert written == 4 and sorted(results) == [1, 2, 3, 4]
+    assert results[1]['routes'] and results[4]['routes']
+    assert 'routes' not in results[2] and results[2]['error']
+    assert results[3]['error'] == "Start address not found: nowhere"
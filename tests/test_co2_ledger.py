@@ -0,0 +1,72 @@
+import sqlite3
+
+import pytest
+
+from co2_ledger import CO2Ledger, SNAPSHOT_EVERY, create_tables, empty_totals
+
+
+@pytest.fixture
+def connection(tmp_path):
+    connection = sqlite3.connect(str(tmp_path / 'ledger.db'))
+    create_tables(connection)
+    yield connection
+    connection.close()
+
+
+def test_balance_is_kept_in_whole_grams(connection):
+    ledger = CO2Ledger(connection, 'alice')
+    for _ in range(10):
+        ledger.record('trip', 100)
+    ledger.record('reward', 0, 'potion', 2)
+    ledger.record('exchange', -600, None, 1)
+    assert ledger.totals['balance_g'] == 400
+    assert ledger.balance_kg() == 0.4
+    assert ledger.totals['saved_g'] == 1000
+    assert ledger.totals['exchanged_g'] == 600
+    assert ledger.totals['trips'] == 10
+    assert ledger.totals['challenges'] == 1
+    assert ledger.totals['rewards'] == {'potion': 2}
+
+
+def test_unknown_event_is_refused(connection):
+    ledger = CO2Ledger(connection, 'alice')
+    with pytest.raises(ValueError):
+        ledger.record('gift', 100)
+    assert len(ledger) == 0
+    assert ledger.totals == empty_totals()
+
+
+def test_reopening_reads_the_latest_snapshot(connection):
+    ledger = CO2Ledger(connection, 'alice')
+    ledger.record_many([('trip', 7, None, 0)] * (SNAPSHOT_EVERY * 2 + 5))
+    snapshots = connection.execute('SELECT seq FROM ledger_snapshots WHERE user_id = ?', ('alice',)).fetchall()
+    assert snapshots == [(SNAPSHOT_EVERY,), (SNAPSHOT_EVERY * 2,)]
+
+    reopened = CO2Ledger(connection, 'alice')
+    assert len(reopened) == SNAPSHOT_EVERY * 2 + 5
+    assert reopened.totals == ledger.totals == ledger.replay()
+    assert CO2Ledger(connection, 'bob').totals == empty_totals()
+
+
+def test_compact_folds_old_events_without_changing_totals(connection):
+    ledger = CO2Ledger(connection, 'alice')
+    ledger.record_many([('trip', 10, None, 0)] * 30, timestamp=1000)
+    ledger.record_many([('exchange', -50, None, 1)], timestamp=2000)
+    ledger.record_many([('trip', 5, None, 0)] * 3, timestamp=3000)
+    assert ledger.compact(2500) == 31
+    assert [seq for seq, *_ in ledger.events()] == [32, 33, 34]
+    assert ledger.replay() == ledger.totals
+    assert CO2Ledger(connection, 'alice').totals == ledger.totals
+    assert ledger.totals['balance_g'] == 265
+
+
+def test_staged_events_are_written_only_with_the_transaction(connection):
+    ledger = CO2Ledger(connection, 'alice')
+    ledger.stage([('trip', 250, None, 0)])
+    assert ledger.balance_kg() == 0.25
+    assert CO2Ledger(connection, 'alice').totals == empty_totals()
+
+    with connection:
+        ledger.write_pending()
+    ledger.clear_pending()
+    assert CO2Ledger(connection, 'alice').totals == ledger.totals
@@ -0,0 +1,44 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from emission_model import MODES, co2_emitted, encode_modes, score_segments, score_trips, travel_time
+
+
+def test_trip_totals_match_a_loop_over_the_segments():
+    rng = random.Random(6)
+    trip_count = 50
+    modes = [rng.choice(MODES) for _ in range(400)]
+    distances = [rng.uniform(0.1, 5.0) for _ in modes]
+    durations = [rng.choice([float('nan'), rng.uniform(1, 30)]) for _ in modes]
+    # Trip 0 is left without segments
+    trip_ids = [rng.randrange(1, trip_count) for _ in modes]
+
+    scores = score_segments(encode_modes(modes), distances, durations, trip_ids, trip_count)
+
+    for trip in range(trip_count):
+        distance = time = co2 = 0.0
+        for mode, km, minutes, trip_id in zip(modes, distances, durations, trip_ids):
+            if trip_id == trip:
+                distance += km
+                time += travel_time(mode, km) if math.isnan(minutes) else minutes
+                co2 += co2_emitted(mode, km)
+        assert scores['distance'][trip] == pytest.approx(distance)
+        assert scores['time'][trip] == pytest.approx(time)
+        assert scores['co2'][trip] == pytest.approx(co2)
+        assert scores['co2_saved'][trip] == pytest.approx(co2_emitted('driving', distance) - co2)
+    assert scores['distance'][0] == 0.0
+
+
+def test_segments_are_scored_one_by_one_without_trip_ids():
+    scores = score_segments(encode_modes(['driving', 'walking']), [10.0, 1.0])
+    assert np.allclose(scores['time'], [travel_time('driving', 10.0), travel_time('walking', 1.0)])
+    assert np.allclose(scores['co2_saved'], [0.0, co2_emitted('driving', 1.0)])
+
+
+def test_score_trips_keeps_empty_trips():
+    scores = score_trips([[('bus', 4.0), ('walking', 0.5)], [], [('cycling', 3.0)]])
+    assert scores['distance'].tolist() == pytest.approx([4.5, 0.0, 3.0])
+    assert scores['co2'][0] == pytest.approx(co2_emitted('bus', 4.0))
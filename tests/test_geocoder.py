@@ -0,0 +1,58 @@
+import pytest
+
+from geocoder import Geocoder, edit_distance
+
+ADDRESSES = [
+    ('Main Street 1', 52.50, 13.40),
+    ('Main Street 12', 52.51, 13.41),
+    ('Main Street 12', 52.51, 13.42),     # second entrance
+    ('Mainz Avenue 3', 52.52, 13.43),
+    ('Central Station', 52.53, 13.44),
+    ('City Library', 52.54, 13.45),
+    ('Rosenthaler Platz', 52.55, 13.46),
+]
+
+
+@pytest.fixture
+def geocoder():
+    return Geocoder.build(ADDRESSES)
+
+
+def test_prefix_completion_lists_each_address_once(geocoder):
+    assert geocoder.complete('main st') == ['Main Street 1', 'Main Street 12']
+    assert geocoder.complete('MAIN, street 12') == ['Main Street 12']
+    assert geocoder.complete('c', limit=1) == ['Central Station']
+    assert geocoder.complete('  ') == []
+
+
+def test_misspelled_words_are_corrected(geocoder):
+    # A swapped pair, a missing letter and a wrong letter
+    assert geocoder.complete('cetnral') == ['Central Station']
+    assert geocoder.complete('rosenthaler plaz') == ['Rosenthaler Platz']
+    assert geocoder.complete('city libary') == ['City Library']
+    assert geocoder.complete('qqqq') == []
+
+
+def test_locate_takes_the_exact_name_or_a_close_one(geocoder):
+    assert geocoder.locate('main street 1') == (52.50, 13.40)
+    assert geocoder.locate('Mainz Avenue 3') == (52.52, 13.43)
+    assert geocoder.locate('Central Statoin') == (52.53, 13.44)
+    assert geocoder.locate('Central') is None
+    assert geocoder.locate('Airport') is None
+
+
+def test_edit_distance_counts_a_swap_as_one_edit():
+    assert edit_distance('statoin', 'station', 2) == 1
+    assert edit_distance('libary', 'library', 2) == 1
+    assert edit_distance('abcdef', 'uvwxyz', 2) == 3
+
+
+def test_index_is_cached_next_to_the_file(tmp_path):
+    path = tmp_path / 'addresses.csv'
+    path.write_text('name,lat,lon\n' + ''.join(f"{name},{lat},{lon}\n" for name, lat, lon in ADDRESSES),
+                    encoding='utf-8')
+    first = Geocoder.load(str(path))
+    assert (tmp_path / 'addresses.csv.cache').exists()
+    cached = Geocoder.load(str(path))
+    assert cached.keys == first.keys
+    assert cached.complete('rosen') == ['Rosenthaler Platz']
@@ -0,0 +1,56 @@
+import csv
+
+import pytest
+
+from isochrone import Isochrone
+from road_network import RoadNetwork
+
+# Grid of SIZE x SIZE nodes 150 m apart with a bus line along the first row
+SIZE = 10
+BUDGET = 10 * 60
+
+
+@pytest.fixture
+def network(tmp_path):
+    with open(tmp_path / 'nodes.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'lat', 'lon'])
+        for row in range(SIZE):
+            for col in range(SIZE):
+                writer.writerow([f"n{row}-{col}", 52.0 + row * 0.00135, 13.0 + col * 0.0022])
+    with open(tmp_path / 'edges.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['source', 'target', 'length_m', 'bus_kmh', 'profile'])
+        for row in range(SIZE):
+            for col in range(SIZE):
+                for next_row, next_col in ((row + 1, col), (row, col + 1)):
+                    if next_row < SIZE and next_col < SIZE:
+                        writer.writerow([f"n{row}-{col}", f"n{next_row}-{next_col}", 150,
+                                         40 if row == next_row == 0 else 0, 'free'])
+    return RoadNetwork.load(str(tmp_path))
+
+
+def reach(network, mode):
+    isochrone = Isochrone(network, network.node_index['n0-0'], mode)
+    isochrone.extend(BUDGET)
+    return isochrone.summary(BUDGET)
+
+
+def test_no_bikes_to_pick_up_without_docks(network):
+    assert network.dock_nodes is None
+    bus, bus_cycling = reach(network, 'bus'), reach(network, 'bus_cycling')
+    assert (bus_cycling['places'], bus_cycling['area']) == (bus['places'], bus['area'])
+
+
+def test_bike_from_a_dock_reaches_further(network):
+    network.dock_nodes = {network.node_index[f"n0-{SIZE - 1}"]}
+    assert reach(network, 'bus_cycling')['places'] > reach(network, 'bus')['places']
+
+
+def test_wider_budget_carries_on_from_the_last_one(network):
+    isochrone = Isochrone(network, network.node_index['n0-0'], 'walking')
+    isochrone.extend(BUDGET / 2)
+    isochrone.extend(BUDGET)
+    fresh = reach(network, 'walking')
+    assert isochrone.summary(BUDGET) == fresh
+    assert isochrone.summary(BUDGET / 2)['places'] < fresh['places']
@@ -0,0 +1,75 @@
+import csv
+import random
+
+import pytest
+
+from landmark_index import LandmarkIndex, index_path, one_to_all
+from road_network import RoadNetwork
+
+# Grid of SIZE x SIZE nodes about 100 m apart
+SIZE = 12
+
+
+def write_network(directory, seed=5, driving_kmh=''):
+    """Grid network with random street lengths, some one-way streets and some car-free ones"""
+    rng = random.Random(seed)
+    with open(directory / 'nodes.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'lat', 'lon'])
+        for row in range(SIZE):
+            for col in range(SIZE):
+                writer.writerow([f"n{row}-{col}", 52.0 + row * 0.0009, 13.0 + col * 0.0015])
+    with open(directory / 'edges.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['source', 'target', 'length_m', 'oneway', 'driving_kmh', 'cycling_kmh'])
+        for row in range(SIZE):
+            for col in range(SIZE):
+                for next_row, next_col in ((row + 1, col), (row, col + 1)):
+                    if next_row < SIZE and next_col < SIZE:
+                        writer.writerow([f"n{row}-{col}", f"n{next_row}-{next_col}", rng.randint(100, 300),
+                                         int(rng.random() < 0.2), 0 if rng.random() < 0.1 else driving_kmh,
+                                         rng.choice(['', 10, 20])])
+
+
+@pytest.fixture
+def network(tmp_path):
+    write_network(tmp_path)
+    network = RoadNetwork.load(str(tmp_path))
+    network.landmark_index = LandmarkIndex.build(network, count=4)
+    return network
+
+
+def test_alt_paths_are_as_short_as_dijkstra(network):
+    rng = random.Random(1)
+    for mode in ('driving', 'walking', 'cycling'):
+        for _ in range(20):
+            source, target = rng.randrange(network.node_count), rng.randrange(network.node_count)
+            seconds = one_to_all(network.offsets, network.targets, network.edge_times[mode], source)[target]
+            path = network.shortest_path(source, target, mode)
+            if path is None:
+                assert seconds >= 1e29
+                continue
+            assert path['time'] * 60 == pytest.approx(seconds, rel=1e-4)
+            assert sum(network.edge_times[mode][e] for e in path['edges']) == pytest.approx(seconds, rel=1e-4)
+
+
+def test_index_round_trips_through_a_file(network, tmp_path):
+    path = index_path(str(tmp_path))
+    network.landmark_index.save(path)
+    loaded = LandmarkIndex.load(path, network.landmark_index.fingerprint)
+    assert loaded.landmarks == network.landmark_index.landmarks
+    assert loaded.forward == network.landmark_index.forward
+    assert loaded.backward == network.landmark_index.backward
+
+
+def test_stale_index_is_rebuilt(network, tmp_path):
+    network.landmark_index.save(index_path(str(tmp_path)))
+    old_fingerprint = network.landmark_index.fingerprint
+
+    # Same nodes, other speeds: the saved bounds no longer hold
+    write_network(tmp_path, driving_kmh=60)
+    changed = RoadNetwork.load(str(tmp_path))
+    assert LandmarkIndex.load(index_path(str(tmp_path)), old_fingerprint) is not None
+    assert changed.load_landmark_index()
+    assert changed.landmark_index.fingerprint != old_fingerprint
+    assert LandmarkIndex.load(index_path(str(tmp_path))).fingerprint == changed.landmark_index.fingerprint
@@ -0,0 +1,80 @@
+import random
+
+from co2_ledger import CO2Ledger, SNAPSHOT_EVERY
+from leaderboard import Leaderboard, RankTree
+from profile_store import ProfileStore
+
+
+def sorted_board(scores):
+    return sorted(scores.items(), key=lambda entry: (-entry[1], entry[0]))
+
+
+def test_ranks_follow_updates():
+    random.seed(3)
+    scores = {f"user-{i:03d}": random.randint(0, 50) for i in range(200)}
+    tree = RankTree.build(scores)
+    for _ in range(500):
+        user = random.choice(list(scores))
+        scores[user] = random.randint(0, 50)
+        tree.update(user, scores[user])
+    tree.discard('user-000')
+    del scores['user-000']
+
+    expected = sorted_board(scores)
+    assert len(tree) == len(scores)
+    assert tree.top(10) == expected[:10]
+    assert tree.top(10, start=50) == expected[50:60]
+    for rank, (user, _) in enumerate(expected, 1):
+        assert tree.rank(user) == rank
+    assert tree.rank('user-000') is None
+
+
+def test_build_matches_inserting_one_by_one():
+    scores = {'carol': 5, 'alice': 5, 'bob': 9, 'dave': 0}
+    tree = RankTree()
+    for user, score in scores.items():
+        tree.update(user, score)
+    assert RankTree.build(scores).top(4) == tree.top(4) == [('bob', 9), ('alice', 5), ('carol', 5), ('dave', 0)]
+
+
+def test_co2_board_ranks_by_lifetime_savings(store, root):
+    profile = ProfileStore(store, root, 'alice')
+    profile.record(('trip', 3000, None, 0))
+    profile.changed('total_co2_saved')
+    profile.switch_user('bob')
+    profile.record(*[('trip', 2, None, 0)] * (SNAPSHOT_EVERY + 500))
+    profile.changed('total_co2_saved')
+    profile.flush()
+    root.run_pending()
+
+    leaderboard = profile.ranking()
+    assert leaderboard.top('co2', 2) == [('alice', 3000), ('bob', 2 * (SNAPSHOT_EVERY + 500))]
+
+    # Spending CO₂ on challenges lowers alice's balance but not her place
+    profile.switch_user('alice')
+    profile.record(('exchange', -3000, None, 1))
+    profile.changed('total_co2_saved')
+    assert profile.data['total_co2_saved'] == 0
+    assert leaderboard.rank('co2', 'alice') == 1
+
+    # A board read back from the database agrees (bob's total comes from a snapshot and the events after it)
+    profile.flush()
+    root.run_pending()
+    assert Leaderboard.load(store.connection).top('co2', 2) == leaderboard.top('co2', 2)
+    assert CO2Ledger(store.connection, 'bob').totals['saved_g'] == 2 * (SNAPSHOT_EVERY + 500)
+
+
+def test_profile_boards_move_on_change(store, root):
+    profile = ProfileStore(store, root, 'alice')
+    profile.data['eco_routes_taken'] = 4
+    profile.changed('eco_routes_taken')
+    profile.switch_user('bob')
+    profile.data['eco_routes_taken'] = 2
+    profile.changed('eco_routes_taken')
+
+    leaderboard = profile.ranking()
+    assert leaderboard.rank('eco_routes', 'bob') == 2
+    profile.data['eco_routes_taken'] = 7
+    profile.changed('eco_routes_taken')
+    assert leaderboard.rank('eco_routes', 'bob') == 1
+    assert leaderboard.top('eco_routes', 2) == [('bob', 7), ('alice', 4)]
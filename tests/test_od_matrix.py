@@ -0,0 +1,107 @@
+import time
+
+import od_matrix
+from od_matrix import ODMatrix
+from route_cache import RouteCache
+from route_worker import RouteWorker
+from test_batch_plan import write_grid
+
+
+class FakePlanner:
+    """Plans every pair except the ones it was told to fail on"""
+
+    network = object()
+
+    def __init__(self, failing):
+        self.failing = failing
+        self.planned = []
+
+    def route_options(self, start, end, departure=None):
+        self.planned.append((start, end))
+        if (start, end) in self.failing:
+            raise RuntimeError("broken timetable")
+        return [{'name': f"{start} -> {end}", 'eco': True, 'rewards': ['potion']}]
+
+    def iter_route_options(self, start, end, departure=None):
+        yield self.route_options(start, end, departure)
+
+
+def test_a_failing_pair_does_not_stop_the_others():
+    cache = RouteCache()
+    matrix = ODMatrix(cache)
+    for start, end, queries in (('home', 'office', 3), ('office', 'gym', 2), ('gym', 'home', 1)):
+        for _ in range(queries):
+            matrix.record(start, end)
+    planner = FakePlanner({('office', 'gym')})
+
+    matrix.warm(planner)
+    matrix.poll()
+    assert planner.planned == [('home', 'office'), ('office', 'gym'), ('gym', 'home')]
+    assert matrix.failed == 1
+    assert matrix.warmed == 2
+    assert cache.get(cache.make_key('gym', 'home')) == [{'name': 'gym -> home', 'eco': True, 'rewards': []}]
+    assert cache.get(cache.make_key('office', 'gym')) is None
+
+    # Pairs already cached are not planned again
+    planner.planned = []
+    matrix.warm(planner)
+    assert planner.planned == [('office', 'gym')]
+
+
+def test_reload_clears_the_cache_and_tells_the_windows():
+    cache = RouteCache(fingerprint=['old'])
+    cache.put(cache.make_key('home', 'office'), [])
+    matrix = ODMatrix(cache)
+    reloads = []
+    matrix.subscribe(lambda: reloads.append(True))
+
+    # The first load of the files the saved cache was planned on keeps it
+    matrix.results.put(('planner', ['old']))
+    matrix.poll()
+    assert reloads == [True]
+    assert cache.make_key('home', 'office') in cache
+
+    matrix.results.put(('planner', ['new']))
+    matrix.poll()
+    assert reloads == [True, True]
+    assert cache.fingerprint == ['new']
+    assert cache.make_key('home', 'office') not in cache
+
+
+def wait_for(condition, seconds=5.0):
+    deadline = time.monotonic() + seconds
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_changed_files_are_loaded_again_within_seconds(tmp_path, monkeypatch):
+    monkeypatch.setattr(od_matrix, 'DATA_CHECK_SECONDS', 0.02)
+    write_grid(tmp_path)
+    matrix = ODMatrix(RouteCache(), network_dir=str(tmp_path), feed_dir=str(tmp_path / 'gtfs'),
+                      address_file=str(tmp_path / 'addresses.csv'))
+    reloads = []
+    matrix.subscribe(lambda: reloads.append(matrix.planner()))
+
+    # Nothing is loaded yet, and asking does not wait for it
+    assert matrix.planner() is None
+    matrix.start()
+    try:
+        wait_for(lambda: matrix.poll() or reloads)
+        assert reloads[0].network.node_count == 16
+
+        write_grid(tmp_path, size=5)
+        wait_for(lambda: matrix.poll() or len(reloads) > 1)
+        assert reloads[1].network.node_count == 25
+    finally:
+        matrix.stop()
+        matrix.thread.join()
+
+
+def test_queries_wait_for_the_planner():
+    worker = RouteWorker(None)
+    worker.submit('home', 'office')
+    worker.set_planner(FakePlanner(set()))
+    wait_for(lambda: worker.results.qsize() >= 2)
+    assert [kind for kind, _ in worker.poll()] == ['result', 'done']
+    worker.stop()
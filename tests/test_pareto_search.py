@@ -0,0 +1,115 @@
+import csv
+
+import pytest
+
+from landmark_index import LandmarkIndex
+from pareto_search import ParetoSearch, non_dominated
+from road_network import RoadNetwork
+from route_planner import RoutePlanner
+
+# Grid of SIZE x SIZE nodes 150 m apart with a bus line along the first row
+SIZE = 10
+
+
+@pytest.fixture
+def network(tmp_path):
+    with open(tmp_path / 'nodes.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'lat', 'lon'])
+        for row in range(SIZE):
+            for col in range(SIZE):
+                writer.writerow([f"n{row}-{col}", 52.0 + row * 0.00135, 13.0 + col * 0.0022])
+    with open(tmp_path / 'edges.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['source', 'target', 'length_m', 'bus_kmh', 'profile'])
+        for row in range(SIZE):
+            for col in range(SIZE):
+                for next_row, next_col in ((row + 1, col), (row, col + 1)):
+                    if next_row < SIZE and next_col < SIZE:
+                        writer.writerow([f"n{row}-{col}", f"n{next_row}-{next_col}", 150,
+                                         40 if row == next_row == 0 else 0, 'free'])
+    return RoadNetwork.load(str(tmp_path))
+
+
+def node(network, row, col):
+    return network.node_index[f"n{row}-{col}"]
+
+
+def option(route_type, time, co2=0.0, transfers=0, active=0.0):
+    return {'type': route_type, 'time': time, 'co2': co2, 'transfers': transfers, 'active_distance': active}
+
+
+def test_every_kind_of_trip_keeps_its_fastest_option():
+    walking = option('walking', 20, active=1.5)
+    slow_walking = option('walking_b', 25, active=1.5)
+    cycling = option('cycling', 8, active=1.5)
+    driving = option('driving', 5, co2=0.4)
+    bus = option('bus_a', 12, co2=0.1, active=0.5)
+    slow_bus = option('bus_b', 30, co2=0.2, active=0.5)
+    assert non_dominated([driving, bus, slow_bus, walking, slow_walking, cycling]) == [driving, bus, walking, cycling]
+
+
+def test_no_bike_to_pick_up_without_docks(network):
+    trips = ParetoSearch(network).search(node(network, 0, 0), node(network, 5, 9))
+    assert trips
+    for trip in trips:
+        modes = [leg['mode'] for leg in trip['legs']]
+        assert 'cycling' not in modes[1:]
+
+
+def test_bike_picked_up_at_a_dock(network):
+    network.dock_nodes = {node(network, 0, 9)}
+    trips = ParetoSearch(network).search(node(network, 0, 0), node(network, 9, 9))
+    assert ['bus', 'cycling'] in [[leg['mode'] for leg in trip['legs']] for trip in trips]
+
+
+def test_walking_is_offered_next_to_faster_cycling(network):
+    planner = RoutePlanner(network)
+    *_, route_types = planner.build_route_options(node(network, 3, 2), node(network, 6, 6))
+    families = {route['type'].split('_')[0] for route in route_types if not route['type'].startswith('bus')}
+    assert {'driving', 'walking', 'cycling'} <= families
+
+
+def test_road_bus_legs_are_not_given_made_up_lines(network):
+    planner = RoutePlanner(network)
+    *_, route_types = planner.build_route_options(node(network, 0, 0), node(network, 1, 9))
+    lines = {segment.line for route in route_types for segment in route['segments'] if segment.mode == 'bus'}
+    assert lines == {'Bus'}
+
+
+
+def two_lines(directory, columns=21):
+    """Three streets 100 m apart with nodes every 500 m: a 60 km/h bus line, a 300 km/h one, and no bus"""
+    with open(directory / 'nodes.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'lat', 'lon'])
+        for row in range(3):
+            for col in range(columns):
+                writer.writerow([f"n{row}-{col}", 52.0 + row * 0.0009, 13.0 + col * 0.0073])
+    with open(directory / 'edges.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['source', 'target', 'length_m', 'bus_kmh', 'profile'])
+        for row in range(3):
+            for col in range(columns):
+                if row < 2:
+                    writer.writerow([f"n{row}-{col}", f"n{row + 1}-{col}", 100, 0, 'free'])
+                if col + 1 < columns:
+                    writer.writerow([f"n{row}-{col}", f"n{row}-{col + 1}", 500, (60, 300, 0)[row], 'free'])
+    return RoadNetwork.load(str(directory))
+
+
+def criteria(trips):
+    return [(round(trip['time'], 6), trip['transfers'], round(trip['active_distance'], 6)) for trip in trips]
+
+
+def test_landmark_bounds_keep_the_fastest_mixed_trip(tmp_path, monkeypatch):
+    # Walking over to the fast line beats staying on the slow one; single-mode
+    # bounds overestimate the walk and used to drop that trip
+    network = two_lines(tmp_path)
+    network.landmark_index = LandmarkIndex.build(network, count=4)
+    source, target = network.node_index['n0-0'], network.node_index['n0-20']
+    bounded = ParetoSearch(network).search(source, target)
+    assert [leg['mode'] for leg in bounded[0]['legs']] == ['walking', 'bus', 'walking']
+
+    monkeypatch.setattr(ParetoSearch, 'lower_bounds', lambda self, source, target: lambda node, state: 0.0)
+    assert criteria(bounded) == criteria(ParetoSearch(network).search(source, target))
@@ -0,0 +1,122 @@
+import json
+import os
+
+import pytest
+
+from profile_schema import SCHEMA_VERSION, import_jsonl, migrate_database, profile_version, upgrade
+from profile_store import ProfileStore
+
+NAVIGATION_PROFILE = {
+    'total_co2_saved': 1.5,
+    'game_challenges': 2,
+    'inventory': {'potions': 1, 'iron_sword': 0, 'iron_armor': 0},
+    'eco_routes_taken': 3
+}
+
+DRAGON_PROFILE = dict(
+    NAVIGATION_PROFILE,
+    player={'level': 4, 'exp': 5, 'attack': 30, 'defense': 12, 'max_hp': 130,
+            'inventory': {'potions': 2, 'iron_sword': 1, 'iron_armor': 0}}
+)
+
+
+def copy(data):
+    return json.loads(json.dumps(data))
+
+
+def test_navigation_profile_is_upgraded_to_current_version():
+    data = copy(NAVIGATION_PROFILE)
+    assert profile_version(data) == 1
+    assert upgrade(data)
+    assert data['total_calories'] == 0.0
+    assert data['schema_version'] == SCHEMA_VERSION
+    assert not upgrade(data)
+
+
+def test_dragon_profile_is_upgraded_to_current_version():
+    data = copy(DRAGON_PROFILE)
+    assert profile_version(data) == 2
+    assert upgrade(data)
+    assert 'inventory' not in data['player']
+    assert data['player']['level'] == 4
+    # The hero's items are merged into the top-level inventory, not dropped or counted twice
+    assert data['inventory'] == {'potions': 2, 'iron_sword': 1, 'iron_armor': 0}
+
+
+def test_shipped_user_data_file_keeps_its_potions_once(store, root):
+    # The hero's 2 potions include the 1 copied from the top level when the game started
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'user_data.json')
+    store.import_json(path, 'default')
+    profile = ProfileStore(store, root)
+    assert profile.data['inventory'] == {'potions': 2, 'iron_sword': 0, 'iron_armor': 0}
+    profile.changed('inventory')
+    profile.flush()
+    assert 'player.inventory.potions' not in store.fields('default')
+    assert store.load('default')['inventory']['potions'] == 2
+
+
+def test_newer_profile_is_refused():
+    with pytest.raises(ValueError):
+        upgrade({'schema_version': SCHEMA_VERSION + 1})
+
+
+def test_migrate_database_upgrades_every_profile_once(store):
+    store.save_many([('a', copy(NAVIGATION_PROFILE)), ('b', copy(DRAGON_PROFILE)),
+                     ('c', dict(copy(NAVIGATION_PROFILE), total_calories=1.0, schema_version=SCHEMA_VERSION))])
+    assert migrate_database(store, chunk=2) == (3, 2)
+    assert migrate_database(store, chunk=2) == (3, 0)
+    for user in 'abc':
+        assert store.load(user)['schema_version'] == SCHEMA_VERSION
+    assert store.load('a')['total_calories'] == 0.0
+    assert store.load('c')['total_calories'] == 1.0
+
+
+def test_import_jsonl_round_trips_through_export(store, tmp_path):
+    path = tmp_path / 'profiles.jsonl'
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(5):
+            f.write(json.dumps({'user_id': f"user-{i}", 'profile': DRAGON_PROFILE}) + '\n\n')
+    assert import_jsonl(store, str(path), chunk=2) == 5
+
+    store.export_json(str(tmp_path / 'user-4.json'), 'user-4')
+    with open(tmp_path / 'user-4.json', encoding='utf-8') as f:
+        exported = json.load(f)
+    expected = copy(DRAGON_PROFILE)
+    upgrade(expected)
+    assert exported == expected
+
+
+def test_profile_is_upgraded_lazily_on_load(store, root):
+    store.save(copy(NAVIGATION_PROFILE), 'alice')
+    profile = ProfileStore(store, root, 'alice')
+    assert profile.data['schema_version'] == SCHEMA_VERSION
+    assert 'schema_version' not in store.fields('alice')
+
+    profile.changed('eco_routes_taken')
+    profile.flush()
+    assert store.load('alice')['schema_version'] == SCHEMA_VERSION
+
+
+def test_newer_profile_is_not_overwritten_on_switch(store, root):
+    newer = {'schema_version': 99, 'eco_routes_taken': 500, 'inventory': {'potions': 9}, 'future': 'x'}
+    store.save(copy(newer), 'bob')
+    profile = ProfileStore(store, root, 'alice')
+    profile.data['eco_routes_taken'] = 24
+    profile.changed('eco_routes_taken')
+
+    with pytest.raises(ValueError):
+        profile.switch_user('bob')
+    assert profile.user == 'alice'
+    assert profile.data['eco_routes_taken'] == 24
+
+    profile.changed('eco_routes_taken')
+    profile.flush()
+    assert store.load('bob') == newer
+    assert store.load('alice')['eco_routes_taken'] == 24
+
+
+def test_newer_profile_is_refused_at_start(store, root):
+    store.save({'schema_version': 99, 'eco_routes_taken': 500}, 'bob')
+    with pytest.raises(ValueError):
+        ProfileStore(store, root, 'bob')
+    assert store.load('bob') == {'schema_version': 99, 'eco_routes_taken': 500}
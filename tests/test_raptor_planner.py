@@ -0,0 +1,88 @@
+import csv
+
+from gtfs_feed import TransitFeed, parse_time
+from raptor_planner import RaptorPlanner
+
+# Two lines on an east-west street: A runs S1 -> S2, B runs S3 -> S4 (0.001° of longitude is about 70 m)
+STOPS = {
+    'S0': 12.998,  # a short walk before S1
+    'S1': 13.0,
+    'S2': 13.05,
+    'S3': 13.052,  # a short walk after S2
+    'S4': 13.1
+}
+
+TRIPS = [
+    ('A', 'a1', [('S1', '08:00:00'), ('S2', '08:10:00')]),
+    ('B', 'b1', [('S3', '08:15:00'), ('S4', '08:30:00')]),
+    ('B', 'b2', [('S3', '08:25:00'), ('S4', '08:40:00')])
+]
+
+
+def write_rows(path, header, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def load_feed(directory, stops=STOPS, transfers=None):
+    write_rows(directory / 'stops.txt', ['stop_id', 'stop_name', 'stop_lat', 'stop_lon'],
+               [(stop, stop, 52.0, lon) for stop, lon in stops.items()])
+    write_rows(directory / 'routes.txt', ['route_id', 'route_short_name'], [('A', 'A'), ('B', 'B')])
+    write_rows(directory / 'trips.txt', ['route_id', 'service_id', 'trip_id'],
+               [(route, 'daily', trip) for route, trip, _ in TRIPS])
+    write_rows(directory / 'stop_times.txt',
+               ['trip_id', 'arrival_time', 'departure_time', 'stop_id', 'stop_sequence'],
+               [(trip, time, time, stop, sequence)
+                for _, trip, stop_times in TRIPS for sequence, (stop, time) in enumerate(stop_times)])
+    if transfers is not None:
+        write_rows(directory / 'transfers.txt', ['from_stop_id', 'to_stop_id', 'transfer_type', 'min_transfer_time'],
+                   transfers)
+    feed = TransitFeed.import_gtfs(str(directory))
+    return feed, {stop: i for i, stop in enumerate(feed.stop_ids)}
+
+
+def plan(feed, stops, origin='S1', destination='S4'):
+    return RaptorPlanner(feed).plan({stops[origin]: 0}, {stops[destination]: 0}, parse_time('07:55:00'))
+
+
+def test_single_trip(tmp_path):
+    feed, stops = load_feed(tmp_path)
+    journeys = plan(feed, stops, destination='S2')
+    assert [(journey['arrival'], journey['trips']) for journey in journeys] == [(parse_time('08:10:00'), 1)]
+    assert journeys[0]['legs'][0]['route'] == 'A'
+
+
+def test_nearby_stops_are_linked_by_a_walk(tmp_path):
+    feed, stops = load_feed(tmp_path)
+    journeys = plan(feed, stops)
+    assert [(journey['arrival'], journey['trips']) for journey in journeys] == [(parse_time('08:30:00'), 2)]
+    assert [leg['type'] for leg in journeys[0]['legs']] == ['bus', 'walk', 'bus']
+    walk = journeys[0]['legs'][1]
+    assert (walk['from_stop'], walk['to_stop']) == (stops['S2'], stops['S3'])
+
+
+def test_no_transfer_between_distant_stops(tmp_path):
+    feed, stops = load_feed(tmp_path, dict(STOPS, S3=13.06))
+    assert plan(feed, stops) == []
+
+
+def test_transfers_file_overrides_the_walk(tmp_path):
+    # A slow transfer misses b1 and catches b2
+    feed, stops = load_feed(tmp_path, transfers=[('S2', 'S3', 2, 900)])
+    assert [journey['arrival'] for journey in plan(feed, stops)] == [parse_time('08:40:00')]
+
+    # A forbidden transfer leaves no way to S4; a listed one links stops too far apart to walk
+    feed, stops = load_feed(tmp_path, transfers=[('S2', 'S3', 3, '')])
+    assert plan(feed, stops) == []
+    feed, stops = load_feed(tmp_path, dict(STOPS, S3=13.06), transfers=[('S2', 'S3', 2, 300)])
+    assert [journey['arrival'] for journey in plan(feed, stops)] == [parse_time('08:30:00')]
+
+
+def test_first_trip_can_be_boarded_after_a_walk(tmp_path):
+    feed, stops = load_feed(tmp_path)
+    journeys = plan(feed, stops, origin='S0', destination='S2')
+    assert [(journey['arrival'], journey['trips']) for journey in journeys] == [(parse_time('08:10:00'), 1)]
+    assert [leg['type'] for leg in journeys[0]['legs']] == ['walk', 'bus']
+    assert journeys[0]['legs'][0]['from_stop'] == stops['S0']
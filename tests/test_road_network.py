@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from landmark_index import LandmarkIndex, index_path, one_to_all
+from road_network import RoadNetwork, load_network
+from test_landmark_index import write_network
+
+
+def write_line(directory, profile=''):
+    """Three nodes in a row: a two-way street a-b and a one-way, car-free street b-c"""
+    (directory / 'nodes.csv').write_text('id,lat,lon,name\na,52.0,13.0,Alpha\nb,52.0,13.002,\nc,52.0,13.004,\n',
+                                         encoding='utf-8')
+    (directory / 'edges.csv').write_text('source,target,length_m,oneway,driving_kmh,walking_kmh,profile\n'
+                                         f'b,c,200,1,0,,{profile}\n'
+                                         f'a,b,100,0,36,,{profile}\n', encoding='utf-8')
+
+
+def test_edges_are_stored_as_csr_arrays(tmp_path):
+    write_line(tmp_path)
+    network = RoadNetwork.load(str(tmp_path))
+    a, b, c = (network.node_index[node] for node in 'abc')
+
+    # a -> b; b -> a and b -> c; nothing leaves c (one-way)
+    assert list(network.offsets) == [0, 1, 3, 3]
+    assert network.targets[0] == b
+    assert sorted(network.targets[1:3]) == [a, c]
+    assert network.edge_count == 3
+
+    edges = {(u, network.targets[e]): e for u in range(3) for e in range(network.offsets[u], network.offsets[u + 1])}
+    assert network.lengths[edges[b, c]] == 200
+    assert network.edge_times['driving'][edges[a, b]] == pytest.approx(10.0)
+    assert network.edge_times['driving'][edges[b, c]] == -1
+    assert network.edge_times['walking'][edges[b, c]] == pytest.approx(144.0)
+    assert network.find_node(' alpha ') == a
+
+
+def test_a_star_is_as_short_as_dijkstra_without_an_index(tmp_path):
+    write_network(tmp_path)
+    network = RoadNetwork.load(str(tmp_path))
+    assert network.landmark_index is None
+    rng = random.Random(2)
+    for mode in ('driving', 'walking', 'cycling'):
+        for _ in range(20):
+            source, target = rng.randrange(network.node_count), rng.randrange(network.node_count)
+            seconds = one_to_all(network.offsets, network.targets, network.edge_times[mode], source)[target]
+            path = network.shortest_path(source, target, mode)
+            if path is None:
+                assert seconds >= 1e29
+                continue
+            assert path['time'] * 60 == pytest.approx(seconds, rel=1e-4)
+            assert network.search(source, target, mode)['edges'] == path['edges']
+            assert path['nodes'][0] == source and path['nodes'][-1] == target
+
+
+def test_peak_departure_slows_driving_on_urban_streets(tmp_path):
+    write_line(tmp_path)
+    network = RoadNetwork.load(str(tmp_path))
+    a, b = network.node_index['a'], network.node_index['b']
+
+    # 08:00 is the morning peak of the urban profile (factor 0.6)
+    assert network.shortest_path(a, b, 'driving', departure=3 * 3600)['time'] == pytest.approx(10 / 60)
+    assert network.shortest_path(a, b, 'driving', departure=8 * 3600)['time'] == pytest.approx(10 / 60 / 0.6)
+    # Walking does not follow the profiles
+    assert network.shortest_path(a, b, 'walking', departure=8 * 3600)['time'] == pytest.approx(72 / 60)
+
+    write_line(tmp_path, profile='free')
+    network = RoadNetwork.load(str(tmp_path))
+    assert network.shortest_path(a, b, 'driving', departure=8 * 3600)['time'] == pytest.approx(10 / 60)
+
+
+def test_index_of_another_network_is_not_used(tmp_path):
+    write_network(tmp_path)
+    old = RoadNetwork.load(str(tmp_path))
+    LandmarkIndex.build(old, count=4).save(index_path(str(tmp_path)))
+
+    # Faster cars: the old bounds would overestimate, so the index is rebuilt on load
+    write_network(tmp_path, driving_kmh=80)
+    network = load_network(str(tmp_path))
+    assert network.landmark_index.fingerprint != LandmarkIndex.build(old, count=4).fingerprint
+    rng = random.Random(3)
+    for _ in range(20):
+        source, target = rng.randrange(network.node_count), rng.randrange(network.node_count)
+        seconds = one_to_all(network.offsets, network.targets, network.edge_times['driving'], source)[target]
+        path = network.shortest_path(source, target, 'driving')
+        if path is not None:
+            assert path['time'] * 60 == pytest.approx(seconds, rel=1e-4)
@@ -0,0 +1,68 @@
+from datetime import datetime
+
+import route_cache
+from route_cache import RouteCache
+from segments import Segment
+
+# A Monday and a Saturday
+MONDAY = datetime(2026, 10, 19, 8, 7)
+SATURDAY = datetime(2026, 10, 24, 8, 7)
+
+
+def walk(km):
+    return [{'name': f"Walk {km} km", 'segments': [Segment('walking', km, km * 12, 0.0)]}]
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = RouteCache(max_entries=2)
+    routes = walk(1)
+    cache.put('a', routes)
+    cache.put('b', walk(2))
+    assert cache.get('a') is routes     # b is now the oldest
+    cache.put('c', walk(3))
+    assert 'b' not in cache
+    assert 'a' in cache and 'c' in cache
+    assert cache.evictions == 1
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(route_cache.time, 'time', lambda: now[0])
+    cache = RouteCache(ttl=60)
+    routes = walk(1)
+    cache.put('a', routes)
+    now[0] += 60
+    assert cache.get('a') is routes
+    now[0] += 1
+    assert 'a' not in cache
+    assert cache.get('a') is None
+    assert cache.stats()['misses'] == 1
+    assert cache.entries == {}
+
+
+def test_keys_share_weekdays_and_quarter_hours():
+    cache = RouteCache()
+    key = cache.make_key('Main St, 1', 'office', MONDAY)
+    assert key == 'main st 1|office|weekday|32'
+    # Same slot on another weekday and later in the same 15 minutes
+    assert cache.make_key(' main  st 1 ', 'Office', datetime(2026, 10, 21, 8, 14)) == key
+    assert cache.make_key('main st 1', 'office', datetime(2026, 10, 19, 8, 15)) != key
+    assert cache.make_key('main st 1', 'office', SATURDAY) == 'main st 1|office|weekend|32'
+    assert RouteCache(bucket_minutes=60).departure_bucket(MONDAY) == 'weekday|8'
+
+
+def test_saved_cache_of_other_data_files_loads_empty(tmp_path):
+    path = str(tmp_path / 'route_cache.json')
+    cache = RouteCache(fingerprint=['network 1'])
+    cache.put('a', walk(1))
+    cache.put('b', walk(2))
+    cache.get('a')
+    cache.save(path)
+
+    loaded = RouteCache.load(path, fingerprint=['network 1'])
+    assert list(loaded.entries) == ['b', 'a']
+    assert loaded.get('a')[0]['segments'][0].distance == 1
+    assert loaded.hits == 2
+
+    assert RouteCache.load(path, fingerprint=['network 2']).entries == {}
+    assert RouteCache.load(str(tmp_path / 'missing.json')).entries == {}
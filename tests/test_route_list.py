@@ -0,0 +1,18 @@
+from route_list import wrapped_lines
+
+
+class FixedFont:
+    """Every character 10 px wide"""
+
+    def measure(self, text):
+        return len(text) * 10
+
+
+def test_text_that_fits_stays_on_one_line():
+    assert wrapped_lines(FixedFont(), "R3 → R107", 90) == 1
+
+
+def test_long_text_wraps_between_words():
+    # "aaaa bbbb" fits in 90 px, "cccc dddd" goes on the next line
+    assert wrapped_lines(FixedFont(), "aaaa bbbb cccc dddd", 90) == 2
+    assert wrapped_lines(FixedFont(), "aaaa bbbb cccc dddd", 40) == 4
@@ -0,0 +1,51 @@
+import csv
+from datetime import datetime
+
+import pytest
+
+from gtfs_feed import TransitFeed
+from road_network import RoadNetwork
+from route_planner import RoutePlanner
+
+# Grid of SIZE x SIZE nodes 150 m apart, with bus stops at both ends of the first row
+SIZE = 10
+LAT, LON = 0.00135, 0.0022
+DEPARTURE = datetime(2026, 10, 19, 7, 55)
+
+
+def write_rows(path, header, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+@pytest.fixture
+def planner(tmp_path):
+    write_rows(tmp_path / 'nodes.csv', ['id', 'lat', 'lon'],
+               [(f"n{row}-{col}", 52.0 + row * LAT, 13.0 + col * LON) for row in range(SIZE) for col in range(SIZE)])
+    write_rows(tmp_path / 'edges.csv', ['source', 'target', 'length_m'],
+               [(f"n{row}-{col}", f"n{next_row}-{next_col}", 150)
+                for row in range(SIZE) for col in range(SIZE)
+                for next_row, next_col in ((row + 1, col), (row, col + 1)) if next_row < SIZE and next_col < SIZE])
+    network = RoadNetwork.load(str(tmp_path))
+
+    feed_dir = tmp_path / 'gtfs'
+    feed_dir.mkdir()
+    write_rows(feed_dir / 'stops.txt', ['stop_id', 'stop_name', 'stop_lat', 'stop_lon'],
+               [('S1', 'S1', 52.0, 13.0), ('S2', 'S2', 52.0, 13.0 + (SIZE - 1) * LON)])
+    write_rows(feed_dir / 'routes.txt', ['route_id', 'route_short_name'], [('A', 'A')])
+    write_rows(feed_dir / 'trips.txt', ['route_id', 'service_id', 'trip_id'], [('A', 'daily', 'a1')])
+    write_rows(feed_dir / 'stop_times.txt', ['trip_id', 'arrival_time', 'departure_time', 'stop_id', 'stop_sequence'],
+               [('a1', '08:00:00', '08:00:00', 'S1', 0), ('a1', '08:03:00', '08:03:00', 'S2', 1)])
+    return RoutePlanner(network, TransitFeed.import_gtfs(str(feed_dir)))
+
+
+def test_feed_adds_timetabled_buses_to_the_road_network_options(planner):
+    network = planner.network
+    *_, route_types = planner.build_route_options(network.node_index['n0-0'], network.node_index[f"n0-{SIZE - 1}"],
+                                                  DEPARTURE)
+    families = {route['type'].split('_')[0] for route in route_types}
+    assert {'driving', 'walking', 'cycling', 'bus'} <= families
+    lines = {segment.line for route in route_types for segment in route['segments'] if segment.mode == 'bus'}
+    assert lines == {'A'}
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from profile_store import default_profile
+from serializers import BINARY_HEADER, BINARY_BODY, BINARY_MAGIC, SERIALIZERS, serializer_for
+
+BINARY = SERIALIZERS['binary']
+
+# A dragon-window profile with a field the binary layout has no slot for
+PROFILE = {
+    'schema_version': 3,
+    'total_co2_saved': 12.345,
+    'total_calories': 310.5,
+    'game_challenges': 2,
+    'inventory': {'potions': 3, 'iron_sword': 1, 'iron_armor': 0},
+    'eco_routes_taken': 41,
+    'player': {'level': 7, 'exp': 55, 'attack': 48, 'defense': 31, 'max_hp': 260, 'name': 'Ember'}
+}
+
+
+@pytest.mark.parametrize('data', [
+    PROFILE,
+    {},
+    default_profile(),
+    # Values the fixed layout cannot hold exactly go to the JSON tail
+    {'total_co2_saved': 5, 'game_challenges': -1, 'eco_routes_taken': 2 ** 40, 'inventory': {'potions': 1.5}},
+    {'inventory': {}, 'player': {'level': True}, 'note': 'café'}
+])
+def test_binary_round_trip(data):
+    decoded = BINARY.loads(BINARY.dumps(data))
+    assert decoded == data
+    # Types too, at every level (1 == 1.0 == True)
+    assert json.dumps(decoded, sort_keys=True) == json.dumps(data, sort_keys=True)
+
+
+def test_binary_packs_the_fixed_fields():
+    raw = BINARY.dumps({key: value for key, value in PROFILE.items() if key != 'player'} |
+                       {'player': {key: value for key, value in PROFILE['player'].items() if key != 'name'}})
+    assert raw.startswith(BINARY_MAGIC)
+    assert len(raw) == BINARY_HEADER.size + BINARY_BODY.size
+    assert len(raw) < len(SERIALIZERS['json'].dumps(PROFILE))
+
+
+def test_binary_refuses_other_data():
+    with pytest.raises(ValueError):
+        BINARY.loads(b'{"total_co2_saved": 1.0}')
+    raw = bytearray(BINARY.dumps(PROFILE))
+    raw[len(BINARY_MAGIC)] += 1
+    with pytest.raises(ValueError):
+        BINARY.loads(bytes(raw))
+
+
+def test_files_use_the_serializer_of_their_extension(store, tmp_path):
+    assert serializer_for('profile.SCP') is BINARY
+    assert serializer_for('profile.txt') is SERIALIZERS['json']
+    store.save(PROFILE, 'alice')
+    for name in ('alice.scp', 'alice.json'):
+        path = str(tmp_path / name)
+        store.export_file(path, 'alice')
+        store.import_file(path, 'bob')
+        assert store.load('bob') == PROFILE
+    with open(str(tmp_path / 'alice.scp'), 'rb') as f:
+        assert f.read().startswith(BINARY_MAGIC)
@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from spatial_index import GridIndex, distance_km
+
+
+def brute_force(lat, lon, points, radius_km):
+    """Points within radius by checking every one"""
+    found = sorted((distance_km(lat, lon, *point), i) for i, point in enumerate(points))
+    return [i for d, i in found if d <= radius_km]
+
+
+@pytest.fixture
+def points():
+    rng = random.Random(4)
+    return [(52.0 + rng.random() * 0.1, 13.0 + rng.random() * 0.15) for _ in range(2000)]
+
+
+def test_within_matches_a_linear_scan(points):
+    index = GridIndex([lat for lat, _ in points], [lon for _, lon in points])
+    rng = random.Random(5)
+    for _ in range(50):
+        lat, lon = 52.0 + rng.random() * 0.1, 13.0 + rng.random() * 0.15
+        radius = rng.choice([0.05, 0.3, 0.5, 1.2])
+        found = index.within(lat, lon, radius)
+        assert [i for i, _ in found] == brute_force(lat, lon, points, radius)
+        assert all(d <= radius for _, d in found)
+
+
+def test_points_across_a_cell_boundary_are_found():
+    index = GridIndex([52.0, 53.0], [13.0, 13.0], cell_km=0.5)
+    # Just south of the cell edge that the first point sits on
+    lat = index.cell_lat * (52.0 // index.cell_lat) - 0.0001
+    assert [i for i, _ in index.within(lat, 13.0, 0.5)] == [0]
+    assert index.within(lat, 13.0, 0.01) == []
+    # Same on the longitude side
+    lon = index.cell_lon * (13.0 // index.cell_lon) - 0.0001
+    assert [i for i, _ in index.within(52.0, lon, 0.5)] == [0]
+
+
+def test_nearest_widens_the_search_until_enough_points_are_found(points):
+    index = GridIndex([lat for lat, _ in points], [lon for _, lon in points])
+    for lat, lon, k in ((52.05, 13.07, 1), (52.0, 13.0, 5), (51.9, 12.9, 3), (53.0, 14.0, 2)):
+        expected = brute_force(lat, lon, points, float('inf'))[:k]
+        assert [i for i, _ in index.nearest(lat, lon, k)] == expected
+
+    # Far from every point: nothing within max_km
+    assert index.nearest(53.0, 14.0, max_km=5) == []
+
+
+def test_empty_index_finds_nothing():
+    index = GridIndex([], [])
+    assert index.within(52.0, 13.0, 1.0) == []
+    assert index.nearest(52.0, 13.0) == []
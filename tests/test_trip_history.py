@@ -0,0 +1,88 @@
+import sqlite3
+from datetime import datetime
+
+from profile_store import ProfileStore
+from trip_history import TripHistory, create_tables
+
+# Wednesday 2024-05-08, in ISO week 19
+WEDNESDAY = datetime(2024, 5, 8, 12)
+
+
+def timestamp(day, hour=12):
+    return int(datetime(2024, 5, day, hour).timestamp())
+
+
+def test_rollups_add_up_trips_per_day_week_and_month():
+    connection = sqlite3.connect(':memory:')
+    create_tables(connection)
+    history = TripHistory(connection, 'alice')
+    history.add('cycling', True, 2.5, 400, timestamp(6))
+    history.add('driving', False, 10.0, 0, timestamp(8))
+    history.add('bus', True, 4.0, 600, timestamp(8, 18))
+    history.add('walking', True, 1.0, 200, timestamp(1))
+    with connection:
+        history.write_pending()
+    history.clear_pending()
+
+    days = history.series('day', 3, WEDNESDAY)
+    assert [bucket for bucket, _ in days] == ['2024-05-06', '2024-05-07', '2024-05-08']
+    assert [day['trips'] for _, day in days] == [1, 0, 2]
+    assert days[-1][1] == {'trips': 2, 'eco_trips': 1, 'distance_m': 14000, 'co2_saved_g': 600}
+    assert history.current('week', WEDNESDAY) == {'trips': 3, 'eco_trips': 2, 'distance_m': 16500,
+                                                 'co2_saved_g': 1000}
+    assert history.series('week', 2, WEDNESDAY)[0] == ('2024-W18', {'trips': 1, 'eco_trips': 1, 'distance_m': 1000,
+                                                                    'co2_saved_g': 200})
+    assert history.current('month', WEDNESDAY)['trips'] == 4
+    assert len(history.trips()) == 4
+
+
+def test_trips_not_written_yet_are_counted():
+    connection = sqlite3.connect(':memory:')
+    create_tables(connection)
+    history = TripHistory(connection, 'alice')
+    history.add('cycling', True, 2.0, 300, timestamp(8))
+    assert history.current('day', WEDNESDAY)['co2_saved_g'] == 300
+    assert TripHistory(connection, 'alice').current('day', WEDNESDAY)['trips'] == 0
+
+
+def stored_rows(path, table):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def test_route_pick_is_written_with_the_deferred_save(store, root):
+    profile = ProfileStore(store, root, 'alice')
+    assert profile.record(('trip', 1200, None, 0))
+    profile.add_trip('cycling', True, 5.0, 1200)
+    profile.changed('total_co2_saved')
+    assert stored_rows(store.path, 'ledger_events') == 0
+    assert stored_rows(store.path, 'trips') == 0
+
+    root.run_pending()
+    assert stored_rows(store.path, 'ledger_events') == 1
+    assert stored_rows(store.path, 'trips') == 1
+    assert stored_rows(store.path, 'trip_rollups') == 3
+    assert not profile.ledger.pending and not profile.trips.pending
+
+
+def test_failed_save_keeps_events_for_the_next_one(store, root):
+    errors = []
+    profile = ProfileStore(store, root, 'alice')
+    profile.on_error = errors.append
+    profile.record(('trip', 500, None, 0))
+    profile.add_trip('bus', True, 3.0, 500)
+    profile.data['broken'] = object()
+    profile.flush()
+    root.run_pending()
+    assert len(errors) == 1
+    assert stored_rows(store.path, 'ledger_events') == 0
+
+    del profile.data['broken']
+    profile.changed('total_co2_saved')
+    profile.flush()
+    assert stored_rows(store.path, 'ledger_events') == 1
+    assert stored_rows(store.path, 'trips') == 1
+    assert store.load('alice')['total_co2_saved'] == 0.5
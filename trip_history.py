@@ -0,0 +1,120 @@
+import time
+from datetime import datetime, timedelta
+
+# Rollup periods of the trip history
+PERIODS = ('day', 'week', 'month')
+
+
+def create_tables(connection):
+    with connection:
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS trips ('
+            ' user_id TEXT NOT NULL, time INTEGER NOT NULL, route_type TEXT NOT NULL, eco INTEGER NOT NULL,'
+            ' distance_m INTEGER NOT NULL, co2_saved_g INTEGER NOT NULL)'
+        )
+        connection.execute('CREATE INDEX IF NOT EXISTS trips_by_user ON trips (user_id, time)')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS trip_rollups ('
+            ' user_id TEXT NOT NULL, period TEXT NOT NULL, bucket TEXT NOT NULL,'
+            ' trips INTEGER NOT NULL, eco_trips INTEGER NOT NULL,'
+            ' distance_m INTEGER NOT NULL, co2_saved_g INTEGER NOT NULL,'
+            ' PRIMARY KEY (user_id, period, bucket)) WITHOUT ROWID'
+        )
+
+
+def bucket_key(period, when):
+    """Key of the bucket a local datetime falls in ('2024-05-06', '2024-W19', '2024-05'; sortable)"""
+    if period == 'day':
+        return when.strftime('%Y-%m-%d')
+    if period == 'week':
+        year, week, _ = when.isocalendar()
+        return f"{year:04d}-W{week:02d}"
+    return when.strftime('%Y-%m')
+
+
+def previous_bucket(period, when):
+    """A datetime in the bucket before the one when falls in"""
+    if period == 'day':
+        return when - timedelta(days=1)
+    if period == 'week':
+        return when - timedelta(days=7)
+    return when.replace(day=1) - timedelta(days=1)
+
+
+class TripHistory:
+    """Timestamped trips of one user with daily, weekly and monthly rollups
+
+    add() keeps the trip in memory and write_pending() appends it and adds
+    it to the day, ISO week and month buckets inside the caller's
+    transaction (the app writes trips together with the profile). series()
+    (and the progress panel) reads a handful of pre-aggregated rows however
+    long the history is, plus the few trips not written yet. Buckets
+    follow local time.
+    """
+
+    def __init__(self, connection, user):
+        self.connection = connection
+        self.user = user
+        self.pending = []   # (time, route_type, eco, distance_m, co2_saved_g) not written yet
+
+    def add(self, route_type, eco, distance_km, co2_saved_g, timestamp=None):
+        """Record a chosen route (distance in km, CO₂ saved in whole grams)"""
+        timestamp = int(time.time()) if timestamp is None else timestamp
+        self.pending.append((timestamp, route_type, int(bool(eco)), round(distance_km * 1000), co2_saved_g))
+
+    def write_pending(self):
+        """Insert the added trips and update their rollups (inside the caller's transaction)"""
+        self.connection.executemany(
+            'INSERT INTO trips (user_id, time, route_type, eco, distance_m, co2_saved_g)'
+            ' VALUES (?, ?, ?, ?, ?, ?)', [(self.user, *trip) for trip in self.pending])
+        self.connection.executemany(
+            'INSERT INTO trip_rollups (user_id, period, bucket, trips, eco_trips, distance_m, co2_saved_g)'
+            ' VALUES (?, ?, ?, 1, ?, ?, ?)'
+            ' ON CONFLICT (user_id, period, bucket) DO UPDATE SET'
+            ' trips = trips + 1, eco_trips = eco_trips + excluded.eco_trips,'
+            ' distance_m = distance_m + excluded.distance_m, co2_saved_g = co2_saved_g + excluded.co2_saved_g',
+            [(self.user, period, bucket_key(period, datetime.fromtimestamp(timestamp)), eco, distance_m, saved)
+             for timestamp, _, eco, distance_m, saved in self.pending for period in PERIODS])
+
+    def clear_pending(self):
+        """Forget the added trips once the transaction that wrote them has committed"""
+        self.pending = []
+
+    def series(self, period, count, end=None):
+        """(bucket, {'trips', 'eco_trips', 'distance_m', 'co2_saved_g'}) of the last count buckets up to end
+
+        Oldest first, with zeros for buckets without trips; end defaults to now.
+        """
+        when = end or datetime.now()
+        keys = []
+        for _ in range(count):
+            keys.append(bucket_key(period, when))
+            when = previous_bucket(period, when)
+        keys.reverse()
+
+        totals = {key: {'trips': 0, 'eco_trips': 0, 'distance_m': 0, 'co2_saved_g': 0} for key in keys}
+        rows = self.connection.execute(
+            'SELECT bucket, trips, eco_trips, distance_m, co2_saved_g FROM trip_rollups'
+            ' WHERE user_id = ? AND period = ? AND bucket BETWEEN ? AND ?',
+            (self.user, period, keys[0], keys[-1]))
+        for bucket, trips, eco_trips, distance_m, saved in rows:
+            totals[bucket] = {'trips': trips, 'eco_trips': eco_trips, 'distance_m': distance_m, 'co2_saved_g': saved}
+        for timestamp, _, eco, distance_m, saved in self.pending:
+            bucket = totals.get(bucket_key(period, datetime.fromtimestamp(timestamp)))
+            if bucket is not None:
+                bucket['trips'] += 1
+                bucket['eco_trips'] += eco
+                bucket['distance_m'] += distance_m
+                bucket['co2_saved_g'] += saved
+        return [(key, totals[key]) for key in keys]
+
+    def current(self, period, now=None):
+        """Totals of the bucket now falls in"""
+        return self.series(period, 1, now)[0][1]
+
+    def trips(self, since=0):
+        """(time, route_type, eco, distance_m, co2_saved_g) of the trips since a Unix time, oldest first"""
+        stored = self.connection.execute(
+            'SELECT time, route_type, eco, distance_m, co2_saved_g FROM trips'
+            ' WHERE user_id = ? AND time >= ? ORDER BY time', (self.user, since)).fetchall()
+        return stored + [trip for trip in self.pending if trip[0] >= since]
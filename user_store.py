@@ -0,0 +1,256 @@
+import os
+import sqlite3
+import sys
+from collections import OrderedDict
+
+from serializers import SERIALIZERS, serializer_for
+
+# Profile file of earlier versions, imported into the database on first start
+USER_DATA_FILE = 'user_data.json'
+
+# Profile database (next to user_data.json)
+USER_DB_FILE = 'user_data.db'
+
+# Profile used when the app runs for a single user
+DEFAULT_USER = 'default'
+
+# Nested profile keys are joined with this into field names ('inventory.potions')
+KEY_SEPARATOR = '.'
+
+# Users whose stored fields are kept in memory to diff saves against
+CACHED_USERS = 16
+
+# Saves asked for within this long of each other are written together (ms)
+SAVE_DELAY_MS = 500
+
+
+def flatten(data, prefix=''):
+    """Nested profile dict as {field name: value} (values must be plain scalars)"""
+    fields = {}
+    for key, value in data.items():
+        name = prefix + key
+        if isinstance(value, dict):
+            fields.update(flatten(value, name + KEY_SEPARATOR))
+        elif value is None or isinstance(value, (bool, int, float, str)):
+            fields[name] = value
+        else:
+            raise ValueError(f"Cannot store {type(value).__name__} profile field: {name}")
+    return fields
+
+
+def unflatten(fields):
+    """Inverse of flatten"""
+    data = {}
+    for name, value in fields.items():
+        *parents, key = name.split(KEY_SEPARATOR)
+        node = data
+        for parent in parents:
+            node = node.setdefault(parent, {})
+        node[key] = value
+    return data
+
+
+def write_atomic(path, raw):
+    """Write bytes so that path holds the old or the new data even after a crash
+
+    The data goes to a temporary file next to path, is flushed to disk and
+    then renamed over path (the directory entry is synced too where the
+    platform allows it).
+    """
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(raw)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    if hasattr(os, 'O_DIRECTORY'):
+        directory = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+
+def same_value(a, b):
+    """Equal and of the same type (so 1 does not stand in for 1.0 or True)"""
+    return type(a) is type(b) and a == b
+
+
+class UserStore:
+    """User profiles in a SQLite database in WAL mode, one row per field
+
+    Profiles are nested dicts of numbers and strings, as the windows keep
+    them, keyed by user id. Rows are clustered by (user, field), so loading
+    one user out of tens of thousands is a single index range scan.
+    save() compares a profile with the fields last read or written (kept
+    for the cached_users most recent users) and only upserts the ones that
+    changed, in one transaction, so using a potion rewrites one row instead
+    of the whole file. WAL lets a commit
+    append to the log instead of rewriting database pages, and readers
+    never wait for writers. With synchronous=NORMAL a commit is not synced
+    on its own: the log is synced when it is checkpointed into the
+    database. A crash of the app loses nothing, and the database stays
+    consistent through a power cut, which can only roll back the last few
+    commits. The windows batch their saves through SaveScheduler on top.
+    """
+
+    def __init__(self, path=USER_DB_FILE, cached_users=CACHED_USERS):
+        self.path = path
+        self.cached_users = cached_users
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        # Under WAL, NORMAL syncs at checkpoints instead of at every commit
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS profile_fields ('
+            ' user_id TEXT NOT NULL, name TEXT NOT NULL, value,'
+            ' PRIMARY KEY (user_id, name)) WITHOUT ROWID'
+        )
+        self.connection.commit()
+        self.stored = OrderedDict()   # user -> {field name: value} as last read or written
+
+    @classmethod
+    def open(cls, path=USER_DB_FILE, legacy_file=USER_DATA_FILE):
+        """Open the database, importing legacy_file if the database is new"""
+        is_new = not os.path.exists(path)
+        store = cls(path)
+        if is_new and legacy_file and os.path.exists(legacy_file):
+            store.import_json(legacy_file)
+        return store
+
+    def close(self):
+        self.connection.close()
+
+    def fields(self, user):
+        """Stored fields of a user (read from the database the first time)"""
+        fields = self.stored.get(user)
+        if fields is None:
+            rows = self.connection.execute(
+                'SELECT name, value FROM profile_fields WHERE user_id = ?', (user,))
+            fields = dict(rows)
+        self.remember(user, fields)
+        return fields
+
+    def remember(self, user, fields):
+        """Keep a user's stored fields, forgetting the least recently used user if full"""
+        self.stored[user] = fields
+        self.stored.move_to_end(user)
+        if len(self.stored) > self.cached_users:
+            self.stored.popitem(last=False)
+
+    def user_count(self):
+        return self.connection.execute('SELECT COUNT(DISTINCT user_id) FROM profile_fields').fetchone()[0]
+
+    def load(self, user=DEFAULT_USER):
+        """Profile of a user, or None if nothing is stored for them"""
+        self.stored.pop(user, None)
+        fields = self.fields(user)
+        return unflatten(fields) if fields else None
+
+    def save(self, data, user=DEFAULT_USER):
+        """Write the fields of a profile that changed; returns how many rows were written"""
+        return self.save_many([(user, data)])
+
+    def save_many(self, profiles):
+        """save() for many (user, profile) pairs in one transaction"""
+        written = []
+        with self.connection:
+            for user, data in profiles:
+                written.append((user, *self.write_fields(user, data)))
+        # Only remember what was written once the transaction has committed
+        for user, fields, _ in written:
+            self.remember(user, fields)
+        return sum(rows for _, _, rows in written)
+
+    def write_fields(self, user, data):
+        """Upsert the fields of a profile that changed, inside the caller's transaction
+
+        Returns the profile's fields and how many rows were written; pass the
+        fields to remember() once the transaction has committed.
+        """
+        fields = flatten(data)
+        stored = self.fields(user)
+        changed = [(user, name, value) for name, value in fields.items()
+                   if name not in stored or not same_value(stored[name], value)]
+        removed = [(user, name) for name in stored if name not in fields]
+        if changed or removed:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO profile_fields (user_id, name, value) VALUES (?, ?, ?)', changed)
+            self.connection.executemany(
+                'DELETE FROM profile_fields WHERE user_id = ? AND name = ?', removed)
+        return fields, len(changed) + len(removed)
+
+    def import_file(self, path, user=DEFAULT_USER, serializer=None):
+        """Store a profile from a file, replacing the user's fields
+
+        The serializer defaults to the one for the file's extension (see serializers.py).
+        """
+        serializer = serializer or serializer_for(path)
+        with open(path, 'rb') as f:
+            data = serializer.loads(f.read())
+        return self.save(data, user)
+
+    def export_file(self, path, user=DEFAULT_USER, serializer=None):
+        """Write a user's profile to a file (indented JSON unless the extension asks for another format)"""
+        serializer = serializer or serializer_for(path)
+        data = self.load(user) or {}
+        write_atomic(path, serializer.dumps(data))
+        return data
+
+    def import_json(self, path, user=DEFAULT_USER):
+        """Store a profile from a JSON file (as user_data.json), replacing the user's fields"""
+        return self.import_file(path, user, SERIALIZERS['json'])
+
+    def export_json(self, path, user=DEFAULT_USER):
+        """Write a user's profile as indented JSON (the user_data.json layout)"""
+        return self.export_file(path, user, SERIALIZERS['json'])
+
+
+class SaveScheduler:
+    """Write-behind saving for a Tk window
+
+    request() marks the profile dirty and schedules one write delay_ms
+    later on the Tk event loop; further requests before then ride along
+    with it. flush() writes at once if anything is pending (call it when
+    the window closes), so a crash loses at most delay_ms of progress.
+    """
+
+    def __init__(self, root, write, delay_ms=SAVE_DELAY_MS):
+        self.root = root
+        self.write = write        # called without arguments, handles its own errors
+        self.delay_ms = delay_ms
+        self.job = None           # pending after() id, None when nothing is dirty
+        self.requests = 0
+        self.writes = 0
+
+    def request(self):
+        self.requests += 1
+        if self.job is None:
+            self.job = self.root.after(self.delay_ms, self.flush)
+
+    def flush(self):
+        """Write now if a save is pending"""
+        if self.job is None:
+            return
+        self.root.after_cancel(self.job)
+        self.job = None
+        self.writes += 1
+        self.write()
+
+
+if __name__ == '__main__':
+    # python user_store.py import|export [file] [database] [user]
+    # (the file's extension picks the format: .json, or .scp for the compact binary one)
+    command = sys.argv[1] if len(sys.argv) > 1 else 'export'
+    profile_file = sys.argv[2] if len(sys.argv) > 2 else USER_DATA_FILE
+    store = UserStore(sys.argv[3] if len(sys.argv) > 3 else USER_DB_FILE)
+    user = sys.argv[4] if len(sys.argv) > 4 else DEFAULT_USER
+    if command == 'import':
+        store.import_file(profile_file, user)
+        print(f"Imported {profile_file} into {store.path} as {user}")
+    elif command == 'export':
+        store.export_file(profile_file, user)
+        print(f"Exported {user} from {store.path} to {profile_file}")
+    else:
+        sys.exit(f"Unknown command: {command} (expected import or export)")
+    store.close()